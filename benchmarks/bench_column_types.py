@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark column type inference as the number of columns grows.
+
+Usage::
+
+    $ python benchmarks/bench_column_types.py --rows 100000 --columns 2 50 400
+
+"""
+
+from __future__ import print_function, unicode_literals
+import argparse
+import timeit
+
+from cli_helpers.compat import zip_longest
+from cli_helpers.tabular_output import TabularOutputFormatter
+
+
+def make_data(num_rows, num_columns):
+    """Make *num_rows* rows that mix int, float, and text columns."""
+    row = [(i, i + 0.5, 'text {}'.format(i))[i % 3] for i in range(num_columns)]
+    return [list(row) for _ in range(num_rows)]
+
+
+def transpose_column_types(formatter, data):
+    """The column-major inference used before the single-pass engine."""
+    return [formatter._get_column_type(column) for column in zip_longest(*data)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--columns', type=int, nargs='+',
+                        default=[2, 10, 50, 100, 400])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    formatter = TabularOutputFormatter()
+    print('{:>8} {:>8} {:>12} {:>12}'.format(
+        'rows', 'columns', 'single-pass', 'transpose'))
+    for num_columns in args.columns:
+        data = make_data(args.rows, num_columns)
+        single = min(timeit.repeat(
+            lambda: formatter._get_column_types(data),
+            number=1, repeat=args.repeat))
+        transpose = min(timeit.repeat(
+            lambda: transpose_column_types(formatter, data),
+            number=1, repeat=args.repeat))
+        print('{:>8} {:>8} {:>11.4f}s {:>11.4f}s'.format(
+            args.rows, num_columns, single, transpose))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark every registered output format.
+
+Each run formats generated data in every combination of format, row count,
+column count, data mix and styling, and records the fastest of a few
+repeats. Combinations with more than ``--max-cells`` cells are skipped, so
+the largest row counts are only measured for narrow tables unless the limit
+is raised.
+
+The results are written as JSON, so they can be stored as a baseline and
+compared with later runs::
+
+    $ python benchmarks/bench_formats.py --output baseline.json
+    $ python benchmarks/bench_formats.py --baseline baseline.json
+
+When a baseline is given, the benchmarks that are slower than the baseline
+by more than ``--threshold`` are reported, and the exit status is 1.
+
+"""
+
+from __future__ import print_function, unicode_literals
+import argparse
+from decimal import Decimal
+import json
+import platform
+import random
+import sys
+import timeit
+
+import cli_helpers
+from cli_helpers.compat import HAS_PYGMENTS
+from cli_helpers.tabular_output import TabularOutputFormatter
+
+ROWS = (10, 1000, 100000, 1000000)
+COLUMNS = (2, 20, 500)
+MAX_CELLS = 2000000
+
+
+def _ints(rng, i):
+    return rng.randint(-10 ** 9, 10 ** 9)
+
+
+def _floats(rng, i):
+    return rng.uniform(-10 ** 6, 10 ** 6)
+
+
+def _decimals(rng, i):
+    return Decimal(rng.randint(-10 ** 8, 10 ** 8)) / 100
+
+
+def _bytes(rng, i):
+    return bytes(bytearray(rng.randint(0, 255) for _ in range(8)))
+
+
+def _wide_unicode(rng, i):
+    return ''.join(rng.choice('观音魚配列テキストΠοσειδῶνтекст')
+                   for _ in range(rng.randint(1, 12)))
+
+
+def _null_heavy(rng, i):
+    return None if rng.random() < 0.9 else 'value {}'.format(i)
+
+
+def _multiline(rng, i):
+    return '\n'.join('line {}'.format(n) for n in range(rng.randint(1, 3)))
+
+
+def _mixed(rng, i):
+    return MIXES[rng.choice(sorted(set(MIXES) - {'mixed'}))](rng, i)
+
+
+#: Functions that make a cell value for each data mix.
+MIXES = {
+    'ints': _ints,
+    'floats': _floats,
+    'decimals': _decimals,
+    'bytes': _bytes,
+    'wide-unicode': _wide_unicode,
+    'null-heavy': _null_heavy,
+    'multiline': _multiline,
+    'mixed': _mixed,
+}
+
+
+def make_data(mix, num_rows, num_columns):
+    """Make the rows for a data *mix* (the same rows for every run)."""
+    rng = random.Random(0)
+    make_value = MIXES[mix]
+    return [[make_value(rng, i) for _ in range(num_columns)]
+            for i in range(num_rows)]
+
+
+def get_style():
+    """Get a Pygments style that styles every output token."""
+    from pygments.style import Style
+    from pygments.token import Token
+
+    class BenchmarkStyle(Style):
+        default_style = ''
+        styles = {
+            Token.Output.Header: 'bold ansibrightred',
+            Token.Output.OddRow: 'bg:#eee #111',
+            Token.Output.EvenRow: '#0f0',
+            Token.Output.Null: '#888',
+            Token.Output.TableSeparator: 'ansibrightblack',
+        }
+    return BenchmarkStyle
+
+
+def run_benchmark(formatter, format_name, data, headers, style, repeat):
+    """Time formatting *data* and consuming every line.
+
+    :return: The fastest time in seconds and the number of lines.
+    :rtype: tuple
+
+    """
+    lines = []
+
+    def render():
+        lines[:] = [sum(1 for _ in formatter.format_output(
+            data, headers, format_name=format_name, style=style))]
+
+    seconds = min(timeit.repeat(render, number=1, repeat=repeat))
+    return seconds, lines[0]
+
+
+def benchmarks(args):
+    """Run the benchmarks selected by *args*, yielding each result."""
+    formatter = TabularOutputFormatter()
+    styles = [('unstyled', None)]
+    if 'styled' in args.styles:
+        if HAS_PYGMENTS:
+            styles.append(('styled', get_style()))
+        else:
+            print('Pygments is not installed, skipping styled runs.',
+                  file=sys.stderr)
+    styles = [s for s in styles if s[0] in args.styles]
+
+    for mix in args.mixes:
+        for num_rows in args.rows:
+            for num_columns in args.columns:
+                if num_rows * num_columns > args.max_cells:
+                    continue
+                data = make_data(mix, num_rows, num_columns)
+                headers = ['column {}'.format(i) for i in range(num_columns)]
+                for format_name in args.formats:
+                    for style_name, style in styles:
+                        seconds, lines = run_benchmark(
+                            formatter, format_name, data, headers, style,
+                            args.repeat)
+                        yield {
+                            'format': format_name,
+                            'rows': num_rows,
+                            'columns': num_columns,
+                            'mix': mix,
+                            'style': style_name,
+                            'seconds': seconds,
+                            'lines': lines,
+                        }
+
+
+def _key(result):
+    return (result['format'], result['rows'], result['columns'],
+            result['mix'], result['style'])
+
+
+def compare(results, baseline, threshold):
+    """Get the *results* that are slower than the *baseline* results.
+
+    :return: The (result, baseline result) pairs that regressed.
+    :rtype: list
+
+    """
+    baseline = {_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        previous = baseline.get(_key(result))
+        if previous and result['seconds'] > previous['seconds'] * threshold:
+            regressions.append((result, previous))
+    return regressions
+
+
+def main():
+    formats = TabularOutputFormatter().supported_formats
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--formats', nargs='+', default=formats,
+                        choices=formats, metavar='FORMAT')
+    parser.add_argument('--rows', type=int, nargs='+', default=ROWS)
+    parser.add_argument('--columns', type=int, nargs='+', default=COLUMNS)
+    parser.add_argument('--mixes', nargs='+', default=sorted(MIXES),
+                        choices=sorted(MIXES), metavar='MIX')
+    parser.add_argument('--styles', nargs='+', default=('unstyled', 'styled'),
+                        choices=('unstyled', 'styled'))
+    parser.add_argument('--max-cells', type=int, default=MAX_CELLS,
+                        help='skip runs with more cells than this')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write the results to this file')
+    parser.add_argument('--baseline', help='compare with these results')
+    parser.add_argument('--threshold', type=float, default=1.1,
+                        help='the slowdown that counts as a regression')
+    args = parser.parse_args()
+
+    results = []
+    for result in benchmarks(args):
+        results.append(result)
+        print('{format:>15} {rows:>8} rows {columns:>4} cols {mix:>13} '
+              '{style:>9} {seconds:10.4f}s'.format(**result), file=sys.stderr)
+
+    report = {
+        'meta': {
+            'cli_helpers': cli_helpers.__version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for result, previous in regressions:
+            print('regression: {format} {rows} rows {columns} cols {mix} '
+                  '{style}: {seconds:.4f}s'.format(**result),
+                  'vs {:.4f}s'.format(previous['seconds']), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
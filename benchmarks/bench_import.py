@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Measure the time it takes to import CLI Helpers.
+
+Each module is imported in a new interpreter started with
+``python -X importtime``, and the cumulative import time reported by Python
+is recorded. The median of the runs is printed, followed by the slowest
+modules that were imported along with it::
+
+    $ python benchmarks/bench_import.py
+    $ python benchmarks/bench_import.py --modules cli_helpers.config --top 20
+
+"""
+
+from __future__ import print_function, unicode_literals
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = ('cli_helpers.tabular_output', 'cli_helpers.config',
+           'cli_helpers.utils')
+
+
+def import_times(module):
+    """Import *module* in a new interpreter.
+
+    :return: The cumulative import time, in microseconds, of each module
+        that was imported.
+    :rtype: dict
+
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        [os.getcwd()] + os.environ.get('PYTHONPATH', '').split(os.pathsep)))
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+        stderr=subprocess.PIPE, env=env, check=True,
+        universal_newlines=True).stderr
+
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--modules', nargs='+', default=MODULES)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10,
+                        help='the number of slowest modules to show')
+    args = parser.parse_args()
+
+    for module in args.modules:
+        runs = [import_times(module) for _ in range(args.repeat)]
+        total = statistics.median(run[module] for run in runs)
+        print('{}: {:.1f} ms'.format(module, total / 1000))
+
+        slowest = sorted((item for item in runs[-1].items()
+                          if item[0] != module), key=lambda item: -item[1])
+        for name, cumulative in slowest[:args.top]:
+            print('    {:>8.1f} ms  {}'.format(cumulative / 1000, name))
+
+
+if __name__ == '__main__':
+    main()
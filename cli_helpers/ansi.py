@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""A lightweight ANSI styling backend that doesn't need Pygments.
+
+A style can be a :term:`mapping` of token names to style strings, instead
+of a Pygments style::
+
+    style = {
+        'Token.Output.Header': 'bold',
+        'Token.Output.OddRow': 'bg:#eee #111',
+        'Token.Output.EvenRow': '#0f0',
+        'Token.Output.TableSeparator': 'ansibrightred',
+    }
+
+The style strings use the same syntax as Pygments styles: a foreground
+color (``#rgb``, ``#rrggbb`` or an ANSI color name like ``ansired``), a
+background color prefixed with ``bg:``, and ``bold``, ``italic`` and
+``underline``. Like in Pygments, a token inherits the style of its parent
+token (e.g. ``Token.Output.OddRow`` inherits ``Token.Output``), unless
+its style contains ``noinherit``.
+
+Colors are output as the nearest of the 256 xterm colors, with the same
+escape sequences as Pygments' ``Terminal256Formatter``, or as 24-bit colors
+with an :class:`AnsiStyle` whose *true_color* is set.
+
+"""
+
+from __future__ import unicode_literals
+from functools import lru_cache
+
+from cli_helpers.compat import Mapping
+
+#: The ANSI color names, and the SGR codes of their foreground colors.
+ANSI_COLORS = {
+    'ansiblack': 30, 'ansired': 31, 'ansigreen': 32, 'ansiyellow': 33,
+    'ansiblue': 34, 'ansimagenta': 35, 'ansicyan': 36, 'ansigray': 37,
+    'ansibrightblack': 90, 'ansibrightred': 91, 'ansibrightgreen': 92,
+    'ansibrightyellow': 93, 'ansibrightblue': 94, 'ansibrightmagenta': 95,
+    'ansibrightcyan': 96, 'ansiwhite': 97,
+}
+
+_ATTRIBUTES = ('bold', 'italic', 'underline')
+
+
+def _make_xterm_colors():
+    """Get the RGB values of the xterm colors, by index."""
+    colors = [
+        (0x00, 0x00, 0x00), (0xcd, 0x00, 0x00), (0x00, 0xcd, 0x00),
+        (0xcd, 0xcd, 0x00), (0x00, 0x00, 0xee), (0xcd, 0x00, 0xcd),
+        (0x00, 0xcd, 0xcd), (0xe5, 0xe5, 0xe5), (0x7f, 0x7f, 0x7f),
+        (0xff, 0x00, 0x00), (0x00, 0xff, 0x00), (0xff, 0xff, 0x00),
+        (0x5c, 0x5c, 0xff), (0xff, 0x00, 0xff), (0x00, 0xff, 0xff),
+        (0xff, 0xff, 0xff),
+    ]
+    levels = (0x00, 0x5f, 0x87, 0xaf, 0xd7, 0xff)
+    colors.extend((levels[(i // 36) % 6], levels[(i // 6) % 6], levels[i % 6])
+                  for i in range(216))
+    # Like in Pygments, color 232 (the darkest gray) is black, so it is never
+    # the nearest color.
+    colors.append((0x00, 0x00, 0x00))
+    colors.extend((8 + i * 10,) * 3 for i in range(1, 22))
+    return colors
+
+
+_XTERM_COLORS = _make_xterm_colors()
+
+
+class AnsiStyle(Mapping):
+    """A style for the built-in ANSI backend.
+
+    Any :term:`mapping` of token names to style strings can be used as a
+    style. An :class:`AnsiStyle` is an immutable (and hashable) copy of
+    one, which can also select 24-bit colors.
+
+    :param styles: A :term:`mapping` of token names (or Pygments tokens) to
+        style strings.
+    :param bool true_color: Whether to output 24-bit colors instead of the
+        nearest xterm colors.
+
+    """
+
+    def __init__(self, styles=(), true_color=False):
+        self._styles = {str(token): value
+                        for token, value in dict(styles).items()}
+        self.true_color = true_color
+        self._hash = None
+
+    def __getitem__(self, token):
+        return self._styles[str(token)]
+
+    def __iter__(self):
+        return iter(self._styles)
+
+    def __len__(self):
+        return len(self._styles)
+
+    def __eq__(self, other):
+        if isinstance(other, AnsiStyle):
+            return (self._styles == other._styles and
+                    self.true_color == other.true_color)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash((frozenset(self._styles.items()),
+                               self.true_color))
+        return self._hash
+
+    def __repr__(self):
+        return 'AnsiStyle({!r}, true_color={!r})'.format(self._styles,
+                                                         self.true_color)
+
+
+def get_style_codes(style):
+    """Get the ANSI escape sequences that *style* uses for each token.
+
+    :param style: A :term:`mapping` of token names to style strings.
+    :return: The codes that start and end the text of each token in the
+        style, by the token's name.
+    :rtype: dict
+    :raises ValueError: If a style string can't be parsed.
+
+    """
+    if not isinstance(style, AnsiStyle):
+        style = AnsiStyle(style)
+    return _get_style_codes(style)
+
+
+@lru_cache()
+def _get_style_codes(style):
+    parsed = {}
+    for token in sorted(style, key=len):
+        inherited = (parsed.get('Token', {})
+                     if 'noinherit' in style[token].split()
+                     else _get_parent_style(parsed, token))
+        parsed[token] = _parse_style(style[token], inherited)
+    return {token: _escape_codes(attributes, style.true_color)
+            for token, attributes in parsed.items()}
+
+
+def _get_parent_style(parsed, token):
+    """Get the parsed style that *token* inherits, if any."""
+    while '.' in token:
+        token = token.rpartition('.')[0]
+        if token in parsed:
+            return parsed[token]
+    return {}
+
+
+def _parse_style(text, inherited):
+    """Parse the style string *text* into a dict of attributes."""
+    attributes = dict(inherited)
+    for word in text.split():
+        if word in _ATTRIBUTES:
+            attributes[word] = True
+        elif word.startswith('no') and word[2:] in _ATTRIBUTES:
+            attributes.pop(word[2:], None)
+        elif word in ('noinherit', 'roman', 'sans', 'mono') or \
+                word.startswith('border:'):
+            continue
+        elif word.startswith('bg:'):
+            attributes['bg'] = _parse_color(word[3:])
+        else:
+            attributes['fg'] = _parse_color(word)
+    return attributes
+
+
+def _parse_color(text):
+    """Parse a color into an ANSI color name or an RGB tuple."""
+    name = text.lstrip('#')
+    if name in ANSI_COLORS:
+        return name
+    elif text.startswith('#') and len(name) in (3, 6):
+        if len(name) == 3:
+            name = ''.join(c * 2 for c in name)
+        try:
+            rgb = int(name, 16)
+        except ValueError:
+            pass
+        else:
+            return (rgb >> 16) & 0xff, (rgb >> 8) & 0xff, rgb & 0xff
+    elif not text:
+        return None
+    raise ValueError('unrecognized color "{}"'.format(text))
+
+
+def _escape_codes(attributes, true_color):
+    """Get the codes that start and end text with the *attributes*."""
+    on, off = [], []
+    for layer, offset in (('fg', 0), ('bg', 10)):
+        color = attributes.get(layer)
+        if color is None:
+            continue
+        if color in ANSI_COLORS:
+            on.append(str(ANSI_COLORS[color] + offset))
+        elif true_color:
+            on.extend([str(38 + offset), '2'] + [str(c) for c in color])
+        else:
+            on.extend([str(38 + offset), '5',
+                       str(_closest_xterm_color(color))])
+        off.append(str(39 + offset))
+    words = [code for word, code in (('bold', '01'), ('underline', '04'),
+                                     ('italic', '03'))
+             if attributes.get(word)]
+    if words:
+        on.extend(words)
+        off.append('00')
+    return _escape(on), _escape(off)
+
+
+def _escape(codes):
+    return '\033[{}m'.format(';'.join(codes)) if codes else ''
+
+
+@lru_cache(maxsize=None)
+def _closest_xterm_color(rgb):
+    """Get the index of the xterm color that is nearest to *rgb*."""
+    distances = [sum((a - b) ** 2 for a, b in zip(rgb, color))
+                 for color in _XTERM_COLORS]
+    return distances.index(min(distances))
+
+
+def style_text(token, text, style):
+    """Get the styled text for *text* using *token* type.
+
+    Each line of the text is styled separately, and the token inherits the
+    codes of its parent tokens if *style* doesn't define it.
+
+    :param str token: The token type.
+    :param str text: The text to style.
+    :param style: A :term:`mapping` of token names to style strings.
+    :return: The styled text.
+    :rtype: str
+
+    """
+    codes = get_style_codes(style)
+    token = str(token)
+    while token not in codes and '.' in token:
+        token = token.rpartition('.')[0]
+    if token not in codes:
+        return text
+    on, off = codes[token]
+    return '\n'.join(on + line + off if line else line
+                     for line in text.split('\n'))
@@ -2,6 +2,7 @@
 """OS and Python compatibility support."""
 
 from decimal import Decimal
+from importlib.util import find_spec
 import sys
 
 PY2 = sys.version_info[0] == 2
@@ -16,6 +17,7 @@ if PY2:
     int_types = (int, long)
 
     from UserDict import UserDict
+    from collections import Mapping
     from backports import csv
 
     from StringIO import StringIO
@@ -27,16 +29,32 @@ else:
     int_types = (int,)
 
     from collections import UserDict
+    from collections.abc import Mapping
     import csv
     from io import StringIO
     from itertools import zip_longest
 
 
-HAS_PYGMENTS = True
-try:
+# Pygments is only imported when output is styled.
+HAS_PYGMENTS = find_spec('pygments') is not None
+
+
+def get_terminal256_formatter():
+    """Get Pygments' ``Terminal256Formatter`` class, importing it on first
+    use, or :data:`None` if Pygments isn't installed."""
+    if not HAS_PYGMENTS:
+        return None
     from pygments.formatters.terminal256 import Terminal256Formatter
-except ImportError:
-    HAS_PYGMENTS = False
-    Terminal256Formatter = None
+    return Terminal256Formatter
+
+
+def __getattr__(name):
+    # Look up ``Terminal256Formatter`` lazily on Python 3.7+ (PEP 562).
+    # Python 3.6 doesn't call this, so use get_terminal256_formatter().
+    if name == 'Terminal256Formatter':
+        return get_terminal256_formatter()
+    raise AttributeError('module {!r} has no attribute {!r}'.format(
+        __name__, name))
+
 
 float_types = (float, Decimal)
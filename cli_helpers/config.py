@@ -6,9 +6,6 @@ import io
 import logging
 import os
 
-from configobj import ConfigObj, ConfigObjError
-from validate import ValidateError, Validator
-
 from .compat import MAC, text_type, UserDict, WIN
 
 logger = logging.getLogger(__name__)
@@ -42,6 +39,10 @@ class Config(UserDict, object):
 
     def __init__(self, app_name, app_author, filename, default=None,
                  validate=False, write_default=False, additional_dirs=()):
+        # configobj is imported when it's used, so that importing this module
+        # is fast.
+        from configobj import ConfigObj
+
         super(Config, self).__init__()
         #: The :class:`ConfigObj` instance.
         self.data = ConfigObj()
@@ -80,6 +81,9 @@ class Config(UserDict, object):
         :raises DefaultConfigValidationError: There was a validation error with
                                               the *default* file.
         """
+        from configobj import ConfigObj
+        from validate import ValidateError, Validator
+
         if self.validate:
             self.default_config = ConfigObj(configspec=self.default_file,
                                             list_values=False, _inspec=True,
@@ -157,6 +161,9 @@ class Config(UserDict, object):
 
         :param str f: The path to a file to read.
         """
+        from configobj import ConfigObj, ConfigObjError
+        from validate import Validator
+
         configspec = self.default_file if self.validate else None
         try:
             config = ConfigObj(infile=f, configspec=configspec,
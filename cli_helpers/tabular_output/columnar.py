@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""Support for data stored by column instead of by row.
+
+The supported columnar types are:
+
+  - a :term:`mapping` of column names to columns (any :term:`sequence`,
+    NumPy array, or Arrow array)
+  - a two-dimensional or structured `NumPy <https://numpy.org/>`_ array
+  - an `Apache Arrow <https://arrow.apache.org/>`_ ``Table`` or
+    ``RecordBatch``
+
+A column can be dictionary-encoded, as a :class:`DictionaryColumn` or an
+Arrow dictionary array. Each distinct value of such a column is only
+preprocessed once.
+
+NumPy and pyarrow are never imported by this module. Their objects are
+recognized by the module their type is defined in, so the libraries only
+need to be installed when they are used.
+
+"""
+
+from __future__ import unicode_literals
+
+from cli_helpers.compat import binary_type, text_type, Mapping
+
+
+class DictionaryColumn(object):
+    """A dictionary-encoded column: the distinct values of the column, and
+    a code for each cell.
+
+    The value of a cell is ``dictionary[code]``, and a code of -1 is a
+    missing value (:data:`None`), like the codes of a pandas
+    ``Categorical``.
+
+    :param codes: A :term:`sequence` of integers, or a NumPy array.
+    :param dictionary: A :term:`sequence` of values, or a NumPy array.
+
+    """
+
+    def __init__(self, codes, dictionary):
+        self.codes = column_values(codes)
+        self.dictionary = column_values(dictionary)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        return iter(self.decode())
+
+    def decode(self, dictionary=None, missing_value=None):
+        """Get the values of the column.
+
+        :param list dictionary: The values to decode the codes with
+            (optional, defaults to the column's dictionary), e.g. the
+            processed dictionary.
+        :param missing_value: The value of the missing cells.
+        :return: The values, referring to the items of the dictionary.
+        :rtype: list
+
+        """
+        dictionary = list(self.dictionary if dictionary is None
+                          else dictionary)
+        dictionary.append(missing_value)
+        return list(map(dictionary.__getitem__, self.codes))
+
+
+def _module(obj):
+    """Get the top-level name of the module that defines *obj*'s type."""
+    return type(obj).__module__.partition('.')[0]
+
+
+def is_columnar(data):
+    """Check if *data* is one of the supported columnar types."""
+    if isinstance(data, Mapping):
+        return True
+    module = _module(data)
+    if module == 'numpy':
+        return hasattr(data, 'dtype') and (data.ndim == 2 or
+                                           bool(data.dtype.names))
+    return module == 'pyarrow' and hasattr(data, 'schema')
+
+
+def _numpy_type(dtype):
+    """Get the cell type for the NumPy *dtype* (or None if it's unknown)."""
+    if dtype.kind in 'iu':
+        return int
+    elif dtype.kind == 'f':
+        return float
+    elif dtype.kind == 'S':
+        return binary_type
+    elif dtype.kind == 'U':
+        return text_type
+    return None
+
+
+def _arrow_type(data_type):
+    """Get the cell type for the Arrow *data_type* (or None if it's
+    unknown)."""
+    import pyarrow.types as types
+
+    if types.is_integer(data_type):
+        return int
+    elif types.is_floating(data_type) or types.is_decimal(data_type):
+        return float
+    elif (types.is_binary(data_type) or types.is_large_binary(data_type) or
+          types.is_fixed_size_binary(data_type)):
+        return binary_type
+    elif types.is_string(data_type) or types.is_large_string(data_type):
+        return text_type
+    elif types.is_null(data_type):
+        return type(None)
+    return None
+
+
+def column_values(column):
+    """Get the values of *column* as a :class:`list` of Python objects."""
+    if _module(column) == 'numpy' and hasattr(column, 'tolist'):
+        return column.tolist()
+    return list(column)
+
+
+def _column(values):
+    """Get the values and cell type of a single column.
+
+    NumPy arrays are returned as they are, so they can be processed by NumPy
+    (see :func:`column_values`).
+
+    """
+    module = _module(values)
+    if module == 'numpy' and hasattr(values, 'dtype'):
+        return values, _numpy_type(values.dtype)
+    elif module == 'pyarrow' and hasattr(values, 'to_pylist'):
+        import pyarrow.types as types
+
+        if types.is_dictionary(values.type):
+            return _arrow_dictionary_column(values), _arrow_type(
+                values.type.value_type)
+        return values.to_pylist(), _arrow_type(values.type)
+    return values, None
+
+
+def _arrow_dictionary_column(values):
+    """Get a :class:`DictionaryColumn` from an Arrow dictionary array (or
+    chunked array)."""
+    if hasattr(values, 'combine_chunks'):
+        if hasattr(values, 'unify_dictionaries'):
+            values = values.unify_dictionaries()
+        values = values.combine_chunks()
+    return DictionaryColumn(values.indices.fill_null(-1).to_pylist(),
+                            values.dictionary.to_pylist())
+
+
+def get_columns(data):
+    """Get the column names, columns and cell types of columnar *data*.
+
+    The cell types are the Python types of the values in each column (e.g.
+    :class:`int` or :class:`float`), read from the NumPy dtypes or the Arrow
+    schema. The type is :data:`None` when it can't be determined without
+    looking at the values.
+
+    :param data: The columnar data (see :func:`is_columnar`).
+    :return: The column names, the columns, and the cell types.
+    :rtype: tuple
+
+    """
+    if isinstance(data, Mapping):
+        names = list(data.keys())
+        columns = [_column(values) for values in data.values()]
+    elif _module(data) == 'numpy':
+        if data.dtype.names:
+            names = list(data.dtype.names)
+            columns = [_column(data[name]) for name in names]
+        else:
+            names = None
+            columns = [_column(data[:, i]) for i in range(data.shape[1])]
+    else:
+        names = list(data.schema.names)
+        columns = [_column(data.column(i)) for i in range(len(names))]
+
+    return (names, [values for values, _ in columns],
+            [cell_type for _, cell_type in columns])
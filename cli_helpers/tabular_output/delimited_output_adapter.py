@@ -3,6 +3,7 @@
 
 from __future__ import unicode_literals
 import contextlib
+from itertools import islice
 
 from cli_helpers.compat import csv, StringIO
 from cli_helpers.utils import filter_dict_by_key
@@ -23,8 +24,29 @@ class linewriter(object):
         self.line = d
 
 
-def adapter(data, headers, table_format='csv', **kwargs):
-    """Wrap the formatting inside a function for TabularOutputFormatter."""
+class blockwriter(object):
+    """Collect the lines written by a :func:`csv.writer` into a list that
+    is reused for each block."""
+
+    def __init__(self):
+        self.lines = []
+        self.write = self.lines.append
+
+    def pop_block(self):
+        """Get the lines written since the last block, as one string."""
+        block = '\n'.join(self.lines)
+        del self.lines[:]
+        return block
+
+
+def adapter(data, headers, table_format='csv', block_size=None, **kwargs):
+    """Wrap the formatting inside a function for TabularOutputFormatter.
+
+    The header line is yielded first. If a *block_size* is given, the rows
+    are then written in blocks of *block_size* rows, and each block is
+    yielded as one string of lines (without a final newline).
+
+    """
     keys = ('dialect', 'delimiter', 'doublequote', 'escapechar',
             'quotechar', 'quoting', 'skipinitialspace', 'strict')
     if table_format == 'csv':
@@ -42,7 +64,25 @@ def adapter(data, headers, table_format='csv', **kwargs):
     writer.writerow(headers)
     yield l.line
 
+    if block_size is not None:
+        for block in _write_blocks(data, block_size, ckwargs):
+            yield block
+        return
+
     for row in data:
         l.reset()
         writer.writerow(row)
         yield l.line
+
+
+def _write_blocks(data, block_size, ckwargs):
+    """Write the rows of *data* in blocks of *block_size* rows, each with a
+    single :meth:`csv.writer.writerows` call."""
+    if block_size < 1:
+        raise ValueError('block_size must be at least 1')
+    b = blockwriter()
+    writer = csv.writer(b, **ckwargs)
+    data = iter(data)
+    for rows in iter(lambda: list(islice(data, block_size)), []):
+        writer.writerows(rows)
+        yield b.pop_block()
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""Measure the stages of formatting output.
+
+Set :attr:`TabularOutputFormatter.instrument
+<cli_helpers.tabular_output.TabularOutputFormatter.instrument>` to a callable
+to have it called with a :class:`StageStats` for each stage of every call to
+:meth:`~cli_helpers.tabular_output.TabularOutputFormatter.format_output`::
+
+  >>> from cli_helpers.tabular_output import TabularOutputFormatter
+  >>> from cli_helpers.tabular_output.instrumentation import FormatStats
+  >>> stats = FormatStats()
+  >>> formatter = TabularOutputFormatter('csv', instrument=stats)
+  >>> data = [[1, 'a'], [2, 'b']]
+  >>> output = list(formatter.format_output(data, ['n', 's']))
+  >>> for s in stats.stages:
+  ...     print(s.stage, s.name, s.rows, s.cells)
+  column_types column_types 2 4
+  preprocessor fused(override_missing_value, bytes_to_string) 2 4
+  formatter csv 2 4
+
+The stages are:
+
+  - ``column_types``: inferring the column types
+  - ``preprocessor``: a preprocessor (or several preprocessors that were
+    fused into one function, see :mod:`~cli_helpers.tabular_output.pipeline`)
+  - ``formatter``: the adapter that formats the lines
+
+Most stages are lazy, so their time is spent while the output is consumed.
+The time of each stage excludes the time spent in the stages before it, and
+in the code that reads the rows. Lazy stages are reported once the output
+has been consumed (or closed).
+
+When :attr:`~cli_helpers.tabular_output.TabularOutputFormatter.instrument`
+is :data:`None` (the default), nothing is measured.
+
+"""
+
+from __future__ import unicode_literals
+from collections import namedtuple, OrderedDict
+from contextlib import contextmanager
+from timeit import default_timer
+
+StageStats = namedtuple('StageStats', 'stage name seconds rows cells')
+StageStats.__doc__ = """The measurements of a stage of formatting output.
+
+:param str stage: The kind of stage (``column_types``, ``preprocessor`` or
+    ``formatter``).
+:param str name: The name of the preprocessor or format.
+:param float seconds: The wall time spent in the stage.
+:param int rows: The number of rows processed.
+:param int cells: The number of cells processed.
+
+"""
+
+
+class FormatStats(object):
+    """Collect the :class:`StageStats` of calls to
+    :meth:`~cli_helpers.tabular_output.TabularOutputFormatter.format_output`.
+
+    A :class:`FormatStats` object can be used as the formatter's
+    ``instrument``. It keeps every :class:`StageStats` in :attr:`stages`,
+    and sums them by stage in :meth:`totals`.
+
+    """
+
+    def __init__(self):
+        self.stages = []
+
+    def __call__(self, stats):
+        self.stages.append(stats)
+
+    def totals(self):
+        """Sum the measurements of each stage.
+
+        :return: The summed :class:`StageStats` for each stage and name, in
+            the order they were first seen.
+        :rtype: list
+
+        """
+        totals = OrderedDict()
+        for stats in self.stages:
+            key = (stats.stage, stats.name)
+            if key in totals:
+                total = totals[key]
+                stats = total._replace(seconds=total.seconds + stats.seconds,
+                                       rows=total.rows + stats.rows,
+                                       cells=total.cells + stats.cells)
+            totals[key] = stats
+        return list(totals.values())
+
+    def clear(self):
+        """Remove the collected measurements."""
+        del self.stages[:]
+
+
+def count_cells(rows):
+    """Count the number of cells in *rows*."""
+    return sum(len(row) for row in rows)
+
+
+class _TimedRows(object):
+    """An iterator that times and counts the rows read from a lazy stage.
+
+    The time spent reading from *rows* includes the time spent by the stages
+    before it, which is read from the *upstream* :class:`_TimedRows`.
+
+    """
+
+    def __init__(self, rows, upstream=None, count=True):
+        self.rows = iter(rows)
+        self.upstream = upstream
+        self.count = count
+        self.call_seconds = 0
+        self.next_seconds = 0
+        self.num_rows = 0
+        self.num_cells = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = default_timer()
+        try:
+            row = next(self.rows)
+        finally:
+            self.next_seconds += default_timer() - start
+        if self.count:
+            self.num_rows += 1
+            self.num_cells += len(row)
+        return row
+
+    next = __next__
+
+    @property
+    def seconds(self):
+        """The time spent in this stage only."""
+        seconds = self.call_seconds + self.next_seconds
+        if self.upstream is not None:
+            seconds -= self.upstream.next_seconds
+        return seconds
+
+
+class Instrumentation(object):
+    """Measure the stages of one call to
+    :meth:`~cli_helpers.tabular_output.TabularOutputFormatter.format_output`.
+
+    :param callable callback: The function that is called with the
+        :class:`StageStats` of each stage.
+
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+        self._lazy = []
+
+    @contextmanager
+    def measure(self, stage, name, rows, cells):
+        """Measure a stage that runs in the body of the ``with`` statement."""
+        start = default_timer()
+        yield
+        self.callback(StageStats(stage, name, default_timer() - start, rows,
+                                 cells))
+
+    def measure_columns(self, stage, name, columns):
+        """Measure a stage that processes whole *columns* in the body of the
+        ``with`` statement."""
+        rows = max(len(column) for column in columns) if columns else 0
+        cells = sum(len(column) for column in columns)
+        return self.measure(stage, name, rows, cells)
+
+    def column_types(self, get_column_types, data):
+        """Measure the inference of the column types of the rows in *data*.
+
+        :return: The column types.
+
+        """
+        with self.measure('column_types', 'column_types', len(data),
+                          count_cells(data)):
+            return get_column_types(data)
+
+    def run_stages(self, stages, data, headers, **kwargs):
+        """Run the *data* through the preprocessors in *stages*, timing
+        each of them.
+
+        :return: The processed data and headers.
+        :rtype: tuple
+
+        """
+        if not stages:
+            return data, headers
+        data = _TimedRows(data, count=False)
+        for f in stages:
+            timed = _TimedRows((), upstream=data)
+            start = default_timer()
+            rows, headers = f(data, headers, **kwargs)
+            timed.call_seconds = default_timer() - start
+            timed.rows = iter(rows)
+            self._lazy.append(('preprocessor', f.__name__, timed))
+            data = timed
+        return data, headers
+
+    def run_formatter(self, name, formatter, data, headers, **kwargs):
+        """Format the *data*, timing the *formatter*.
+
+        The measurements of the lazy stages are reported once the lines have
+        been consumed.
+
+        :return: The formatted lines.
+
+        """
+        if isinstance(data, _TimedRows):
+            source = data
+        elif isinstance(data, (list, tuple)):
+            source = _TimedRows((), count=False)
+            source.num_rows, source.num_cells = len(data), count_cells(data)
+        else:
+            source = data = _TimedRows(data)
+        timed = _TimedRows((), upstream=source, count=False)
+        start = default_timer()
+        lines = formatter(data, headers, **kwargs)
+        timed.call_seconds = default_timer() - start
+        timed.rows = iter(lines)
+        self._lazy.append(('formatter', name, timed))
+        return self._report(timed, source)
+
+    def _report(self, lines, source):
+        try:
+            for line in lines:
+                yield line
+        finally:
+            for stage, name, timed in self._lazy:
+                if timed.count:
+                    rows, cells = timed.num_rows, timed.num_cells
+                else:
+                    rows, cells = source.num_rows, source.num_cells
+                self.callback(StageStats(stage, name, timed.seconds, rows,
+                                         cells))
+            self._lazy = []
@@ -0,0 +1,692 @@
+# -*- coding: utf-8 -*-
+"""A fast renderer for the most common tabulate table formats.
+
+The tabulate adapter renders the ``ascii``, ``double``, ``github``, ``grid``,
+``psql`` and ``simple`` formats with this module instead of
+:func:`tabulate.tabulate`. The output is the same, line for line, but:
+
+  - the lines are yielded one at a time, instead of being joined into one
+    string that is then split into lines
+  - each distinct cell value is parsed once to detect numbers, and only the
+    cells of float columns are parsed again to be formatted
+
+Tables that use features that are not supported here (e.g. styled or
+multiline cells, cells that are not strings, or rows of different lengths)
+raise :exc:`Unsupported`, and are rendered by tabulate instead.
+
+"""
+
+from __future__ import unicode_literals
+from collections import namedtuple
+import re
+
+from cli_helpers.compat import text_type
+from cli_helpers.utils import display_width
+from . import tabulate_adapter
+
+supported_formats = ('ascii', 'double', 'github', 'grid', 'psql', 'simple')
+
+#: The ranks of the types tabulate detects, from the least to the most
+#: generic.
+NONE_RANK, BOOL_RANK, INT_RANK, FLOAT_RANK, BYTES_RANK, TEXT_RANK = range(6)
+
+_digit_re = re.compile(r'\d')
+_number_words = frozenset(('nan', 'inf', 'infinity'))
+# Float formats whose output is always a number with an optional decimal
+# point and exponent, so the digits after the point can be counted directly.
+_simple_floatfmt_re = re.compile(r'[+\- ]?\d*[,_]?(\.\d+)?[eEfFgG]?\Z')
+
+ColumnLayout = namedtuple('ColumnLayout', 'rank align width cells decimals')
+ColumnLayout.__doc__ = """The layout of a column of a table.
+
+:param int rank: The rank of the type tabulate detects for the column.
+:param str align: The alignment of the column.
+:param int width: The width of the widest cell.
+:param list cells: The formatted cells, before they are padded.
+:param int decimals: The number of digits after the decimal points that are
+    aligned, or :data:`None` if the column isn't aligned on them.
+
+"""
+
+ColumnFormat = namedtuple('ColumnFormat', 'rank align width decimals')
+ColumnFormat.__doc__ = """How the cells of a column are formatted and padded.
+
+:param int rank: The rank of the type tabulate detects for the column.
+:param str align: The alignment of the column.
+:param int width: The width of the column, without padding.
+:param int decimals: The number of digits after the decimal points that are
+    aligned, or :data:`None`.
+
+"""
+
+TableLayout = namedtuple(
+    'TableLayout', 'table_format headers columns widths aligns formats')
+TableLayout.__doc__ = """A table that is ready to be rendered.
+
+:param tabulate.TableFormat table_format: The table format.
+:param list headers: The padded headers, or an empty list.
+:param list columns: The padded cells of each column.
+:param list widths: The widths of the columns, without padding.
+:param list aligns: The alignment of each column.
+:param list formats: The :class:`ColumnFormat` of each column, used to
+    format other rows like the table's (see :func:`format_rows`).
+
+"""
+
+
+class Unsupported(Exception):
+    """The table can only be rendered by tabulate."""
+
+
+def render(data, headers, table_format, **kwargs):
+    r"""Render a table in one of the :data:`supported_formats`.
+
+    The table is measured before this returns, so :exc:`Unsupported` is
+    raised before any line is yielded.
+
+    :param list data: The rows, each a :term:`sequence` of strings.
+    :param list headers: The column headers.
+    :param tabulate.TableFormat table_format: The table format.
+    :param \*\*kwargs: tabulate's keyword arguments (``floatfmt``,
+        ``numalign``, ``stralign``, ``disable_numparse``, ``showindex`` and
+        ``preserve_whitespace``).
+    :return: The lines of the table.
+    :rtype: iterator
+    :raises Unsupported: If the table can only be rendered by tabulate.
+
+    """
+    return iter_lines(layout_table(data, headers, table_format, **kwargs))
+
+
+def layout_table(data, headers, table_format, floatfmt='g',
+                 numalign='decimal', stralign='left', disable_numparse=False,
+                 showindex='default', preserve_whitespace=False):
+    """Measure and align the cells of a table, like tabulate.
+
+    See :func:`render` for the parameters.
+
+    :return: The table's layout.
+    :rtype: TableLayout
+    :raises Unsupported: If the table can only be rendered by tabulate.
+
+    """
+    tabulate = tabulate_adapter.get_tabulate()
+    _check_arguments(table_format, floatfmt, disable_numparse, showindex,
+                     tabulate)
+    if not data:
+        raise Unsupported('no rows')
+    headers = _check_shape(data, headers, len(data[0]))
+
+    numalign = 'decimal' if numalign == 'default' else numalign
+    stralign = 'left' if stralign == 'default' else stralign
+    width_fn = _get_width_fn(tabulate)
+    min_padding = tabulate.MIN_PADDING
+
+    columns, formats, width_fns = [], [], []
+    for i, cells in enumerate(zip(*data)):
+        joined = _check_cells(cells, separators=i < 2)
+        # Formatting and aligning plain ASCII cells keeps them plain ASCII,
+        # so the whole column can be measured with len().
+        column_width_fn = len if _is_printable_ascii(joined) else width_fn
+        column = layout_column(
+            cells, not disable_numparse, floatfmt, numalign, stralign,
+            preserve_whitespace, column_width_fn, tabulate)
+        min_width = width_fn(headers[i]) + min_padding if headers else 0
+        formats.append(ColumnFormat(column.rank, column.align,
+                                    max(min_width, column.width),
+                                    column.decimals))
+        columns.append(column.cells)
+        width_fns.append(column_width_fn)
+
+    columns = [pad_column(cells, f.align, f.width, column_width_fn)
+               for cells, f, column_width_fn
+               in zip(columns, formats, width_fns)]
+    return _make_layout(table_format, headers, columns, formats, width_fn)
+
+
+class TableMeasure(object):
+    """Measure a table a few rows at a time.
+
+    This computes the same column formats as :func:`layout_table`, without
+    keeping the rows, so that a table that doesn't fit in memory can be
+    measured before its rows are read again and rendered with
+    :func:`format_rows`. The parameters are those of :func:`layout_table`.
+
+    :raises Unsupported: If the table can only be rendered by tabulate.
+
+    """
+
+    def __init__(self, headers, table_format, floatfmt='g',
+                 numalign='decimal', stralign='left', disable_numparse=False,
+                 showindex='default', preserve_whitespace=False):
+        self.tabulate = tabulate_adapter.get_tabulate()
+        _check_arguments(table_format, floatfmt, disable_numparse, showindex,
+                         self.tabulate)
+        self.headers = list(headers)
+        self.table_format = table_format
+        self.numparse = not disable_numparse
+        self.floatfmt = floatfmt
+        self.numalign = 'decimal' if numalign == 'default' else numalign
+        self.stralign = 'left' if stralign == 'default' else stralign
+        self.preserve_whitespace = preserve_whitespace
+        self.width_fn = _get_width_fn(self.tabulate)
+        self.columns = None
+
+    def add(self, rows):
+        """Measure some more *rows* (a list of sequences of strings)."""
+        if not rows:
+            return
+        if self.columns is None:
+            self.headers = _check_shape(rows, self.headers, len(rows[0]))
+            self.columns = [
+                ColumnMeasure(self.numparse, self.floatfmt, self.numalign,
+                              self.stralign, self.preserve_whitespace,
+                              self.tabulate)
+                for _ in rows[0]]
+        else:
+            _check_shape(rows, (), len(self.columns))
+
+        for i, (column, cells) in enumerate(zip(self.columns, zip(*rows))):
+            joined = _check_cells(cells, separators=i < 2)
+            column.add(cells, len if _is_printable_ascii(joined)
+                       else self.width_fn)
+
+    def layout(self):
+        """Get the layout of the table measured so far.
+
+        :return: The table's layout, without its columns.
+        :rtype: TableLayout
+        :raises Unsupported: If no rows have been measured.
+
+        """
+        if self.columns is None:
+            raise Unsupported('no rows')
+        min_padding = self.tabulate.MIN_PADDING
+        if self.headers:
+            min_widths = [self.width_fn(h) + min_padding for h in self.headers]
+        else:
+            min_widths = [0] * len(self.columns)
+        formats = [column.format(min_width)
+                   for column, min_width in zip(self.columns, min_widths)]
+        return _make_layout(self.table_format, self.headers, None, formats,
+                            self.width_fn)
+
+
+class ColumnMeasure(object):
+    """Measure the cells of a column a part at a time, for
+    :class:`TableMeasure`.
+
+    Until the column's type is known, both the cells and the cells formatted
+    as floats are measured.
+
+    """
+
+    def __init__(self, numparse, floatfmt, numalign, stralign,
+                 preserve_whitespace, tabulate):
+        self.numparse = numparse
+        self.floatfmt = floatfmt
+        self.numalign = numalign
+        self.stralign = stralign
+        self.strip = not preserve_whitespace
+        self.tabulate = tabulate
+        self.rank = BOOL_RANK
+        self.cells = _Extent()
+        self.floats = _Extent()
+        if numalign != 'decimal':
+            self.float_afterpoint = None
+        elif _simple_floatfmt_re.match(floatfmt):
+            self.float_afterpoint = _float_afterpoint
+        else:
+            self.float_afterpoint = tabulate._afterpoint
+
+    def add(self, cells, width_fn):
+        """Measure some more *cells* with *width_fn*."""
+        self.rank = max(self.rank,
+                        column_rank(cells, self.numparse, self.tabulate))
+        self.cells.add(cells, width_fn, self.strip,
+                       self.tabulate._afterpoint
+                       if self.stralign == 'decimal' else None)
+        if self.rank <= FLOAT_RANK:
+            self.floats.add([_format_float(s, self.floatfmt) for s in cells],
+                            width_fn, self.strip, self.float_afterpoint)
+
+    def format(self, min_width=0):
+        """Get the format of the column, like :func:`layout_column`.
+
+        :param int min_width: The width of the column's header.
+        :rtype: ColumnFormat
+
+        """
+        rank = self.rank
+        align = (self.numalign if rank in (INT_RANK, FLOAT_RANK) else
+                 self.stralign)
+        extent = self.floats if rank == FLOAT_RANK else self.cells
+        decimals = None
+        if align == 'decimal' and rank != INT_RANK:
+            width, decimals = extent.point_width + extent.decimals, \
+                extent.decimals
+        elif align and align != 'decimal' and self.strip:
+            width = extent.stripped_width
+        else:
+            width = extent.width
+        return ColumnFormat(rank, align, max(min_width, width), decimals)
+
+
+class _Extent(object):
+    """The widest of some cells, as they are and stripped, and the widest
+    integer part and the most digits after the decimal points."""
+
+    def __init__(self):
+        self.width = self.stripped_width = 0
+        self.point_width = self.decimals = None
+
+    def add(self, cells, width_fn, strip, afterpoint):
+        self.width = max(self.width, max(map(width_fn, cells)))
+        if strip:
+            self.stripped_width = max(self.stripped_width,
+                                      max(width_fn(s.strip()) for s in cells))
+        if afterpoint is not None:
+            decimals = list(map(afterpoint, cells))
+            point_width = max(width_fn(s) - d for s, d in zip(cells, decimals))
+            if self.decimals is None:
+                self.decimals, self.point_width = max(decimals), point_width
+            else:
+                self.decimals = max(self.decimals, max(decimals))
+                self.point_width = max(self.point_width, point_width)
+
+
+def with_widths(layout, headers, widths):
+    """Get a copy of a table's *layout*, without its columns, with the
+    columns resized to *widths*.
+
+    :param TableLayout layout: The table's layout.
+    :param list headers: The headers, before they were padded, or an empty
+        list.
+    :param list widths: The new widths of the columns.
+    :rtype: TableLayout
+
+    """
+    formats = [f._replace(width=width)
+               for f, width in zip(layout.formats, widths)]
+    return _make_layout(layout.table_format, headers, None, formats,
+                        _get_width_fn(tabulate_adapter.get_tabulate()))
+
+
+def _make_layout(table_format, headers, columns, formats, width_fn):
+    widths = [f.width for f in formats]
+    aligns = [f.align for f in formats]
+    if headers:
+        headers = [_pad_header(h, align, width, width_fn)
+                   for h, align, width in zip(headers, aligns, widths)]
+    return TableLayout(table_format, headers, columns, widths, aligns,
+                       formats)
+
+
+def layout_column(cells, numparse=True, floatfmt='g', numalign='decimal',
+                  stralign='left', preserve_whitespace=False, width_fn=len,
+                  tabulate=None):
+    """Detect the type of a column and format its cells, like tabulate.
+
+    :param tuple cells: The column's cells (strings).
+    :return: The column's layout.
+    :rtype: ColumnLayout
+
+    """
+    tabulate = tabulate or tabulate_adapter.get_tabulate()
+    rank = column_rank(cells, numparse, tabulate)
+    align = numalign if rank in (INT_RANK, FLOAT_RANK) else stralign
+    cells, decimals = _format_cells(cells, rank, align, floatfmt,
+                                    preserve_whitespace, tabulate)
+    return ColumnLayout(rank, align, max(map(width_fn, cells)), cells,
+                        decimals)
+
+
+def format_rows(layout, rows, floatfmt='g', preserve_whitespace=False,
+                width_fn=None):
+    """Format and pad *rows* like the rows of a table.
+
+    The cells are formatted, aligned and padded to the widths of the
+    :class:`TableLayout`'s columns, so the rows can be rendered with
+    :func:`row_lines` even though they weren't measured. Cells that are wider
+    than their column are not truncated.
+
+    :param TableLayout layout: The table's layout.
+    :param list rows: The rows, each a :term:`sequence` of strings with one
+        cell per column of the table.
+    :param str floatfmt: The table's float format.
+    :param bool preserve_whitespace: The table's whitespace setting.
+    :param callable width_fn: The function that measures a cell (optional,
+        defaults to the one tabulate uses).
+    :return: The padded rows.
+    :rtype: list
+
+    """
+    tabulate = tabulate_adapter.get_tabulate()
+    width_fn = width_fn or _get_width_fn(tabulate)
+    columns = []
+    for cells, f in zip(zip(*rows), layout.formats):
+        cells, _ = _format_cells(cells, f.rank, f.align, floatfmt,
+                                 preserve_whitespace, tabulate, f.decimals)
+        columns.append(pad_column(cells, f.align, f.width, width_fn))
+    return list(zip(*columns))
+
+
+def _format_cells(cells, rank, align, floatfmt, preserve_whitespace,
+                  tabulate, max_decimals=None):
+    """Format and align the *cells* of a column, like tabulate.
+
+    The digits after the decimal points are aligned to *max_decimals*, or to
+    the most digits of the *cells*.
+
+    :return: The cells and the number of digits after the decimal points
+        that are aligned (or :data:`None`).
+    :rtype: tuple
+
+    """
+    if rank == FLOAT_RANK:
+        cells = [_format_float(s, floatfmt) for s in cells]
+    if align == 'decimal':
+        if rank == INT_RANK:
+            decimals = None
+        elif rank == FLOAT_RANK and _simple_floatfmt_re.match(floatfmt):
+            decimals = [_float_afterpoint(s) for s in cells]
+        else:
+            decimals = [tabulate._afterpoint(s) for s in cells]
+        if decimals:
+            if max_decimals is None:
+                max_decimals = max(decimals)
+            cells = [s + ' ' * (max_decimals - d)
+                     for s, d in zip(cells, decimals)]
+        return cells, max_decimals
+    elif align and not preserve_whitespace:
+        cells = [s.strip() for s in cells]
+    return cells, None
+
+
+def column_rank(cells, numparse=True, tabulate=None):
+    """Get the rank of the most generic type of the *cells*, like
+    tabulate's ``_column_type()``.
+
+    Each distinct value is only parsed once.
+
+    """
+    tabulate = tabulate or tabulate_adapter.get_tabulate()
+    rank = BOOL_RANK
+    for s in set(cells):
+        cell_rank = _cell_rank(s, numparse, tabulate)
+        if cell_rank > rank:
+            rank = cell_rank
+            if rank == TEXT_RANK:
+                break
+    return rank
+
+
+_type_ranks = {type(None): NONE_RANK, bool: BOOL_RANK, int: INT_RANK,
+               float: FLOAT_RANK, bytes: BYTES_RANK, text_type: TEXT_RANK}
+
+
+def _cell_rank(s, numparse, tabulate):
+    """Get the rank of the type of a cell, like tabulate's ``_type()``.
+
+    Empty strings, decimal integers and strings that can't be numbers are
+    detected here. The other strings are passed to tabulate.
+
+    """
+    if not s:
+        return NONE_RANK
+    elif s.isdecimal():
+        return INT_RANK if numparse else TEXT_RANK
+    elif (_digit_re.search(s) is None and s != 'True' and s != 'False' and
+            s.strip().lstrip('+-').lower() not in _number_words):
+        return TEXT_RANK
+    return _type_ranks.get(tabulate._type(s, False, numparse), TEXT_RANK)
+
+
+def _format_float(s, floatfmt):
+    """Format a cell of a float column, like tabulate's ``_format()``."""
+    if not s:
+        return s
+    if ',' in s:
+        s = s.replace(',', '')
+    try:
+        return format(float(s), floatfmt)
+    except (ValueError, TypeError):
+        return s
+
+
+def _float_afterpoint(s):
+    """Count the digits after the decimal point of a formatted float (or -1),
+    like tabulate's ``_afterpoint()``."""
+    if not s or s == 'True' or s == 'False':
+        return -1
+    pos = s.rfind('.')
+    if pos < 0:
+        pos = s.lower().rfind('e')
+    return len(s) - pos - 1 if pos >= 0 else -1
+
+
+def pad_column(cells, align, width, width_fn=len):
+    """Pad the formatted *cells* of a column to *width*."""
+    if not align:
+        return list(cells)
+    pad = _get_pad_fn(align)
+    if width_fn is len:
+        return [pad(s, width) for s in cells]
+    return [pad(s, width - (width_fn(s) - len(s))) for s in cells]
+
+
+def _pad_header(header, align, width, width_fn):
+    width += len(header) - width_fn(header)
+    if align == 'left':
+        return header.ljust(width)
+    elif align == 'center':
+        return _center(header, width)
+    elif not align:
+        return header
+    return header.rjust(width)
+
+
+def _center(s, width):
+    return format(s, '^{}'.format(width))
+
+
+def _get_pad_fn(align):
+    if align in ('right', 'decimal'):
+        return text_type.rjust
+    elif align == 'center':
+        return _center
+    return text_type.ljust
+
+
+def _get_width_fn(tabulate):
+    """Get a function that measures the width of a cell like tabulate.
+
+    Wide characters are measured with :func:`~cli_helpers.utils.display_width`,
+    which remembers the widths of repeated cells.
+
+    """
+    if getattr(tabulate, 'wcwidth', None) is None or \
+            not tabulate.WIDE_CHARS_MODE:
+        return len
+
+    def width(s):
+        width = display_width(s)
+        if width < 0:
+            raise Unsupported('non-printable characters')
+        return width
+    return width
+
+
+def _check_arguments(table_format, floatfmt, disable_numparse, showindex,
+                     tabulate):
+    """Check that tabulate's arguments are supported here."""
+    _check_table_format(table_format, tabulate)
+    if (not isinstance(floatfmt, text_type) or
+            not isinstance(disable_numparse, bool) or
+            showindex not in ('default', 'never', False)):
+        raise Unsupported('unsupported tabulate arguments')
+
+
+def _check_shape(rows, headers, num_columns):
+    """Check that the *rows* and *headers* have *num_columns* columns.
+
+    :return: The headers, padded to *num_columns*.
+
+    """
+    headers = list(headers)
+    if (not num_columns or len(headers) > num_columns or
+            set(map(len, rows)) != {num_columns}):
+        raise Unsupported('rows of different lengths')
+    if headers:
+        headers = [''] * (num_columns - len(headers)) + headers
+        _check_cells(headers, separators=False)
+    return headers
+
+
+#: Check if a string only has printable ASCII characters (like
+#: ``s.isascii() and s.isprintable()``, which needs Python 3.7).
+_is_printable_ascii = re.compile(r'[ -~]*\Z').match
+
+
+def _check_cells(cells, separators):
+    """Check that the *cells* can be rendered here.
+
+    :return: The *cells*, joined.
+
+    """
+    if set(map(type, cells)) != {text_type}:
+        raise Unsupported('cells that are not strings')
+    joined = ''.join(cells)
+    if '\x1b' in joined or '\n' in joined or '\r' in joined:
+        raise Unsupported('styled or multiline cells')
+    if separators and '\001' in joined:
+        raise Unsupported('separating lines')
+    return joined
+
+
+def _check_table_format(table_format, tabulate):
+    """Check that the lines and rows of *table_format* are not functions."""
+    for name in ('lineabove', 'linebelowheader', 'linebetweenrows',
+                 'linebelow'):
+        line = getattr(table_format, name)
+        if line and not isinstance(line, tabulate.Line):
+            raise Unsupported('{} is not a Line'.format(name))
+    for name in ('headerrow', 'datarow'):
+        if not isinstance(getattr(table_format, name), tabulate.DataRow):
+            raise Unsupported('{} is not a DataRow'.format(name))
+
+
+def iter_lines(layout):
+    """Yield the lines of a table.
+
+    :param TableLayout layout: The table's layout.
+
+    """
+    for line in header_lines(layout):
+        yield line
+    for line in row_lines(layout, zip(*layout.columns)):
+        yield line
+    for line in footer_lines(layout):
+        yield line
+
+
+def header_lines(layout):
+    """Get the lines above the rows of a table."""
+    table_format, headers = layout.table_format, layout.headers
+    hidden = _hidden(layout)
+    lines = []
+    if table_format.lineabove and 'lineabove' not in hidden:
+        lines.append(build_line(layout, table_format.lineabove))
+    if headers:
+        lines.append(build_row(layout, table_format.headerrow, headers))
+        if (table_format.linebelowheader and
+                'linebelowheader' not in hidden):
+            lines.append(build_line(layout, table_format.linebelowheader))
+    return lines
+
+
+def row_lines(layout, rows):
+    """Yield the lines of the padded *rows* of a table."""
+    table_format = layout.table_format
+    datarow = table_format.datarow
+    begin, sep, end = datarow
+    pad = ' ' * table_format.padding
+    begin, sep, end = begin + pad, pad + sep + pad, pad + end
+
+    between = table_format.linebetweenrows
+    if between and 'linebetweenrows' not in _hidden(layout):
+        between = build_line(layout, between)
+        first = True
+        for row in rows:
+            if not first:
+                yield between
+            first = False
+            yield (begin + sep.join(row) + end).rstrip()
+    else:
+        for row in rows:
+            yield (begin + sep.join(row) + end).rstrip()
+
+
+def footer_lines(layout):
+    """Get the lines below the rows of a table."""
+    linebelow = layout.table_format.linebelow
+    if linebelow and 'linebelow' not in _hidden(layout):
+        return [build_line(layout, linebelow)]
+    return []
+
+
+def build_line(layout, line):
+    """Build a horizontal *line* of a table."""
+    begin, fill, sep, end = line
+    padding = 2 * layout.table_format.padding
+    return (begin + sep.join(fill * (w + padding) for w in layout.widths) +
+            end).rstrip()
+
+
+def build_row(layout, datarow, cells):
+    """Build a row of padded *cells*."""
+    begin, sep, end = datarow
+    pad = ' ' * layout.table_format.padding
+    return (begin + sep.join(pad + c + pad for c in cells) + end).rstrip()
+
+
+def span_line(layout, text):
+    """Build a row of a table with *text* centered across all of its
+    columns, truncated if it is wider than the table (see
+    :func:`fit_text`)."""
+    begin, sep, end = layout.table_format.datarow
+    padding = layout.table_format.padding
+    width = (sum(layout.widths) + 2 * padding * (len(layout.widths) - 1) +
+             display_width(sep) * (len(layout.widths) - 1))
+    pad = ' ' * padding
+    return (begin + pad + fit_text(text, width) + pad + end).rstrip()
+
+
+def fit_text(text, width):
+    """Center *text* in *width* columns.
+
+    Text that is wider is truncated, ending with ``…``.
+
+    """
+    text_width = _text_width(text)
+    if text_width > width:
+        while text and _text_width(text) + 1 > width:
+            text = text[:-1]
+        text = text + '…' if width > 0 else ''
+        text_width = _text_width(text)
+    left = (width - text_width) // 2
+    return ' ' * left + text + ' ' * (width - text_width - left)
+
+
+def _text_width(text):
+    """Measure *text*, counting each non-printable character as one
+    column."""
+    width = display_width(text)
+    return len(text) if width < 0 else width
+
+
+def _hidden(layout):
+    table_format = layout.table_format
+    if layout.headers and table_format.with_header_hide:
+        return table_format.with_header_hide
+    return ()
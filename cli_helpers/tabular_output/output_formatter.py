@@ -2,19 +2,39 @@
 """A generic tabular data output formatter interface."""
 
 from __future__ import unicode_literals
-from collections import namedtuple
+from collections import deque, namedtuple, OrderedDict
+import io
+import os
+import re
+import sys
+from functools import partial
+import threading
+from types import MappingProxyType
 
+from cli_helpers.ansi import AnsiStyle
 from cli_helpers.compat import (text_type, binary_type, int_types, float_types,
-                                zip_longest)
+                                zip_longest, Mapping)
 from cli_helpers.utils import unique_items
-from . import (delimited_output_adapter, vertical_table_adapter,
+from . import (columnar, delimited_output_adapter, vertical_table_adapter,
                tabulate_adapter, tsv_output_adapter)
+from .instrumentation import Instrumentation
+from .pagination import Pages
+from .pipeline import Pipeline
 from decimal import Decimal
 
 import itertools
 
 MISSING_VALUE = '<null>'
 MAX_FIELD_WIDTH = 500
+PARALLEL_CHUNK_SIZE = 10000
+PAGE_SIZE = 50
+PREVIEW_MARKER = '… {omitted} rows omitted …'
+ASYNC_BATCH_SIZE = 1000
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# The cell that stands in for the marker line of a preview rendered by
+# tabulate: an escape sequence, which tabulate treats as an empty cell.
+_PREVIEW_SENTINEL = '\x1b[0;0;0;0m'
 
 TYPES = {
     type(None): 0,
@@ -25,11 +45,17 @@ TYPES = {
     binary_type: 4,
     text_type: 5
 }
+# Decimal has the rank of float, which is the type :meth:`_get_type` gives
+# both of them, so each rank is mapped back to the type it is inferred as.
+INVERSE_TYPES = {v: k for k, v in TYPES.items() if k is not Decimal}
+TEXT_RANK = TYPES[text_type]
 
 OutputFormatHandler = namedtuple(
     'OutputFormatHandler',
     'format_name preprocessors formatter formatter_args')
 
+ExecutionPlan = namedtuple('ExecutionPlan', 'pipeline formatter kwargs')
+
 
 class TabularOutputFormatter(object):
     """An interface to various tabular data formatting libraries.
@@ -41,6 +67,9 @@ class TabularOutputFormatter(object):
       - delimited formats (CSV and TSV)
 
     :param str format_name: An optional, default format name.
+    :param callable instrument: An optional function that is called with the
+        measurements of each stage of formatting (see
+        :mod:`~cli_helpers.tabular_output.instrumentation`).
 
     Usage::
 
@@ -69,9 +98,18 @@ class TabularOutputFormatter(object):
 
     _output_formats = {}
 
-    def __init__(self, format_name=None):
-        """Set the default *format_name*."""
+    #: The maximum number of execution plans to cache.
+    plan_cache_size = 128
+    _plan_cache = OrderedDict()
+    _plan_cache_lock = threading.Lock()
+
+    def __init__(self, format_name=None, instrument=None):
+        """Set the default *format_name* and the *instrument*."""
         self._format_name = None
+        #: The function called with a
+        #: :class:`~cli_helpers.tabular_output.instrumentation.StageStats`
+        #: for each stage of :meth:`format_output`, or :data:`None`.
+        self.instrument = instrument
 
         if format_name:
             self.format_name = format_name
@@ -115,54 +153,768 @@ class TabularOutputFormatter(object):
             formatting.
         :param dict kwargs: Keys/values for keyword argument defaults.
 
+        The handler is immutable: the keyword arguments given to
+        :meth:`format_output` are merged into a copy of *kwargs* for each
+        call.
+
         """
         cls._output_formats[format_name] = OutputFormatHandler(
-            format_name, preprocessors, handler, kwargs or {})
+            format_name, tuple(preprocessors), handler,
+            MappingProxyType(dict(kwargs or {})))
+        cls.invalidate_plans(format_name)
+
+    @classmethod
+    def invalidate_plans(cls, format_name=None):
+        """Remove cached execution plans.
+
+        Plans are cached by :meth:`format_output` and have to be invalidated
+        when the format they were built for changes.
+        :meth:`register_new_formatter` does this automatically.
+
+        :param str format_name: The format to remove plans for (optional,
+            defaults to every format).
+
+        """
+        with cls._plan_cache_lock:
+            if format_name is None:
+                cls._plan_cache.clear()
+                return
+            for key in [k for k in cls._plan_cache if k[0] == format_name]:
+                del cls._plan_cache[key]
 
     def format_output(self, data, headers, format_name=None,
-                      preprocessors=(), column_types=None, **kwargs):
+                      preprocessors=(), column_types=None,
+                      type_sample_size=None, workers=None,
+                      chunk_size=PARALLEL_CHUNK_SIZE, use_threads=False,
+                      preview=None, preview_marker=PREVIEW_MARKER,
+                      **kwargs):
         r"""Format the headers and data using a specific formatter.
 
         *format_name* must be a supported formatter (see
         :attr:`supported_formats`).
 
-        :param iterable data: An :term:`iterable` (e.g. list) of rows.
+        The *data* is only read into memory when the column types have to be
+        inferred from every row. If *column_types* is given, or if
+        *type_sample_size* limits the inference to the leading rows, the rows
+        are streamed through the preprocessors and the formatter. The
+        ``csv``, ``csv-tab``, ``tsv`` and ``vertical`` formats then yield
+        each line as soon as its row has been read.
+
+        *data* can also be stored by column: a mapping of column names to
+        columns, a NumPy array, or an Arrow table (see
+        :mod:`~cli_helpers.tabular_output.columnar`). The column types are
+        then read from the dtypes or the schema where possible, the column
+        names are used if *headers* is :data:`None`, and the per-cell
+        preprocessors are applied to whole columns.
+
+        The row-independent formats in :data:`PARALLEL_FORMATS` can be
+        rendered in parallel by passing the number of *workers*. The rows are
+        split into chunks of *chunk_size* rows that are preprocessed and
+        formatted in a :class:`~concurrent.futures.ProcessPoolExecutor` (or a
+        :class:`~concurrent.futures.ThreadPoolExecutor` if *use_threads* is
+        true), and the lines are yielded in the order of the rows. Without
+        *column_types*, the column types are inferred from the first
+        *type_sample_size* rows, or from the first chunk. With processes,
+        the preprocessors and keyword arguments must be picklable.
+
+        The aligned ``ascii``, ``double``, ``github``, ``grid``, ``psql`` and
+        ``simple`` formats can be rendered in bounded memory by passing a
+        ``memory_budget`` (in bytes). The preprocessed rows are spilled to a
+        temporary file once they take up more than that, and read back once
+        the columns have been measured. Without *column_types*, the column
+        types are then inferred from the first *type_sample_size* rows, or
+        the first *chunk_size* rows. The budget can't be kept for tables
+        that only tabulate can render (e.g. with styled or multiline cells):
+        their rows are read back into memory, and a :exc:`RuntimeWarning`
+        is issued if they were spilled.
+
+        These formats can also be streamed, like the ``csv`` format, by
+        passing a ``width_sample_size``: the column widths are fixed from
+        that many leading rows (which are also used to infer the column
+        types), and the ``overflow`` policy (``'truncate'``, ``'wrap'`` or
+        ``'widen'``) decides what happens to wider cells in the other rows
+        (see :mod:`~cli_helpers.tabular_output.streaming`). Cells are never
+        wider than ``max_field_width``.
+
+        A ``conversion_memo_size`` keyword argument gives each column a memo
+        of that many converted values, so a value that is repeated in a
+        column is converted (and styled) once. Columnar data can also be
+        dictionary-encoded (see
+        :class:`~cli_helpers.tabular_output.columnar.DictionaryColumn`).
+
+        Only the first and last rows are shown when a *preview* is given. The
+        rows are read once: the last rows are kept in a fixed-size queue,
+        the rows in between are only counted, and only the rows that are
+        shown are preprocessed and formatted. A line made from
+        *preview_marker* replaces the rows that are left out. Its
+        ``{omitted}`` and ``{total}`` fields are replaced by the number of
+        rows left out and the number of rows. In the table formats, the
+        marker is centered between the borders of the table, and truncated
+        if it is wider; the markup formats (e.g. ``html``) show it in a row
+        of its own.
+
+        The modes can be combined as follows. Rows and columnar data can be
+        previewed or rendered in parallel, but a *preview* can't be rendered
+        in parallel. ``width_sample_size`` takes precedence over
+        ``memory_budget``, and both only apply to the formats that are
+        rendered natively. The other keyword arguments (e.g.
+        ``conversion_memo_size``, ``block_size`` or ``records_per_chunk``)
+        are passed to the preprocessors and the formatter in every mode.
+
+        If :attr:`instrument` is set, it is called with the measurements of
+        each stage (see :mod:`~cli_helpers.tabular_output.instrumentation`).
+        The chunks rendered by parallel workers are not measured.
+
+        :param iterable data: An :term:`iterable` (e.g. list) of rows, or
+            columnar data.
         :param iterable headers: The column headers.
         :param str format_name: The display format to use (optional, if the
             :class:`TabularOutputFormatter` object has a default format set).
         :param tuple preprocessors: Additional preprocessors to call before
                                     any formatter preprocessors.
+        :param iterable column_types: The columns' type objects (optional).
+        :param int type_sample_size: The number of leading rows used to infer
+            the column types (optional, defaults to every row).
+        :param int workers: The number of workers used to render the rows in
+            parallel (optional, defaults to rendering them serially).
+        :param int chunk_size: The number of rows sent to a worker at once.
+        :param bool use_threads: Whether to use threads instead of processes
+            for the workers.
+        :param int/tuple preview: The number of first and last rows to show,
+            or a tuple of the two numbers (optional, defaults to showing
+            every row).
+        :param str preview_marker: The line shown instead of the rows that
+            are left out of a preview.
         :param \*\*kwargs: Optional arguments for the formatter.
         :return: The formatted data.
         :rtype: str
+        :raises ValueError: If the *format_name* is not recognized, if it
+            can't be rendered in parallel, or if a *preview* is rendered in
+            parallel.
+
+        """
+        format_name = format_name or self._format_name
+        if format_name not in self.supported_formats:
+            raise ValueError('unrecognized format "{}"'.format(format_name))
+        preprocessors = tuple(preprocessors)
+
+        if preview is not None:
+            if workers is not None:
+                raise ValueError('a preview cannot be rendered in parallel')
+            return self._format_preview(
+                data, headers, format_name, preview, preview_marker,
+                preprocessors, column_types, kwargs)
+
+        if workers is not None:
+            if format_name not in PARALLEL_FORMATS:
+                raise ValueError('format "{}" cannot be rendered in '
+                                 'parallel'.format(format_name))
+            if columnar.is_columnar(data):
+                names, columns, cell_types = columnar.get_columns(data)
+                headers = names if headers is None else headers
+                if column_types is None:
+                    column_types = self._get_columnar_types(columns,
+                                                            cell_types)
+                data = _columnar_rows(columns)
+            return self._format_output_parallel(
+                data, headers, format_name, preprocessors, column_types,
+                type_sample_size or chunk_size, workers, chunk_size,
+                use_threads, kwargs)
+
+        instrumentation = (None if self.instrument is None else
+                           Instrumentation(self.instrument))
+        if columnar.is_columnar(data):
+            return self._format_columns(data, headers, format_name,
+                                        preprocessors, column_types,
+                                        instrumentation, kwargs)
+
+        if type_sample_size is None:
+            # Streaming and spilling formatters don't need every row to
+            # infer the column types.
+            if kwargs.get('width_sample_size'):
+                type_sample_size = kwargs['width_sample_size']
+            elif kwargs.get('memory_budget'):
+                type_sample_size = chunk_size
+        return self._format_rows(data, headers, format_name, preprocessors,
+                                 column_types, type_sample_size,
+                                 instrumentation, kwargs)
+
+    def _format_rows(self, data, headers, format_name, preprocessors,
+                     column_types, type_sample_size, instrumentation, kwargs):
+        """Format the rows of *data* serially.
+
+        The rows are streamed unless the column types are inferred from
+        every row.
+
+        """
+        pipeline, formatter, fkwargs = self._get_plan(
+            format_name, preprocessors, kwargs)
+        if column_types is None and type_sample_size is None:
+            data = list(data)
+            column_types = self._get_column_types(data, instrumentation)
+        elif column_types is None:
+            data, column_types = self._sample_column_types(
+                data, type_sample_size, instrumentation)
+        data, headers = pipeline(data, headers, column_types=column_types,
+                                 instrumentation=instrumentation)
+        return self._run_formatter(format_name, formatter, data, headers,
+                                   instrumentation, column_types=column_types,
+                                   **fkwargs)
+
+    def _format_columns(self, data, headers, format_name, preprocessors,
+                        column_types, instrumentation, kwargs):
+        """Format columnar *data*, preprocessing it by column."""
+        names, columns, cell_types = columnar.get_columns(data)
+        if headers is None:
+            headers = names
+        if column_types is None and instrumentation is None:
+            column_types = self._get_columnar_types(columns, cell_types)
+        elif column_types is None:
+            with instrumentation.measure_columns(
+                    'column_types', 'column_types', columns):
+                column_types = self._get_columnar_types(columns, cell_types)
+
+        pipeline, formatter, fkwargs = self._get_plan(
+            format_name, preprocessors, kwargs)
+        data, headers = pipeline.run_columns(
+            columns, headers, column_types=column_types,
+            instrumentation=instrumentation)
+        return self._run_formatter(format_name, formatter, data, headers,
+                                   instrumentation, column_types=column_types,
+                                   **fkwargs)
+
+    def _format_preview(self, data, headers, format_name, preview, marker,
+                        preprocessors, column_types, kwargs):
+        """Format the first and last rows of *data*, with a *marker* line in
+        place of the rows in between."""
+        from . import native_table
+
+        head, tail = (preview, preview) if isinstance(preview, int) else preview
+        if columnar.is_columnar(data):
+            names, columns, _ = columnar.get_columns(data)
+            headers = names if headers is None else headers
+            data = _columnar_rows(columns)
+        head_rows, tail_rows, omitted = _take_preview(data, head, tail)
+        rows = head_rows + tail_rows
+        if not omitted:
+            return self.format_output(rows, headers, format_name,
+                                      preprocessors, column_types, **kwargs)
+        marker = marker.format(omitted=omitted, total=len(rows) + omitted)
+        if column_types is None:
+            column_types = self._get_column_types(rows)
+
+        pipeline, formatter, fkwargs = self._get_plan(
+            format_name, preprocessors, kwargs)
+        if (format_name in native_table.supported_formats and
+                formatter is tabulate_adapter.adapter):
+            table_format, nkwargs = tabulate_adapter.native_arguments(
+                **fkwargs)
+            processed, processed_headers = pipeline(
+                rows, headers, column_types=column_types)
+            try:
+                layout = native_table.layout_table(
+                    list(processed), processed_headers, table_format,
+                    **nkwargs)
+            except native_table.Unsupported:
+                pass
+            else:
+                return _preview_lines(layout, len(head_rows), marker)
+
+        if formatter is tabulate_adapter.adapter:
+            processed, processed_headers = pipeline(
+                rows, headers, column_types=column_types)
+            processed = list(processed)
+            num_columns = max(map(len, processed))
+            if format_name in tabulate_adapter.supported_markup_formats:
+                # The marker is shown in a row of its own, so that the
+                # markup stays valid.
+                processed.insert(len(head_rows),
+                                 [marker] + [''] * (num_columns - 1))
+                return formatter(processed, processed_headers,
+                                 column_types=column_types, **fkwargs)
+            # The rows are rendered with an invisible row in place of the
+            # marker, so that it changes neither the widths nor the
+            # alignment of the columns, and its line is then replaced.
+            processed.insert(len(head_rows), [_PREVIEW_SENTINEL] +
+                             [''] * (num_columns - 1))
+            lines = list(formatter(processed, processed_headers,
+                                   column_types=column_types, **fkwargs))
+            table_format = tabulate_adapter.get_table_format(format_name)
+            return iter(_replace_sentinel_line(lines, marker, table_format))
+        elif formatter is vertical_table_adapter.adapter:
+            processed, processed_headers = pipeline(
+                rows, headers, column_types=column_types)
+            processed = list(processed)
+            # The last records keep the numbers they have in the data.
+            first = fkwargs.get('first_record_number', 1)
+            tail_kwargs = dict(fkwargs, first_record_number=(
+                first + len(head_rows) + omitted))
+            return itertools.chain(
+                formatter(processed[:len(head_rows)], processed_headers,
+                          column_types=column_types, **fkwargs),
+                [marker],
+                formatter(processed[len(head_rows):], processed_headers,
+                          column_types=column_types, **tail_kwargs))
+
+        num_header_lines = len(list(self.format_output(
+            (), headers, format_name, preprocessors, column_types,
+            **kwargs)))
+        return itertools.chain(
+            self.format_output(head_rows, headers, format_name,
+                               preprocessors, column_types, **kwargs),
+            [marker],
+            _format_chunk(format_name, preprocessors, column_types,
+                          kwargs, headers, tail_rows, num_header_lines))
+
+    def _run_formatter(self, format_name, formatter, data, headers,
+                       instrumentation, **kwargs):
+        """Call the *formatter*, timing it if *instrumentation* is given."""
+        if instrumentation is None:
+            return formatter(data, headers, **kwargs)
+        return instrumentation.run_formatter(format_name, formatter, data,
+                                             headers, **kwargs)
+
+    def write_output(self, data, headers, file=None, format_name=None,
+                     buffer_size=WRITE_BUFFER_SIZE, binary=False,
+                     encoding=None, **kwargs):
+        r"""Format the headers and data and write them to *file*.
+
+        The lines from :meth:`format_output` are collected into a buffer of
+        about *buffer_size* characters, which is written with a single call,
+        instead of writing every line separately. Each line is followed by a
+        newline.
+
+        *file* can be a text file, a binary file, or a file descriptor. The
+        output is encoded when it is written to a binary file or a file
+        descriptor. If *binary* is true, the encoded output is written to the
+        ``buffer`` of a text file (e.g. :data:`sys.stdout`) directly.
+
+        :param iterable data: An :term:`iterable` (e.g. list) of rows.
+        :param iterable headers: The column headers.
+        :param file: The file object or file descriptor to write to
+            (optional, defaults to :data:`sys.stdout`).
+        :param str format_name: The display format to use (optional, if the
+            :class:`TabularOutputFormatter` object has a default format set).
+        :param int buffer_size: The number of characters to buffer before
+            writing.
+        :param bool binary: Whether to write encoded bytes to the ``buffer``
+            of a text file.
+        :param str encoding: The encoding used for binary output (optional,
+            defaults to the text file's encoding or UTF-8).
+        :param \*\*kwargs: Optional arguments for :meth:`format_output`.
+        :return: The number of lines written.
+        :rtype: int
+        :raises ValueError: If the *format_name* is not recognized.
+
+        """
+        if file is None:
+            file = sys.stdout
+        lines = self.format_output(data, headers, format_name, **kwargs)
+
+        if isinstance(file, int):
+            write = partial(_write_all, partial(os.write, file))
+            encoding = encoding or 'utf-8'
+        elif binary:
+            encoding = encoding or getattr(file, 'encoding', None) or 'utf-8'
+            file.flush()
+            write = file.buffer.write
+        elif isinstance(file, io.RawIOBase):
+            write = partial(_write_all, file.write)
+            encoding = encoding or 'utf-8'
+        elif isinstance(file, io.BufferedIOBase):
+            write = file.write
+            encoding = encoding or 'utf-8'
+        else:
+            write = file.write
+            encoding = None
+
+        count = 0
+        buffered, size = [], 0
+        for line in lines:
+            buffered.append(line)
+            size += len(line) + 1
+            if size >= buffer_size:
+                count += _write_lines(write, buffered, encoding)
+                buffered, size = [], 0
+        if buffered:
+            count += _write_lines(write, buffered, encoding)
+        return count
+
+    def paginate(self, data, headers, format_name=None, page_size=PAGE_SIZE,
+                 preprocessors=(), column_types=None, sample_size=None,
+                 **kwargs):
+        r"""Format the headers and data as pages of *page_size* rows.
+
+        The table is measured once, and each page of the returned
+        :class:`~cli_helpers.tabular_output.pagination.Pages` is rendered
+        when it is requested, with the same headers, borders and column
+        widths as the other pages.
+
+        The ``ascii``, ``double``, ``github``, ``grid``, ``psql`` and
+        ``simple`` formats are measured by the native renderer (see
+        :mod:`~cli_helpers.tabular_output.native_table`). The column types
+        and widths are computed from every row, or from the first
+        *sample_size* rows. The other rows are then only preprocessed and
+        formatted when their page is rendered; their cells are not truncated
+        if they are wider than their columns.
+
+        The rows of the formats in :data:`PARALLEL_FORMATS` are rendered
+        independently, and each page starts with the header line.
+
+        Other formats, and tables that can't be rendered natively (e.g.
+        tables with styled or multiline cells), are rendered in full when
+        this is called, and each page has *page_size* lines of the output.
+
+        :param iterable data: An :term:`iterable` (e.g. list) of rows, or
+            columnar data.
+        :param iterable headers: The column headers.
+        :param str format_name: The display format to use (optional, if the
+            :class:`TabularOutputFormatter` object has a default format set).
+        :param int page_size: The number of rows on each page.
+        :param tuple preprocessors: Additional preprocessors to call before
+                                    any formatter preprocessors.
+        :param iterable column_types: The columns' type objects (optional).
+        :param int sample_size: The number of leading rows used to compute
+            the column types and widths (optional, defaults to every row).
+        :param \*\*kwargs: Optional arguments for the formatter.
+        :return: The pages.
+        :rtype: ~cli_helpers.tabular_output.pagination.Pages
         :raises ValueError: If the *format_name* is not recognized.
 
         """
+        from . import native_table
+
         format_name = format_name or self._format_name
         if format_name not in self.supported_formats:
             raise ValueError('unrecognized format "{}"'.format(format_name))
+        preprocessors = tuple(preprocessors)
+
+        if columnar.is_columnar(data):
+            names, columns, _ = columnar.get_columns(data)
+            if headers is None:
+                headers = names
+            data = list(map(list, zip_longest(
+                *(columnar.column_values(column) for column in columns))))
+        elif not isinstance(data, (list, tuple)):
+            data = list(data)
+        sample = data if sample_size is None else data[:sample_size]
+        if column_types is None:
+            column_types = self._get_column_types(sample)
+
+        pipeline, formatter, fkwargs = self._get_plan(
+            format_name, preprocessors, kwargs)
+        if (format_name in native_table.supported_formats and
+                formatter is tabulate_adapter.adapter):
+            pages = self._paginate_native(data, headers, page_size, pipeline,
+                                          fkwargs, column_types, sample)
+            if pages is not None:
+                return pages
+
+        if format_name in PARALLEL_FORMATS:
+            header_lines = list(self.format_output(
+                (), headers, format_name, preprocessors, column_types,
+                **kwargs))
+            return Pages(data, page_size, partial(
+                _format_chunk, format_name, preprocessors, column_types,
+                kwargs, headers, num_header_lines=len(header_lines)),
+                header_lines)
+
+        lines = list(self.format_output(data, headers, format_name,
+                                        preprocessors, column_types, **kwargs))
+        return Pages(lines, page_size, list)
+
+    def _paginate_native(self, data, headers, page_size, pipeline, fkwargs,
+                         column_types, sample):
+        """Measure the *sample* rows with the native renderer.
+
+        :return: The pages, or :data:`None` if the table can't be rendered
+            natively.
+
+        """
+        from . import native_table
+
+        table_format, nkwargs = tabulate_adapter.native_arguments(**fkwargs)
+        rows, processed_headers = pipeline(sample, headers,
+                                           column_types=column_types)
+        try:
+            layout = native_table.layout_table(
+                list(rows), processed_headers, table_format, **nkwargs)
+        except native_table.Unsupported:
+            return None
+
+        if sample is data:
+            # The rows have all been formatted and padded already.
+            rows = list(zip(*layout.columns))
+            render_rows = partial(native_table.row_lines, layout)
+        else:
+            rows = data
+
+            def render_rows(rows):
+                rows, _ = pipeline(rows, headers, column_types=column_types)
+                rows = native_table.format_rows(
+                    layout, list(rows), nkwargs.get('floatfmt', 'g'),
+                    nkwargs['preserve_whitespace'])
+                return native_table.row_lines(layout, rows)
+
+        return Pages(rows, page_size, render_rows,
+                     native_table.header_lines(layout),
+                     native_table.footer_lines(layout))
 
+    async def format_output_async(self, data, headers, format_name=None,
+                                  preprocessors=(), column_types=None,
+                                  type_sample_size=None,
+                                  batch_size=ASYNC_BATCH_SIZE, max_pending=4,
+                                  **kwargs):
+        r"""Format rows from an asynchronous source.
+
+        This is an :term:`asynchronous generator` that yields the formatted
+        lines. The rows are read from *data* in batches of *batch_size* rows
+        and are run through the same preprocessors and formatters as
+        :meth:`format_output`. The rendering runs in a worker thread, so the
+        event loop stays responsive.
+
+        Rows are only read as the output is consumed: at most *max_pending*
+        batches of formatted lines are buffered before the worker waits for
+        the consumer. Formats that need every row before they can output a
+        line, like the tabulate formats, read the whole source first.
+
+        :param data: An :term:`asynchronous iterable` (or an
+            :term:`iterable`) of rows.
+        :param iterable headers: The column headers.
+        :param str format_name: The display format to use (optional, if the
+            :class:`TabularOutputFormatter` object has a default format set).
+        :param tuple preprocessors: Additional preprocessors to call before
+                                    any formatter preprocessors.
+        :param iterable column_types: The columns' type objects (optional).
+        :param int type_sample_size: The number of leading rows used to infer
+            the column types (optional, defaults to *batch_size*).
+        :param int batch_size: The number of rows (and lines) passed between
+            the event loop and the worker thread at once.
+        :param int max_pending: The number of batches of lines that can be
+            waiting for the consumer.
+        :param \*\*kwargs: Optional arguments for the formatter.
+        :raises ValueError: If the *format_name* is not recognized.
+
+        """
+        import asyncio
+
+        format_name = format_name or self._format_name
+        if format_name not in self.supported_formats:
+            raise ValueError('unrecognized format "{}"'.format(format_name))
+
+        loop = asyncio.get_event_loop()
+        rows = _aiter(data)
+        sample = []
+        if column_types is None:
+            sample = await _next_batch(rows, type_sample_size or batch_size)
+            column_types = self._get_column_types(sample)
+
+        lines = asyncio.Queue(maxsize=max_pending)
+        closed = threading.Event()
+
+        def put(item):
+            if closed.is_set():
+                raise _Closed()
+            asyncio.run_coroutine_threadsafe(lines.put(item), loop).result()
+
+        def row_source():
+            for row in sample:
+                yield row
+            while not closed.is_set():
+                batch = asyncio.run_coroutine_threadsafe(
+                    _next_batch(rows, batch_size), loop).result()
+                if not batch:
+                    return
+                for row in batch:
+                    yield row
+
+        def render():
+            try:
+                output = self.format_output(
+                    row_source(), headers, format_name, preprocessors,
+                    column_types, **kwargs)
+                batch = []
+                for line in output:
+                    batch.append(line)
+                    if len(batch) >= batch_size:
+                        put(batch)
+                        batch = []
+                if batch:
+                    put(batch)
+            except _Closed:
+                return
+            finally:
+                try:
+                    put(None)
+                except _Closed:
+                    pass
+
+        worker = loop.run_in_executor(None, render)
+        try:
+            while True:
+                batch = await lines.get()
+                if batch is None:
+                    break
+                for line in batch:
+                    yield line
+        finally:
+            closed.set()
+            while not lines.empty():
+                lines.get_nowait()
+            await worker
+
+    def _format_output_parallel(self, data, headers, format_name,
+                                preprocessors, column_types, type_sample_size,
+                                workers, chunk_size, use_threads, kwargs):
+        """Format the rows in chunks using a pool of *workers*.
+
+        At most two chunks per worker are in flight at a time, so the rows
+        are read as the output is consumed.
+
+        """
+        if column_types is None:
+            data, column_types = self._sample_column_types(
+                data, type_sample_size)
+        data = iter(data)
+        header_lines = list(self.format_output(
+            (), headers, format_name, preprocessors, column_types, **kwargs))
+        for line in header_lines:
+            yield line
+
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        executor_class = ThreadPoolExecutor if use_threads else ProcessPoolExecutor
+        with executor_class(max_workers=workers) as executor:
+            pending = deque()
+            while True:
+                chunk = list(itertools.islice(data, chunk_size))
+                if chunk:
+                    pending.append(executor.submit(
+                        _format_chunk, format_name, preprocessors,
+                        column_types, kwargs, headers, chunk,
+                        len(header_lines)))
+                if pending and (not chunk or len(pending) >= 2 * workers):
+                    for line in pending.popleft().result():
+                        yield line
+                elif not chunk:
+                    break
+
+    def _get_plan(self, format_name, preprocessors, kwargs):
+        """Get the execution plan for a call to :meth:`format_output`.
+
+        The plan holds the compiled preprocessor pipeline, the formatter
+        and its merged keyword arguments. Plans are cached, evicting the
+        least recently used plan once :attr:`plan_cache_size` is reached.
+        Calls with unhashable keyword arguments are not cached, except for
+        a :term:`mapping` *style*, which is copied into a
+        :class:`~cli_helpers.ansi.AnsiStyle`.
+
+        """
+        style = kwargs.get('style')
+        if isinstance(style, Mapping) and not isinstance(style, AnsiStyle):
+            kwargs = dict(kwargs, style=AnsiStyle(style))
+        try:
+            key = (format_name, preprocessors, frozenset(kwargs.items()))
+            hash(key)
+        except TypeError:
+            return self._make_plan(format_name, preprocessors, kwargs)
+
+        cache = self._plan_cache
+        with self._plan_cache_lock:
+            plan = cache.get(key)
+            if plan is not None:
+                cache.move_to_end(key)
+                return plan
+
+        plan = self._make_plan(format_name, preprocessors, kwargs)
+        with self._plan_cache_lock:
+            cache[key] = plan
+            while len(cache) > self.plan_cache_size:
+                cache.popitem(last=False)
+        return plan
+
+    def _make_plan(self, format_name, preprocessors, kwargs):
+        """Build the execution plan for a call to :meth:`format_output`."""
         (_, _preprocessors, formatter,
          fkwargs) = self._output_formats[format_name]
-        fkwargs.update(kwargs)
-        if column_types is None:
-            data = list(data)
-            column_types = self._get_column_types(data)
-        for f in unique_items(preprocessors + _preprocessors):
-            data, headers = f(data, headers, column_types=column_types,
-                              **fkwargs)
-        return formatter(list(data), headers, column_types=column_types, **fkwargs)
+        fkwargs = dict(fkwargs, **kwargs)
+        pipeline = Pipeline(unique_items(preprocessors + _preprocessors),
+                            fkwargs)
+        return ExecutionPlan(pipeline, formatter, fkwargs)
+
+    def _sample_column_types(self, data, sample_size, instrumentation=None):
+        """Get the column types from the first *sample_size* rows of *data*.
+
+        :return: The (unconsumed) data and the column types.
+        :rtype: tuple
+
+        """
+        data = iter(data)
+        sample = list(itertools.islice(data, sample_size))
+        return (itertools.chain(sample, data),
+                self._get_column_types(sample, instrumentation))
+
+    def _get_column_types(self, data, instrumentation=None):
+        """Get a list of the data types for each column in *data*.
+
+        The rows are scanned once, keeping the most generic type rank seen
+        for each column. Columns that have reached the text type are not
+        scanned any further.
+
+        """
+        if instrumentation is not None:
+            return instrumentation.column_types(self._get_column_types, data)
+        ranks = []
+        pending = []
+        type_ranks = {}
+        for row in data:
+            num_columns = len(row)
+            if num_columns > len(ranks):
+                pending.extend(range(len(ranks), num_columns))
+                ranks.extend([0] * (num_columns - len(ranks)))
+            elif not pending:
+                continue
+
+            saturated = False
+            for i in pending:
+                if i >= num_columns:
+                    continue
+                value = row[i]
+                try:
+                    rank = type_ranks[type(value)]
+                except KeyError:
+                    rank = type_ranks[type(value)] = TYPES[self._get_type(value)]
+                if rank > ranks[i]:
+                    ranks[i] = rank
+                    saturated = saturated or rank == TEXT_RANK
+            if saturated:
+                pending = [i for i in pending if ranks[i] != TEXT_RANK]
+        return [INVERSE_TYPES[rank] for rank in ranks]
 
-    def _get_column_types(self, data):
-        """Get a list of the data types for each column in *data*."""
-        columns = list(zip_longest(*data))
-        return [self._get_column_type(column) for column in columns]
+    def _get_columnar_types(self, columns, cell_types):
+        """Get the data types for *columns* of columnar data.
+
+        The *cell_types* read from the columns' metadata are used when they
+        are known, so only the other columns are scanned.
+
+        """
+        column_types = []
+        for column, cell_type in zip(columns, cell_types):
+            if cell_type is not None:
+                column_types.append(cell_type)
+            elif isinstance(column, columnar.DictionaryColumn):
+                column_types.append(self._get_column_type(column.dictionary)
+                                    if column.dictionary else type(None))
+            elif len(column):
+                column_types.append(self._get_column_type(column))
+            else:
+                column_types.append(type(None))
+        return column_types
 
     def _get_column_type(self, column):
         """Get the most generic data type for iterable *column*."""
         type_values = [TYPES[self._get_type(v)] for v in column]
-        inverse_types = {v: k for k, v in TYPES.items()}
-        return inverse_types[max(type_values)]
+        return INVERSE_TYPES[max(type_values)]
 
     def _get_type(self, value):
         """Get the data type for *value*."""
@@ -178,6 +930,133 @@ class TabularOutputFormatter(object):
             return text_type
 
 
+def _write_all(write, data):
+    """Write all of *data* with *write*, which may only write part of it."""
+    view = memoryview(data)
+    while view:
+        view = view[write(view):]
+
+
+def _write_lines(write, lines, encoding=None):
+    """Write *lines* with a single call to *write*.
+
+    :return: The number of lines written.
+
+    """
+    text = '\n'.join(lines) + '\n'
+    write(text.encode(encoding) if encoding else text)
+    return len(lines)
+
+
+def _columnar_rows(columns):
+    """Get the rows of the *columns* of columnar data."""
+    return map(list, zip_longest(
+        *(columnar.column_values(column) for column in columns)))
+
+
+def _take_preview(data, head, tail):
+    """Read the first *head* and last *tail* rows of *data*.
+
+    :return: The first rows, the last rows and the number of rows in
+        between.
+    :rtype: tuple
+
+    """
+    data = iter(data)
+    head_rows = list(itertools.islice(data, head))
+    # Number the rest of the rows, so they are counted while only the last
+    # ones are kept.
+    last = deque(enumerate(data, 1), maxlen=max(tail, 1))
+    num_rows = last[-1][0] if last else 0
+    tail_rows = [row for _, row in last][max(len(last) - tail, 0):]
+    return head_rows, tail_rows, num_rows - len(tail_rows)
+
+
+def _replace_sentinel_line(lines, marker, table_format):
+    """Replace the line of a table rendered by tabulate that has the
+    :data:`_PREVIEW_SENTINEL` with a line that has the *marker*, fitted
+    between the outer borders of the table."""
+    from . import native_table
+
+    width_fn = native_table._text_width
+    table_width = max(map(width_fn, lines))
+    pad = ' ' * table_format.padding
+    begin, _, end = table_format.datarow or ('', '', '')
+    # The borders, with their styles.
+    styles = r'(?:\x1b\[[\d;]*m)*'
+    begin_re = re.compile('^' + styles + re.escape(begin) + styles)
+    end_re = re.compile(styles + re.escape(end) + styles + '$')
+    for i, line in enumerate(lines):
+        if _PREVIEW_SENTINEL not in line:
+            continue
+        line_begin = begin_re.match(line).group() + pad if begin else ''
+        line_end = pad + end_re.search(line).group() if end else ''
+        width = table_width - width_fn(line_begin) - width_fn(line_end)
+        lines[i] = (line_begin + native_table.fit_text(marker, width) +
+                    line_end).rstrip()
+    return lines
+
+
+def _preview_lines(layout, num_head_rows, marker):
+    """Get the lines of a preview rendered natively, with a *marker* line
+    after the first *num_head_rows* rows."""
+    from . import native_table
+
+    rows = list(zip(*layout.columns))
+    between = layout.table_format.linebetweenrows
+    if between and 'linebetweenrows' not in native_table._hidden(layout):
+        between = [native_table.build_line(layout, between)]
+    else:
+        between = []
+    head_lines = list(native_table.row_lines(layout, rows[:num_head_rows]))
+    tail_lines = list(native_table.row_lines(layout, rows[num_head_rows:]))
+    return iter(native_table.header_lines(layout) + head_lines +
+                (between if head_lines else []) +
+                [native_table.span_line(layout, marker)] +
+                (between if tail_lines else []) + tail_lines +
+                native_table.footer_lines(layout))
+
+
+class _Closed(Exception):
+    """The consumer of :meth:`TabularOutputFormatter.format_output_async`
+    stopped reading."""
+
+
+def _aiter(data):
+    """Get an asynchronous iterator for the (asynchronous) iterable *data*."""
+    if hasattr(data, '__aiter__'):
+        return data.__aiter__()
+
+    async def rows():
+        for row in data:
+            yield row
+    return rows()
+
+
+async def _next_batch(rows, batch_size):
+    """Read up to *batch_size* rows from the asynchronous iterator *rows*."""
+    batch = []
+    try:
+        while len(batch) < batch_size:
+            batch.append(await rows.__anext__())
+    except StopAsyncIteration:
+        pass
+    return batch
+
+
+def _format_chunk(format_name, preprocessors, column_types, kwargs, headers,
+                  rows, num_header_lines):
+    """Format a chunk of *rows* without the header lines.
+
+    This runs in the workers used by
+    :meth:`TabularOutputFormatter.format_output`.
+
+    """
+    lines = TabularOutputFormatter().format_output(
+        rows, headers, format_name, preprocessors, column_types, **kwargs)
+    return list(itertools.islice(lines, num_header_lines, None))
+
+
 def format_output(data, headers, format_name, **kwargs):
     r"""Format output using *format_name*.
 
@@ -195,6 +1074,11 @@ def format_output(data, headers, format_name, **kwargs):
     return formatter.format_output(data, headers, **kwargs)
 
 
+#: The formats whose rows are formatted independently of each other, and can
+#: be rendered in parallel.
+PARALLEL_FORMATS = (delimited_output_adapter.supported_formats +
+                    tsv_output_adapter.supported_formats)
+
 for vertical_format in vertical_table_adapter.supported_formats:
     TabularOutputFormatter.register_new_formatter(
         vertical_format, vertical_table_adapter.adapter,
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Render a table one page at a time.
+
+:meth:`TabularOutputFormatter.paginate()
+<cli_helpers.tabular_output.TabularOutputFormatter.paginate>` measures a
+table once and returns its :class:`Pages`. Each page is then rendered on
+demand, with the same headers, borders and column widths as every other
+page::
+
+    >>> from cli_helpers.tabular_output import TabularOutputFormatter
+    >>> formatter = TabularOutputFormatter('psql')
+    >>> pages = formatter.paginate([[1, 'a'], [22, 'b'], [333, 'c']],
+    ...                            ['n', 's'], page_size=2)
+    >>> len(pages)
+    2
+    >>> for line in pages[1]:
+    ...     print(line)
+    +-----+---+
+    |   n | s |
+    |-----+---|
+    | 333 | c |
+    +-----+---+
+
+"""
+
+from __future__ import unicode_literals
+
+
+class Pages(object):
+    """The pages of a table.
+
+    Each page is rendered when it is requested, so opening a page takes time
+    in proportion to the number of rows on the page.
+
+    :param sequence rows: The rows of the table (or the lines of output).
+    :param int page_size: The number of rows on each page.
+    :param callable render_rows: A function that renders a list of rows as
+        lines.
+    :param list header_lines: The lines above the rows of each page.
+    :param list footer_lines: The lines below the rows of each page.
+
+    """
+
+    def __init__(self, rows, page_size, render_rows, header_lines=(),
+                 footer_lines=()):
+        if page_size < 1:
+            raise ValueError('page_size must be at least 1')
+        self.rows = rows
+        self.page_size = page_size
+        self.render_rows = render_rows
+        self.header_lines = list(header_lines)
+        self.footer_lines = list(footer_lines)
+
+    @property
+    def num_rows(self):
+        """The number of rows of the table."""
+        return len(self.rows)
+
+    def __len__(self):
+        """Get the number of pages (at least one)."""
+        return max(1, -(-len(self.rows) // self.page_size))
+
+    def __getitem__(self, page):
+        """Get the lines of a *page* (counting from 0)."""
+        if page < 0:
+            page += len(self)
+        if not 0 <= page < len(self):
+            raise IndexError('page {} out of range'.format(page))
+        return self.render(page, page + 1)
+
+    def __iter__(self):
+        for page in range(len(self)):
+            yield self[page]
+
+    def render(self, start, stop=None):
+        """Render the pages from *start* up to, but not including, *stop* as
+        one page.
+
+        :param int start: The first page.
+        :param int stop: The page after the last one (optional, defaults to
+            the last page).
+        :return: The lines of the pages.
+        :rtype: list
+
+        """
+        stop = len(self) if stop is None else stop
+        rows = self.rows[start * self.page_size:stop * self.page_size]
+        return (self.header_lines + list(self.render_rows(rows)) +
+                self.footer_lines)
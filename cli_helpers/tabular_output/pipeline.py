@@ -0,0 +1,443 @@
+# -*- coding: utf-8 -*-
+"""Compile a chain of preprocessors into a pipeline.
+
+Most of the preprocessors transform one cell at a time. Chaining them means
+that every row passes through a generator and a new list per preprocessor.
+A :class:`Pipeline` compiles consecutive per-cell preprocessors into a
+single function that is applied once to each row. Other preprocessors are
+called as usual.
+
+"""
+
+from __future__ import unicode_literals
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
+
+from cli_helpers import utils
+from cli_helpers.compat import (binary_type, text_type, int_types, float_types,
+                                zip_longest)
+from . import columnar, preprocessors
+
+
+CellTransform = namedtuple('CellTransform', 'source namespace row_tokens')
+
+
+def _override_missing_value_cell(style=None,
+                                 missing_value_token='Token.Output.Null',
+                                 missing_value='', **_):
+    if not utils.can_style(style):
+        return CellTransform(
+            'if v is None:\n    v = missing_value',
+            {'missing_value': missing_value}, None)
+    # The missing value is styled when the first one is found, so that a
+    # style without the missing value's token can format data without any.
+    style_missing_value = lru_cache(1)(
+        lambda: utils.style_field(missing_value_token, missing_value, style))
+    return CellTransform(
+        'if v is None:\n    v = style_missing_value()',
+        {'style_missing_value': style_missing_value}, None)
+
+
+def _convert_to_string_cell(**_):
+    return CellTransform(
+        'v = (bytes_to_string(v) if isinstance(v, binary_type)\n'
+        '     else text_type(v))', {}, None)
+
+
+def _truncate_string_cell(max_field_width=None, skip_multiline_string=True,
+                          **_):
+    if max_field_width is None:
+        return None
+    return CellTransform(
+        'if (isinstance(v, text_type) and len(v) > max_field_width and\n'
+        '        not (skip_multiline_string and "\\n" in v)):\n'
+        '    v = v[:max_field_width - 3] + "..."',
+        {'max_field_width': max_field_width,
+         'skip_multiline_string': skip_multiline_string}, None)
+
+
+def _escape_newlines_cell(**_):
+    return CellTransform(
+        'if isinstance(v, text_type):\n'
+        '    v = v.replace("\\r", r"\\r").replace("\\n", r"\\n")',
+        {}, None)
+
+
+def _bytes_to_string_cell(**_):
+    return CellTransform(
+        'if isinstance(v, binary_type):\n    v = bytes_to_string(v)', {}, None)
+
+
+def _style_output_cell(style=None, header_token='Token.Output.Header',
+                       odd_row_token='Token.Output.OddRow',
+                       even_row_token='Token.Output.EvenRow', **_):
+    relevant_styles = utils.filter_style_table(
+        style, header_token, odd_row_token, even_row_token)
+    if not (utils.can_style(style) and (relevant_styles.get(odd_row_token) or
+                                        relevant_styles.get(even_row_token))):
+        return None
+    codes = utils.get_style_codes(style)
+    return CellTransform(
+        'row_codes = style_codes[row_token]\n'
+        'if (row_codes is not None and isinstance(v, text_type) and v and\n'
+        '        "\\n" not in v):\n'
+        '    v = row_codes[0] + v + row_codes[1]\n'
+        'else:\n'
+        '    v = style_field(row_token, v, style)',
+        {'style': style,
+         'style_codes': {token: codes.get(str(token))
+                         for token in (odd_row_token, even_row_token)}},
+        (odd_row_token, even_row_token))
+
+
+#: The per-cell equivalents of the preprocessors that can be fused. Each
+#: factory takes the formatter's keyword arguments and returns a
+#: :class:`CellTransform`, or :data:`None` if the preprocessor would not
+#: change the data. A transform's source is a statement that updates the cell
+#: value ``v``; the *row_tokens* are the odd and even row tokens passed to the
+#: statement as ``row_token``.
+CELL_TRANSFORMS = {
+    preprocessors.override_missing_value: _override_missing_value_cell,
+    preprocessors.convert_to_string: _convert_to_string_cell,
+    preprocessors.truncate_string: _truncate_string_cell,
+    preprocessors.escape_newlines: _escape_newlines_cell,
+    preprocessors.bytes_to_string: _bytes_to_string_cell,
+    preprocessors.style_output: _style_output_cell,
+}
+
+
+def _align_decimals_column(**_):
+    def align(column, column_type):
+        if column_type is not float:
+            return column
+        if utils._is_ndarray(column) and column.dtype.kind == 'f':
+            return utils.align_decimals_column(column)
+        column = columnar.column_values(column)
+        indices = [i for i, v in enumerate(column) if type(v) in float_types]
+        aligned = utils.align_decimals_column([column[i] for i in indices])
+        for i, v in zip(indices, aligned):
+            column[i] = v
+        return column
+    return align
+
+
+def _format_numbers_column(integer_format=None, float_format=None, **_):
+    if integer_format is None and float_format is None:
+        return None
+
+    def format_numbers(column, column_type):
+        if integer_format and column_type is int:
+            return utils.format_numbers_column(column, integer_format,
+                                               int_types)
+        elif float_format and column_type is float:
+            return utils.format_numbers_column(column, float_format,
+                                               float_types)
+        return column
+    return format_numbers
+
+
+#: The per-column equivalents of preprocessors, used for data stored by
+#: column. Each factory takes the formatter's keyword arguments and returns a
+#: function that takes a column and its type and returns the processed
+#: column, or :data:`None` if the preprocessor would not change the data.
+COLUMN_TRANSFORMS = {
+    preprocessors.align_decimals: _align_decimals_column,
+    preprocessors.format_numbers: _format_numbers_column,
+}
+
+_ROW_FUNCTION = """\
+def process_row(row, row_token=None):
+    processed = []
+    append = processed.append
+    for v in row:
+{body}
+        append(v)
+    return processed
+"""
+
+
+_CELL_FUNCTION = """\
+def process_cell(v, row_token=None):
+{body}
+    return v
+"""
+
+#: The types of the values whose conversions can be memoized: equal values
+#: of these types are always converted to the same string. (Equal floats and
+#: decimals can have different strings, e.g. ``0.0`` and ``-0.0``.)
+MEMO_TYPES = frozenset((text_type, binary_type, bool, type(None)) +
+                       tuple(int_types))
+
+
+def _compile_function(template, transforms, name, indent):
+    """Compile the cell *transforms* into a function made from *template*.
+
+    The generated source is added to :mod:`linecache`, so that tracebacks
+    and debuggers show the lines of the compiled function.
+
+    :return: The compiled function.
+
+    """
+    import linecache
+
+    namespace = {
+        'binary_type': binary_type,
+        'text_type': text_type,
+        'bytes_to_string': utils.bytes_to_string,
+        'style_field': utils.style_field,
+    }
+    body = []
+    for transform in transforms:
+        namespace.update(transform.namespace)
+        body.extend(' ' * indent + line
+                    for line in transform.source.splitlines())
+    source = template.format(body='\n'.join(body))
+    filename = '<{} {:x}>'.format(name, hash(source) & 0xffffffff)
+    linecache.cache[filename] = (len(source), None,
+                                 source.splitlines(True), filename)
+    exec(compile(source, filename, 'exec'), namespace)
+    return namespace[template.split()[1].partition('(')[0]]
+
+
+def _compile_row_function(transforms, name):
+    """Compile the cell *transforms* into a single function for a row."""
+    return _compile_function(_ROW_FUNCTION, transforms, name, 8)
+
+
+def _compile_cell_function(transforms, name):
+    """Compile the cell *transforms* into a single function for a cell."""
+    return _compile_function(_CELL_FUNCTION, transforms, name, 4)
+
+
+class FusedPreprocessor(object):
+    """Apply several per-cell preprocessors in one pass over the data.
+
+    The cell transforms are compiled into a single function that processes
+    a row, so each row is copied once.
+
+    If the ``conversion_memo_size`` keyword argument is given, each column
+    has a memo of that many converted values: a value that is repeated in
+    a column (e.g. a status or a country code) is only converted once, and
+    the converted string is reused. The least recently used values are
+    evicted from a full memo. Only the values of the :data:`MEMO_TYPES` are
+    memoized.
+
+    :param tuple preprocessors: The fusable preprocessors, in order.
+    :param dict kwargs: The formatter's keyword arguments.
+
+    """
+
+    def __init__(self, preprocessors, kwargs):
+        self.preprocessors = tuple(preprocessors)
+        self.kwargs = kwargs
+
+        transforms = [CELL_TRANSFORMS[f](**kwargs) for f in self.preprocessors]
+        transforms = [t for t in transforms if t is not None]
+        self.row_tokens = next(
+            (t.row_tokens for t in transforms if t.row_tokens), None)
+        self.process_row = (_compile_row_function(transforms, self.__name__)
+                            if transforms else None)
+        self.process_cell = (_compile_cell_function(transforms, self.__name__)
+                             if transforms else None)
+
+    @property
+    def __name__(self):
+        return 'fused({})'.format(
+            ', '.join(f.__name__ for f in self.preprocessors))
+
+    def __call__(self, data, headers, conversion_memo_size=None, **kwargs):
+        for f in self.preprocessors:
+            _, headers = f((), headers, **kwargs)
+
+        process_row = self.process_row
+        if process_row is None:
+            return iter(data), headers
+        elif conversion_memo_size:
+            return self._memoized_rows(data, conversion_memo_size), headers
+        elif self.row_tokens is None:
+            return map(process_row, data), headers
+        odd_row_token, even_row_token = self.row_tokens
+        return (process_row(row, odd_row_token if i % 2 else even_row_token)
+                for i, row in enumerate(data, 1)), headers
+
+    def _memoized_rows(self, data, memo_size):
+        """Process the rows of *data*, with a memo for each column."""
+        process_cell = self.process_cell
+        odd_row_token, even_row_token = self.row_tokens or (None, None)
+        memos = []
+        for i, row in enumerate(data, 1):
+            if len(row) > len(memos):
+                memos.extend(lru_cache(memo_size, typed=True)(process_cell)
+                             for _ in range(len(row) - len(memos)))
+            row_token = odd_row_token if i % 2 else even_row_token
+            yield [memo(v, row_token) if type(v) in MEMO_TYPES
+                   else process_cell(v, row_token)
+                   for memo, v in zip(memos, row)]
+
+    def process_column(self, column):
+        """Apply the fused preprocessors to a whole *column*.
+
+        The dictionary of a
+        :class:`~cli_helpers.tabular_output.columnar.DictionaryColumn` is
+        processed instead of its values, so each distinct value is only
+        processed once.
+
+        :param list column: The values in a column.
+        :return: The processed values.
+        :rtype: list
+
+        """
+        process_row = self.process_row
+        if isinstance(column, columnar.DictionaryColumn):
+            return self._process_dictionary_column(column)
+        elif process_row is None:
+            return list(column)
+        elif self.row_tokens is None:
+            return process_row(column)
+        odd_row_token, even_row_token = self.row_tokens
+        processed = list(column)
+        processed[0::2] = process_row(column[0::2], odd_row_token)
+        processed[1::2] = process_row(column[1::2], even_row_token)
+        return processed
+
+    def _process_dictionary_column(self, column):
+        """Process the dictionary of a dictionary-encoded *column*, and
+        decode it."""
+        if self.process_row is None:
+            return column.decode()
+
+        has_missing_values = -1 in column.codes
+
+        def decode(row_token=None):
+            if not has_missing_values:
+                return column.decode(self.process_row(column.dictionary,
+                                                      row_token))
+            values = self.process_row(column.dictionary + [None], row_token)
+            return column.decode(values[:-1], values[-1])
+
+        if self.row_tokens is None:
+            return decode()
+        odd_row_token, even_row_token = self.row_tokens
+        processed = decode(odd_row_token)
+        processed[1::2] = decode(even_row_token)[1::2]
+        return processed
+
+
+class Pipeline(object):
+    """A compiled chain of preprocessors.
+
+    Consecutive preprocessors that have a per-cell equivalent in
+    :data:`CELL_TRANSFORMS` are fused into a :class:`FusedPreprocessor`.
+    The output is the same as calling each preprocessor in turn.
+
+    :param tuple preprocessors: The preprocessors to call, in order.
+    :param dict kwargs: The formatter's keyword arguments.
+
+    """
+
+    def __init__(self, preprocessors, kwargs):
+        self.kwargs = kwargs
+        self.stages = []
+
+        fusable = []
+        for f in preprocessors:
+            if f in CELL_TRANSFORMS:
+                fusable.append(f)
+                continue
+            self._add_fused(fusable)
+            fusable = []
+            self.stages.append(f)
+        self._add_fused(fusable)
+
+    def _add_fused(self, fusable):
+        if len(fusable) == 1:
+            self.stages.append(fusable[0])
+        elif fusable:
+            self.stages.append(FusedPreprocessor(fusable, self.kwargs))
+
+    def __call__(self, data, headers, column_types=None,
+                 instrumentation=None):
+        """Run the *data* and *headers* through the pipeline.
+
+        If *instrumentation* (an
+        :class:`~cli_helpers.tabular_output.instrumentation.Instrumentation`)
+        is given, each stage is timed.
+
+        :return: The processed data and headers.
+        :rtype: tuple
+
+        """
+        return self._run(self.stages, data, headers, column_types,
+                         instrumentation)
+
+    def run_columns(self, columns, headers, column_types=None,
+                    instrumentation=None):
+        """Run data stored by column through the pipeline.
+
+        If the pipeline starts with fused preprocessors, they are applied
+        to each column before the columns are turned into rows.
+
+        :param list columns: The columns, each a :term:`sequence` of values.
+        :param iterable headers: The column headers.
+        :return: The processed data (as rows) and headers.
+        :rtype: tuple
+
+        Leading preprocessors with an equivalent in :data:`COLUMN_TRANSFORMS`
+        are applied to each column first. NumPy arrays are kept as arrays
+        until then, so these can be vectorized.
+
+        """
+        stages = list(self.stages)
+        columns = list(columns)
+        types = list(column_types or ())
+        types += [None] * (len(columns) - len(types))
+        while stages and stages[0] in COLUMN_TRANSFORMS:
+            f = stages.pop(0)
+            _, headers = f((), headers, column_types=column_types,
+                           **self.kwargs)
+            transform = COLUMN_TRANSFORMS[f](**self.kwargs)
+            if transform is None:
+                continue
+            with _measure(instrumentation, f, columns):
+                columns = [transform(column, column_type)
+                           for column, column_type in zip(columns, types)]
+
+        if stages and isinstance(stages[0], FusedPreprocessor):
+            fused = stages.pop(0)
+            _, headers = fused((), headers, column_types=column_types,
+                               **self.kwargs)
+            columns = [column if isinstance(column, columnar.DictionaryColumn)
+                       else columnar.column_values(column)
+                       for column in columns]
+            with _measure(instrumentation, fused, columns):
+                columns = [fused.process_column(column)
+                           for column in columns]
+        else:
+            columns = [columnar.column_values(column) for column in columns]
+        data = map(list, zip_longest(*columns))
+        return self._run(stages, data, headers, column_types, instrumentation)
+
+    def _run(self, stages, data, headers, column_types, instrumentation=None):
+        if instrumentation is not None:
+            return instrumentation.run_stages(
+                stages, data, headers, column_types=column_types,
+                **self.kwargs)
+        for f in stages:
+            data, headers = f(data, headers, column_types=column_types,
+                              **self.kwargs)
+        return data, headers
+
+
+def _measure(instrumentation, f, columns):
+    """Measure the preprocessor *f* applied to whole *columns*, if
+    *instrumentation* is given."""
+    if instrumentation is None:
+        return _null_context()
+    return instrumentation.measure_columns('preprocessor', f.__name__,
+                                           columns)
+
+
+@contextmanager
+def _null_context():
+    yield
@@ -4,7 +4,7 @@
 import string
 
 from cli_helpers import utils
-from cli_helpers.compat import text_type, int_types, float_types, HAS_PYGMENTS
+from cli_helpers.compat import text_type, int_types, float_types
 
 
 def truncate_string(data, headers, max_field_width=None, skip_multiline_string=True, **_):
@@ -55,15 +55,23 @@ def override_missing_value(data, headers, style=None,
     :rtype: tuple
 
     """
+    styled = []
+
+    def get_missing_value():
+        # The missing value is styled once, when the first one is found.
+        if not utils.can_style(style):
+            return missing_value
+        if not styled:
+            styled.append(utils.style_field(missing_value_token,
+                                            missing_value, style))
+        return styled[0]
+
     def fields():
         for row in data:
             processed = []
             for field in row:
-                if field is None and style and HAS_PYGMENTS:
-                    styled = utils.style_field(missing_value_token, missing_value, style)
-                    processed.append(styled)
-                elif field is None:
-                    processed.append(missing_value)
+                if field is None:
+                    processed.append(get_missing_value())
                 else:
                     processed.append(field)
             yield processed
@@ -150,26 +158,17 @@ def align_decimals(data, headers, column_types=(), **_):
     :rtype: tuple
 
     """
-    pointpos = len(headers) * [0]
-    data = list(data)
-    for row in data:
-        for i, v in enumerate(row):
-            if column_types[i] is float and type(v) in float_types:
-                v = text_type(v)
-                pointpos[i] = max(utils.intlen(v), pointpos[i])
+    data = [list(row) for row in data]
+    for i, column_type in enumerate(column_types):
+        if column_type is not float:
+            continue
+        indices = [j for j, row in enumerate(data)
+                   if i < len(row) and type(row[i]) in float_types]
+        aligned = utils.align_decimals_column([data[j][i] for j in indices])
+        for j, v in zip(indices, aligned):
+            data[j][i] = v
 
-    def results(data):
-        for row in data:
-            result = []
-            for i, v in enumerate(row):
-                if column_types[i] is float and type(v) in float_types:
-                    v = text_type(v)
-                    result.append((pointpos[i] - utils.intlen(v)) * " " + v)
-                else:
-                    result.append(v)
-            yield result
-
-    return results(data), headers
+    return iter(data), headers
 
 
 def quote_whitespaces(data, headers, quotestyle="'", **_):
@@ -218,10 +217,16 @@ def style_output(data, headers, style=None,
     """Style the *data* and *headers* (e.g. bold, italic, and colors)
 
     .. NOTE::
-        This requires the `Pygments <http://pygments.org/>`_ library to
-        be installed. You can install it with CLI Helpers as an extra::
+        A Pygments style requires the `Pygments <http://pygments.org/>`_
+        library to be installed. You can install it with CLI Helpers as an
+        extra::
             $ pip install cli_helpers[styles]
 
+        A :term:`mapping` of token names to style strings is styled by the
+        built-in backend instead (see :mod:`cli_helpers.ansi`)::
+
+            style = {'Token.Output.Header': 'bold ansibrightred'}
+
     Example usage::
 
         from cli_helpers.tabular_output.preprocessors import style_output
@@ -243,7 +248,8 @@ def style_output(data, headers, style=None,
 
     :param iterable data: An :term:`iterable` (e.g. list) of rows.
     :param iterable headers: The column headers.
-    :param str/pygments.style.Style style: A Pygments style. You can `create
+    :param str/pygments.style.Style/dict style: A Pygments style, or a
+        :term:`mapping` of token names to style strings. You can `create
         your own styles <https://pygments.org/docs/styles#creating-own-styles>`_.
     :param str header_token: The token type to be used for the headers.
     :param str odd_row_token: The token type to be used for odd rows.
@@ -254,12 +260,12 @@ def style_output(data, headers, style=None,
     """
     from cli_helpers.utils import filter_style_table
     relevant_styles = filter_style_table(style, header_token, odd_row_token, even_row_token)
-    if style and HAS_PYGMENTS:
+    if utils.can_style(style):
         if relevant_styles.get(header_token):
-            headers = [utils.style_field(header_token, header, style) for header in headers]
+            headers = utils.style_fields(header_token, headers, style)
         if relevant_styles.get(odd_row_token) or relevant_styles.get(even_row_token):
-            data = ([utils.style_field(odd_row_token if i % 2 else even_row_token, f, style)
-                     for f in r] for i, r in enumerate(data, 1))
+            data = (utils.style_fields(odd_row_token if i % 2 else even_row_token, r, style)
+                    for i, r in enumerate(data, 1))
 
     return iter(data), headers
 
@@ -289,12 +295,21 @@ def format_numbers(data, headers, column_types=(), integer_format=None,
     if (integer_format is None and float_format is None) or not column_types:
         return iter(data), headers
 
-    def _format_number(field, column_type):
-        if integer_format and column_type is int and type(field) in int_types:
-            return format(field, integer_format)
-        elif float_format and column_type is float and type(field) in float_types:
-            return format(field, float_format)
-        return field
+    formats = {}
+    for i, column_type in enumerate(column_types):
+        if integer_format and column_type is int:
+            formats[i] = (integer_format, int_types)
+        elif float_format and column_type is float:
+            formats[i] = (float_format, float_types)
+    if not formats:
+        return iter(data), headers
 
-    data = ([_format_number(v, column_types[i]) for i, v in enumerate(row)] for row in data)
-    return data, headers
+    def results(data):
+        for row in data:
+            row = list(row)
+            for i, (format_spec, number_types) in formats.items():
+                if i < len(row) and type(row[i]) in number_types:
+                    row[i] = format(row[i], format_spec)
+            yield row
+
+    return results(data), headers
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""Render tables that are larger than a memory budget.
+
+The aligned formats need the widths of every column before the first line
+can be output. To render a table in bounded memory, the preprocessed rows
+are read into a :class:`RowSpool`, which writes them to a temporary file in
+chunks once they exceed the budget, while the chunks are measured with a
+:class:`~cli_helpers.tabular_output.native_table.TableMeasure`. The rows are
+then read back from the file, a chunk at a time, and rendered.
+
+"""
+
+from __future__ import unicode_literals
+
+from cli_helpers.compat import text_type
+from . import native_table
+
+#: The approximate number of bytes each cell takes up, besides its
+#: characters.
+CELL_OVERHEAD = 50
+
+
+class RowSpool(object):
+    """Rows kept in memory until they take up about *memory_budget* bytes,
+    and then written to a temporary file.
+
+    The rows are pickled to the file in chunks of about *memory_budget*
+    bytes, so that at most one chunk is in memory at a time when they are
+    read back.
+
+    :param int memory_budget: The number of bytes of rows to keep in memory.
+
+    """
+
+    def __init__(self, memory_budget):
+        self.memory_budget = memory_budget
+        self.rows = []
+        self.size = 0
+        self.file = None
+
+    @property
+    def spilled(self):
+        """Whether any rows have been written to the file."""
+        return self.file is not None
+
+    def fill(self, rows):
+        """Read *rows* into the spool.
+
+        :return: The chunks of rows, as they are written to the file.
+        :rtype: iterator
+
+        """
+        for row in rows:
+            self.rows.append(row)
+            self.size += (sum(len(text_type(cell)) for cell in row) +
+                          CELL_OVERHEAD * len(row))
+            if self.size >= self.memory_budget:
+                yield self.spill()
+
+    def spill(self):
+        """Write the rows in memory to the file.
+
+        :return: The rows that were written.
+        :rtype: list
+
+        """
+        import pickle
+
+        if self.file is None:
+            import tempfile
+            self.file = tempfile.TemporaryFile()
+        chunk = self.rows
+        pickle.dump(chunk, self.file, pickle.HIGHEST_PROTOCOL)
+        self.rows, self.size = [], 0
+        return chunk
+
+    def chunks(self):
+        """Read the rows back, one chunk at a time."""
+        if self.file is not None:
+            import pickle
+
+            self.file.seek(0)
+            while True:
+                try:
+                    yield pickle.load(self.file)
+                except EOFError:
+                    break
+        if self.rows:
+            yield self.rows
+
+    def __iter__(self):
+        for chunk in self.chunks():
+            for row in chunk:
+                yield row
+
+    def close(self):
+        """Delete the file and the rows."""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.rows, self.size = [], 0
+
+
+def render(spool, data, headers, table_format, floatfmt='g',
+           preserve_whitespace=False, **kwargs):
+    r"""Render a table, spilling its rows to disk if they exceed the budget
+    of the *spool*.
+
+    Every row of *data* is read into the *spool*. If they all fit in memory,
+    or if the table can only be rendered by tabulate, :data:`None` is
+    returned, and the rows can be read from the *spool*.
+
+    :param RowSpool spool: The spool to read the rows into.
+    :param iterable data: The rows, each a :term:`sequence` of strings.
+    :param list headers: The column headers.
+    :param tabulate.TableFormat table_format: The table format.
+    :param \*\*kwargs: The other keyword arguments of
+        :func:`~cli_helpers.tabular_output.native_table.layout_table`.
+    :return: The lines of the table, or :data:`None`.
+    :rtype: iterator
+
+    """
+    try:
+        measure = native_table.TableMeasure(
+            headers, table_format, floatfmt=floatfmt,
+            preserve_whitespace=preserve_whitespace, **kwargs)
+    except native_table.Unsupported:
+        measure = None
+
+    for chunk in spool.fill(data):
+        if measure is not None:
+            try:
+                measure.add(chunk)
+            except native_table.Unsupported:
+                measure = None
+    if not spool.spilled or measure is None:
+        return None
+
+    try:
+        measure.add(spool.rows)
+        layout = measure.layout()
+    except native_table.Unsupported:
+        return None
+    return _iter_lines(spool, layout, floatfmt, preserve_whitespace)
+
+
+def _iter_lines(spool, layout, floatfmt, preserve_whitespace):
+    """Yield the lines of a table whose rows are in a *spool*."""
+    rows = (row for chunk in spool.chunks()
+            for row in native_table.format_rows(layout, chunk, floatfmt,
+                                                preserve_whitespace))
+    try:
+        for line in native_table.header_lines(layout):
+            yield line
+        for line in native_table.row_lines(layout, rows):
+            yield line
+        for line in native_table.footer_lines(layout):
+            yield line
+    finally:
+        spool.close()
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""Render aligned tables as their rows arrive.
+
+The column widths of a table are fixed from its first rows, and the other
+rows are formatted to those widths as they are read, so the first lines of
+the table are output before the last row is read. Cells that are wider than
+their column are handled by an overflow policy:
+
+``'truncate'``
+    The cell is cut to the width of its column, ending with ``...``.
+``'wrap'``
+    The cell is split over as many lines as needed.
+``'widen'``
+    The column is widened to fit the cell, and the table's header is output
+    again with the new widths.
+
+In every case, a cell with newlines is split over several lines.
+
+"""
+
+from __future__ import unicode_literals
+
+from cli_helpers.compat import text_type
+from cli_helpers.utils import display_width, truncate_string
+from . import native_table, tabulate_adapter
+
+overflow_policies = ('truncate', 'wrap', 'widen')
+
+
+def render(sample, rows, headers, table_format, overflow='truncate',
+           floatfmt='g', preserve_whitespace=False, **kwargs):
+    r"""Render a table with the column widths of its *sample* rows.
+
+    The *sample* is measured before this returns, so
+    :exc:`~cli_helpers.tabular_output.native_table.Unsupported` is raised
+    before any line is yielded. The other *rows* are read as the lines are
+    consumed.
+
+    :param list sample: The first rows, each a :term:`sequence` of strings.
+    :param iterable rows: The other rows.
+    :param list headers: The column headers.
+    :param tabulate.TableFormat table_format: The table format.
+    :param str overflow: What to do with cells that are wider than their
+        column, one of :data:`overflow_policies`.
+    :param \*\*kwargs: The other keyword arguments of
+        :func:`~cli_helpers.tabular_output.native_table.layout_table`.
+    :return: The lines of the table.
+    :rtype: iterator
+    :raises ValueError: If the *overflow* policy is not recognized.
+    :raises Unsupported: If the *sample* can only be rendered by tabulate.
+
+    """
+    if overflow not in overflow_policies:
+        raise ValueError('unrecognized overflow policy "{}"'.format(overflow))
+    layout = native_table.layout_table(
+        sample, headers, table_format, floatfmt=floatfmt,
+        preserve_whitespace=preserve_whitespace, **kwargs)
+    headers = list(headers)
+    if headers:
+        headers = [''] * (len(layout.widths) - len(headers)) + headers
+    return _iter_lines(layout, headers, rows, overflow, floatfmt,
+                       preserve_whitespace)
+
+
+def _iter_lines(layout, headers, rows, overflow, floatfmt,
+                preserve_whitespace):
+    for line in native_table.header_lines(layout):
+        yield line
+    for line in native_table.row_lines(layout, zip(*layout.columns)):
+        yield line
+
+    tabulate = tabulate_adapter.get_tabulate()
+    width_fn = native_table._get_width_fn(tabulate)
+    if width_fn is not len:
+        width_fn = _display_width
+    num_columns = len(layout.widths)
+    widths = list(layout.widths)
+    between = _between_line(layout)
+    for row in rows:
+        if len(row) != num_columns:
+            raise ValueError('row has {} cells instead of {}'.format(
+                len(row), num_columns))
+        cells = native_table.format_rows(
+            layout, [[c if isinstance(c, text_type) else text_type(c)
+                      for c in row]],
+            floatfmt, preserve_whitespace, width_fn)[0]
+        lines = [c.split('\n') for c in cells]
+
+        fitted = widths
+        if overflow == 'widen':
+            fitted = [max([width] + list(map(width_fn, cell_lines)))
+                      for width, cell_lines in zip(widths, lines)]
+        if fitted != widths:
+            widths = fitted
+            for line in native_table.footer_lines(layout):
+                yield line
+            layout = native_table.with_widths(layout, headers, widths)
+            between = _between_line(layout)
+            for line in native_table.header_lines(layout):
+                yield line
+        elif between is not None:
+            yield between
+
+        columns = [_fit_cell(cell_lines, f.align, f.width, overflow,
+                             width_fn)
+                   for cell_lines, f in zip(lines, layout.formats)]
+        datarow = layout.table_format.datarow
+        for i in range(max(map(len, columns))):
+            yield native_table.build_row(
+                layout, datarow,
+                [c[i] if i < len(c) else ' ' * w
+                 for c, w in zip(columns, widths)])
+    for line in native_table.footer_lines(layout):
+        yield line
+
+
+def _between_line(layout):
+    """Get the line between the rows of a table, or :data:`None`."""
+    between = layout.table_format.linebetweenrows
+    if between and 'linebetweenrows' not in native_table._hidden(layout):
+        return native_table.build_line(layout, between)
+    return None
+
+
+def _fit_cell(lines, align, width, overflow, width_fn):
+    """Fit the *lines* of a cell in its column and pad them."""
+    if overflow == 'truncate':
+        lines = [_truncate(line, width, width_fn) for line in lines]
+    elif overflow == 'wrap':
+        lines = [piece for line in lines
+                 for piece in _wrap(line, width, width_fn)]
+    return native_table.pad_column(lines, align, width, width_fn)
+
+
+def _truncate(s, width, width_fn):
+    """Truncate *s* to *width* columns, ending it with ``...``.
+
+    Cells in columns that are too narrow for ``...`` are replaced with dots,
+    so that e.g. a number isn't shown with fewer digits.
+
+    """
+    if width_fn(s) <= width:
+        return s
+    elif width < 4:
+        return '.' * width
+    elif width_fn is len:
+        return truncate_string(s, width, skip_multiline_string=False)
+    while width_fn(s) > width - 3:
+        s = s[:-1]
+    return s + '...'
+
+
+def _wrap(s, width, width_fn):
+    """Split *s* into pieces of at most *width* columns."""
+    if width_fn(s) <= width:
+        return [s]
+    width = max(width, 1)
+    if width_fn is len:
+        return [s[i:i + width] for i in range(0, len(s), width)]
+    pieces, piece = [], ''
+    for c in s:
+        if piece and width_fn(piece + c) > width:
+            pieces.append(piece)
+            piece = ''
+        piece += c
+    return pieces + [piece]
+
+
+def _display_width(s):
+    """Measure *s*, counting each non-printable character as one column."""
+    width = display_width(s)
+    return len(s) if width < 0 else width
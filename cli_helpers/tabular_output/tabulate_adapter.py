@@ -3,37 +3,26 @@
 
 from __future__ import unicode_literals
 
-from cli_helpers.utils import filter_dict_by_key
-from cli_helpers.compat import (Terminal256Formatter, StringIO)
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import count, islice
+import threading
+import warnings
+
+from cli_helpers.ansi import AnsiStyle
+from cli_helpers.compat import Mapping
+from cli_helpers.utils import can_style, filter_dict_by_key, style_field
 from .preprocessors import (convert_to_string, truncate_string, override_missing_value,
-                            style_output, HAS_PYGMENTS, escape_newlines)
-
-import tabulate
-
-
-tabulate.MIN_PADDING = 0
-
-tabulate._table_formats['double'] = tabulate.TableFormat(
-    lineabove=tabulate.Line("╔", "═", "╦", "╗"),
-    linebelowheader=tabulate.Line("╠", "═", "╬", "╣"),
-    linebetweenrows=None,
-    linebelow=tabulate.Line("╚", "═", "╩", "╝"),
-    headerrow=tabulate.DataRow("║", "║", "║"),
-    datarow=tabulate.DataRow("║", "║", "║"),
-    padding=1,
-    with_header_hide=None,
-)
-
-tabulate._table_formats["ascii"] = tabulate.TableFormat(
-    lineabove=tabulate.Line("+", "-", "+", "+"),
-    linebelowheader=tabulate.Line("+", "-", "+", "+"),
-    linebetweenrows=None,
-    linebelow=tabulate.Line("+", "-", "+", "+"),
-    headerrow=tabulate.DataRow("|", "|", "|"),
-    datarow=tabulate.DataRow("|", "|", "|"),
-    padding=1,
-    with_header_hide=None,
-)
+                            style_output, escape_newlines)
+
+#: The table formats defined here instead of by tabulate. They are added when
+#: tabulate is first used (see :func:`get_tabulate`).
+table_formats = {}
+
+# Older versions of tabulate only support a global PRESERVE_WHITESPACE flag.
+# This is set when tabulate is first used.
+HAS_PRESERVE_WHITESPACE_ARG = None
+_preserve_whitespace_lock = threading.Lock()
 
 supported_markup_formats = ('mediawiki', 'html', 'latex', 'latex_booktabs',
                             'textile', 'moinmoin', 'jira')
@@ -42,17 +31,83 @@ supported_table_formats = ('ascii', 'plain', 'simple', 'grid', 'fancy_grid', 'pi
 
 supported_formats = supported_markup_formats + supported_table_formats
 
+#: The formats whose cells can span several lines. If the installed tabulate
+#: doesn't support multiline cells in one of them (e.g. older versions in
+#: ``github``), their newlines are escaped instead (see :func:`adapter`).
+multiline_formats = ('plain', 'simple', 'grid', 'fancy_grid', 'pipe', 'orgtbl',
+                     'psql', 'rst', 'github', 'jira')
+
 default_kwargs = {
     "ascii": {"numalign": "left"}
 }
 
+#: The number of styled table formats :func:`_get_tablefmt` remembers.
+STYLED_FORMAT_CACHE_SIZE = 64
+
+_tabulate = None
+_tabulate_lock = threading.Lock()
+
+# The numbers of the names styled multiline formats are registered under.
+_styled_format_ids = count()
+
+
+def get_tabulate():
+    """Get the :mod:`tabulate` module, importing and setting it up on first
+    use.
+
+    tabulate and its wide character support are slow to import, so they are
+    not imported until a table is formatted.
+
+    """
+    global _tabulate, HAS_PRESERVE_WHITESPACE_ARG
+    if _tabulate is not None:
+        return _tabulate
+    with _tabulate_lock:
+        if _tabulate is None:
+            from inspect import getfullargspec
+            import tabulate
+
+            tabulate.MIN_PADDING = 0
+            table_formats.update(_make_table_formats(tabulate))
+            HAS_PRESERVE_WHITESPACE_ARG = 'preserve_whitespace' in \
+                getfullargspec(tabulate.tabulate).args
+            _tabulate = tabulate
+    return _tabulate
+
+
+def _make_table_formats(tabulate):
+    """Make the :class:`tabulate.TableFormat` objects for the formats
+    defined here."""
+    return {
+        'double': tabulate.TableFormat(
+            lineabove=tabulate.Line("╔", "═", "╦", "╗"),
+            linebelowheader=tabulate.Line("╠", "═", "╬", "╣"),
+            linebetweenrows=None,
+            linebelow=tabulate.Line("╚", "═", "╩", "╝"),
+            headerrow=tabulate.DataRow("║", "║", "║"),
+            datarow=tabulate.DataRow("║", "║", "║"),
+            padding=1,
+            with_header_hide=None,
+        ),
+        'ascii': tabulate.TableFormat(
+            lineabove=tabulate.Line("+", "-", "+", "+"),
+            linebelowheader=tabulate.Line("+", "-", "+", "+"),
+            linebetweenrows=None,
+            linebelow=tabulate.Line("+", "-", "+", "+"),
+            headerrow=tabulate.DataRow("|", "|", "|"),
+            datarow=tabulate.DataRow("|", "|", "|"),
+            padding=1,
+            with_header_hide=None,
+        ),
+    }
+
 
 def get_preprocessors(format_name):
     common_formatters = (
         override_missing_value, convert_to_string, truncate_string, style_output
     )
 
-    if tabulate.multiline_formats.get(format_name):
+    if format_name in multiline_formats:
         return common_formatters + (style_output_table(format_name),)
     else:
         return common_formatters + (escape_newlines, style_output_table(format_name))
@@ -68,6 +123,11 @@ def style_output_table(format_name=""):
             be installed. You can install it with CLI Helpers as an extra::
                 $ pip install cli_helpers[styles]
 
+        .. NOTE::
+            The table separators are styled by :func:`adapter` when it is
+            given a *style*, so this preprocessor returns the *data* and
+            *headers* unchanged. It is kept for backwards compatibility.
+
         Example usage::
 
             from cli_helpers.tabular_output import tabulate_adapter
@@ -82,59 +142,250 @@ def style_output_table(format_name=""):
 
             headers = ('First Name', 'Last Name')
             data = [['Fred', 'Roberts'], ['George', 'Smith']]
-            style_output_table = tabulate_adapter.style_output_table('psql')
-            style_output_table(data, headers, style=CliStyle)
 
-            data, headers = style_output(data, headers, style=YourStyle)
-            output = tabulate_adapter.adapter(data, headers, style=YourStyle)
+            output = tabulate_adapter.adapter(data, headers, table_format='psql',
+                                              style=YourStyle)
 
         :param iterable data: An :term:`iterable` (e.g. list) of rows.
         :param iterable headers: The column headers.
-        :param str/pygments.style.Style style: A Pygments style. You can `create
+        :param str/pygments.style.Style/dict style: A Pygments style, or a
+        :term:`mapping` of token names to style strings. You can `create
         your own styles <https://pygments.org/docs/styles#creating-own-styles>`_.
         :param str table_separator_token: The token type to be used for the table separator.
         :return: data and headers.
         :rtype: tuple
 
         """
-        if style and HAS_PYGMENTS and format_name in supported_table_formats:
-            formatter = Terminal256Formatter(style=style)
-
-            def style_field(token, field):
-                """Get the styled text for a *field* using *token* type."""
-                s = StringIO()
-                formatter.format(((token, field),), s)
-                return s.getvalue()
-
-            def addColorInElt(elt):
-                if not elt:
-                    return elt
-                if elt.__class__ == tabulate.Line:
-                    return tabulate.Line(*(style_field(table_separator_token, val) for val in elt))
-                if elt.__class__ == tabulate.DataRow:
-                    return tabulate.DataRow(*(style_field(table_separator_token, val) for val in elt))
-                return elt
-
-            srcfmt = tabulate._table_formats[format_name]
-            newfmt = tabulate.TableFormat(
-                *(addColorInElt(val) for val in srcfmt))
-            tabulate._table_formats[format_name] = newfmt
-
         return iter(data), headers
     return style_output
 
 
+def get_table_format(format_name):
+    """Get the unstyled :class:`tabulate.TableFormat` for *format_name*."""
+    tabulate = get_tabulate()
+    return table_formats.get(format_name) or tabulate._table_formats[format_name]
+
+
+def style_table_format(table_format, style,
+                       table_separator_token='Token.Output.TableSeparator'):
+    """Style the separators of a :class:`tabulate.TableFormat`.
+
+    :param tabulate.TableFormat table_format: The table format to style.
+    :param str/pygments.style.Style/dict style: A Pygments style, or a
+        :term:`mapping` of token names to style strings.
+    :param str table_separator_token: The token type to be used for the table
+        separator.
+    :return: A new, styled table format.
+    :rtype: tabulate.TableFormat
+
+    """
+    tabulate = get_tabulate()
+
+    def style_element(elt):
+        if not elt:
+            return elt
+        if elt.__class__ == tabulate.Line:
+            return tabulate.Line(*(style_field(table_separator_token, val, style)
+                                   for val in elt))
+        if elt.__class__ == tabulate.DataRow:
+            return tabulate.DataRow(*(style_field(table_separator_token, val, style)
+                                      for val in elt))
+        if isinstance(elt, list):
+            return tuple(elt)
+        return elt
+
+    return tabulate.TableFormat(*(style_element(val) for val in table_format))
+
+
+def _get_tablefmt(format_name, style=None,
+                  table_separator_token='Token.Output.TableSeparator'):
+    """Get the *tablefmt* argument for :func:`tabulate.tabulate`.
+
+    tabulate's own table formats are passed by name, and the formats defined
+    here and the styled formats as :class:`tabulate.TableFormat` objects.
+    The stock table formats are never modified; the styled formats are
+    cached (see :func:`_get_styled_tablefmt`).
+
+    """
+    if not (can_style(style) and format_name in supported_table_formats):
+        get_tabulate()
+        return table_formats.get(format_name, format_name)
+    if isinstance(style, Mapping) and not isinstance(style, AnsiStyle):
+        style = AnsiStyle(style)
+    return _get_styled_tablefmt(format_name, style, table_separator_token)
+
+
+@lru_cache(STYLED_FORMAT_CACHE_SIZE)
+def _get_styled_tablefmt(format_name, style, table_separator_token):
+    """Get a table format styled with *style*.
+
+    The separators of a format are styled once per style and token, and
+    the least recently used formats are evicted once
+    :data:`STYLED_FORMAT_CACHE_SIZE` is reached.
+
+    """
+    return style_table_format(get_table_format(format_name), style,
+                              table_separator_token)
+
+
+@contextmanager
+def _named_tablefmt(format_name, tablefmt):
+    """Get the name of a styled multiline format while a table is rendered.
+
+    tabulate only folds multiline cells for table formats passed by name,
+    so a styled multiline format is registered with tabulate under a new
+    name, which is removed once the table is rendered. Other formats are
+    passed as they are.
+
+    """
+    tabulate = get_tabulate()
+    if format_name not in tabulate.multiline_formats or \
+            not isinstance(tablefmt, tabulate.TableFormat):
+        yield tablefmt
+        return
+
+    name = 'cli_helpers:{}:{}'.format(format_name, next(_styled_format_ids))
+    tabulate._table_formats[name] = tablefmt
+    tabulate.multiline_formats[name] = name
+    try:
+        yield name
+    finally:
+        del tabulate.multiline_formats[name]
+        del tabulate._table_formats[name]
+
+
 def adapter(data, headers, table_format=None, preserve_whitespace=False,
+            style=None, table_separator_token='Token.Output.TableSeparator',
+            memory_budget=None, width_sample_size=None, overflow='truncate',
             **kwargs):
-    """Wrap tabulate inside a function for TabularOutputFormatter."""
+    """Wrap tabulate inside a function for TabularOutputFormatter.
+
+    If a *width_sample_size* is given, the natively rendered formats are
+    streamed with the column widths of the first *width_sample_size* rows,
+    and wider cells are handled by the *overflow* policy (see
+    :mod:`~cli_helpers.tabular_output.streaming`). Otherwise, if a
+    *memory_budget* (in bytes) is given, their rows are spilled to a
+    temporary file once they exceed it (see
+    :mod:`~cli_helpers.tabular_output.spill`). Tables that can only be
+    rendered by tabulate (e.g. with styled or multiline cells) are read back
+    into memory, with a :exc:`RuntimeWarning` if they were spilled.
+
+    """
+    from . import native_table, spill, streaming
+
+    tabulate = get_tabulate()
+    tkwargs = _get_tabulate_kwargs(table_format, style, table_separator_token,
+                                   kwargs)
+    if table_format in native_table.supported_formats:
+        tablefmt, nkwargs = _get_native_kwargs(tkwargs, preserve_whitespace)
+        if width_sample_size is not None:
+            data = iter(data)
+            sample = list(islice(data, width_sample_size))
+            try:
+                return streaming.render(sample, data, headers, tablefmt,
+                                        overflow, **nkwargs)
+            except native_table.Unsupported:
+                data = sample + list(data)
+        elif memory_budget is not None:
+            spool = spill.RowSpool(memory_budget)
+            lines = spill.render(spool, data, headers, tablefmt, **nkwargs)
+            if lines is not None:
+                return lines
+            if spool.spilled:
+                warnings.warn('the table can only be rendered by tabulate, '
+                              'so all of its rows are read back into '
+                              'memory, beyond the memory_budget',
+                              RuntimeWarning)
+            data = list(spool)
+            spool.close()
+        data = data if isinstance(data, list) else list(data)
+        try:
+            return native_table.render(data, headers, tablefmt, **nkwargs)
+        except native_table.Unsupported:
+            pass
+
+    if table_format == 'rst' and tkwargs['tablefmt'] != 'rst':
+        data, headers = _escape_rst_first_column(data, headers)
+    if (table_format in multiline_formats and
+            table_format not in tabulate.multiline_formats):
+        data, headers = escape_newlines(data, headers)
+
+    if HAS_PRESERVE_WHITESPACE_ARG:
+        tkwargs['preserve_whitespace'] = preserve_whitespace
+        with _named_tablefmt(table_format, tkwargs['tablefmt']) as tablefmt:
+            tkwargs['tablefmt'] = tablefmt
+            output = tabulate.tabulate(data, headers, **tkwargs)
+        return iter(output.split('\n'))
+
+    with _preserve_whitespace_lock, \
+            _named_tablefmt(table_format, tkwargs['tablefmt']) as tablefmt:
+        tkwargs['tablefmt'] = tablefmt
+        tabulate.PRESERVE_WHITESPACE = preserve_whitespace
+        output = tabulate.tabulate(data, headers, **tkwargs)
+    return iter(output.split('\n'))
+
+
+def _escape_rst_first_column(data, headers):
+    """Escape the empty cells in the first column of an rst table.
+
+    tabulate only escapes them as ``..`` when the rst format is passed by
+    name, so this is done here for the styled rst format.
+
+    """
+    def escape_empty(value):
+        if isinstance(value, (str, bytes)) and not value.strip():
+            return '..'
+        return value
+
+    headers = list(headers)
+    if headers:
+        headers[0] = escape_empty(headers[0])
+    rows = []
+    for row in data:
+        row = list(row)
+        if row:
+            row[0] = escape_empty(row[0])
+        rows.append(row)
+    return rows, headers
+
+
+def native_arguments(table_format, preserve_whitespace=False, style=None,
+                     table_separator_token='Token.Output.TableSeparator',
+                     **kwargs):
+    """Get the arguments :func:`adapter` renders a table natively with.
+
+    :param str table_format: One of the
+        :data:`native_table.supported_formats`.
+    :return: The (styled) :class:`tabulate.TableFormat` and the keyword
+        arguments for :func:`native_table.layout_table`.
+    :rtype: tuple
+
+    """
+    return _get_native_kwargs(
+        _get_tabulate_kwargs(table_format, style, table_separator_token,
+                             kwargs),
+        preserve_whitespace)
+
+
+def _get_tabulate_kwargs(table_format, style, table_separator_token, kwargs):
+    """Get the keyword arguments for :func:`tabulate.tabulate`."""
     keys = ('floatfmt', 'numalign', 'stralign', 'showindex', 'disable_numparse')
-    tkwargs = {'tablefmt': table_format}
+    tkwargs = {'tablefmt': _get_tablefmt(table_format, style,
+                                         table_separator_token)}
     tkwargs.update(filter_dict_by_key(kwargs, keys))
 
     if table_format in supported_markup_formats:
         tkwargs.update(numalign=None, stralign=None)
 
-    tabulate.PRESERVE_WHITESPACE = preserve_whitespace
-
     tkwargs.update(default_kwargs.get(table_format, {}))
-    return iter(tabulate.tabulate(data, headers, **tkwargs).split('\n'))
+    return tkwargs
+
+
+def _get_native_kwargs(tkwargs, preserve_whitespace):
+    """Convert tabulate's keyword arguments for the native renderer."""
+    tabulate = get_tabulate()
+    nkwargs = dict(tkwargs, preserve_whitespace=preserve_whitespace)
+    tablefmt = nkwargs.pop('tablefmt')
+    if not isinstance(tablefmt, tabulate.TableFormat):
+        tablefmt = tabulate._table_formats[tablefmt]
+    return tablefmt, nkwargs
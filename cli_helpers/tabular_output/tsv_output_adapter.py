@@ -4,13 +4,60 @@
 from __future__ import unicode_literals
 
 from .preprocessors import bytes_to_string, override_missing_value, convert_to_string
-from itertools import chain
-from cli_helpers.utils import replace
+from itertools import islice
 
 supported_formats = ('tsv',)
 preprocessors = (override_missing_value, bytes_to_string, convert_to_string)
 
-def adapter(data, headers, **kwargs):
-    """Wrap the formatting inside a function for TabularOutputFormatter."""
-    for row in chain((headers,), data):
-        yield "\t".join((replace(r, (('\n', r'\n'), ('\t', r'\t'))) for r in row))
+#: The escapes of the characters that can't be in a field.
+ESCAPES = {ord('\n'): r'\n', ord('\t'): r'\t'}
+
+# A block of rows is joined with these separators, which are translated
+# into tabs and newlines while the fields are escaped.
+_FIELD_SEPARATOR = '\x1f'
+_RECORD_SEPARATOR = '\x1e'
+_BLOCK_ESCAPES = dict(ESCAPES)
+_BLOCK_ESCAPES.update({ord(_FIELD_SEPARATOR): '\t',
+                       ord(_RECORD_SEPARATOR): '\n'})
+
+
+def adapter(data, headers, block_size=None, **kwargs):
+    """Wrap the formatting inside a function for TabularOutputFormatter.
+
+    The header line is yielded first. If a *block_size* is given, the rows
+    are then escaped in blocks of *block_size* rows, and each block is
+    yielded as one string of lines (without a final newline).
+
+    """
+    yield _format_row(headers)
+    if block_size is None:
+        for row in data:
+            yield _format_row(row)
+        return
+
+    if block_size < 1:
+        raise ValueError('block_size must be at least 1')
+    data = iter(data)
+    for rows in iter(lambda: list(islice(data, block_size)), []):
+        yield _format_block(rows)
+
+
+def _format_row(row):
+    return '\t'.join(r.translate(ESCAPES) for r in row)
+
+
+def _format_block(rows):
+    """Format a block of *rows* with a single :meth:`str.translate` call.
+
+    Blocks whose fields contain the separators are formatted a row at a
+    time.
+
+    """
+    block = _RECORD_SEPARATOR.join(_FIELD_SEPARATOR.join(row)
+                                   for row in rows)
+    num_separators = len(rows) - 1 + sum(max(len(row) - 1, 0)
+                                         for row in rows)
+    if block.count(_FIELD_SEPARATOR) + block.count(_RECORD_SEPARATOR) == \
+            num_separators:
+        return block.translate(_BLOCK_ESCAPES)
+    return '\n'.join(map(_format_row, rows))
@@ -2,8 +2,10 @@
 """Format data into a vertical table layout."""
 
 from __future__ import unicode_literals
+from itertools import islice
+from operator import add
 
-from cli_helpers.utils import filter_dict_by_key
+from cli_helpers.utils import display_width, filter_dict_by_key
 from .preprocessors import (convert_to_string, override_missing_value,
                             style_output)
 
@@ -11,30 +13,43 @@ supported_formats = ('vertical', )
 preprocessors = (override_missing_value, convert_to_string, style_output)
 
 
-def _get_separator(num, sep_title, sep_character, sep_length):
-    """Get a row separator for row *num*."""
+def _header_width(header):
+    """Measure *header*, counting each character as one column if it has
+    non-printable characters (e.g. tabs)."""
+    width = display_width(header)
+    return len(header) if width < 0 else width
+
+
+def _get_separator_format(sep_title, sep_character, sep_length):
+    """Get a function that formats the row separator for a record number
+    *n*.
+
+    The dividers are built once, so each separator is made by a single
+    :meth:`str.format` call.
+
+    """
     left_divider_length = right_divider_length = sep_length
     if isinstance(sep_length, tuple):
         left_divider_length, right_divider_length = sep_length
-    left_divider = sep_character * left_divider_length
-    right_divider = sep_character * right_divider_length
-    title = sep_title.format(n=num + 1)
+    left_divider = _escape_braces(sep_character * left_divider_length)
+    right_divider = _escape_braces(sep_character * right_divider_length)
 
-    return "{left_divider}[ {title} ]{right_divider}\n".format(
-        left_divider=left_divider, right_divider=right_divider, title=title)
+    return '{left_divider}[ {title} ]{right_divider}\n'.format(
+        left_divider=left_divider, right_divider=right_divider,
+        title=sep_title).format
 
 
-def _format_row(headers, row):
-    """Format a row."""
-    formatted_row = [' | '.join(field) for field in zip(headers, row)]
-    return '\n'.join(formatted_row)
+def _escape_braces(s):
+    """Escape the braces in *s* for :meth:`str.format`."""
+    return s.replace('{', '{{').replace('}', '}}')
 
 
 def vertical_table(data, headers, sep_title='{n}. row', sep_character='*',
-                   sep_length=27):
+                   sep_length=27, records_per_chunk=1, first_record_number=1):
     """Format *data* and *headers* as an vertical table.
 
-    The values in *data* and *headers* must be strings.
+    The values in *data* and *headers* must be strings. The records are
+    formatted as the rows are read, so the output is streamed.
 
     :param iterable data: An :term:`iterable` (e.g. list) of rows.
     :param iterable headers: The column headers.
@@ -47,20 +62,38 @@ def vertical_table(data, headers, sep_title='{n}. row', sep_character='*',
                                  appear on each side of the *sep_title*. Use
                                  a tuple to specify the left and right values
                                  separately.
+    :param int records_per_chunk: The number of records joined into each
+                                  string that is yielded, e.g. for bulk
+                                  writes. Defaults to one.
+    :param int first_record_number: The number of the first record. Defaults
+                                    to one.
     :return: The formatted data.
     :rtype: str
 
     """
-    header_len = max([len(x) for x in headers])
-    padded_headers = [x.ljust(header_len) for x in headers]
-    formatted_rows = [_format_row(padded_headers, row) for row in data]
-
-    output = []
-    for i, result in enumerate(formatted_rows):
-        yield _get_separator(i, sep_title, sep_character, sep_length) + result
+    if records_per_chunk < 1:
+        raise ValueError('records_per_chunk must be at least 1')
+    header_widths = [_header_width(x) for x in headers]
+    header_len = max(header_widths)
+    prefixes = [x.ljust(header_len + len(x) - width) + ' | '
+                for x, width in zip(headers, header_widths)]
+    separator = _get_separator_format(sep_title, sep_character, sep_length)
+
+    records = (separator(n=n) + '\n'.join(map(add, prefixes, row))
+               for n, row in enumerate(data, first_record_number))
+    if records_per_chunk == 1:
+        for record in records:
+            yield record
+        return
+    while True:
+        chunk = list(islice(records, records_per_chunk))
+        if not chunk:
+            break
+        yield '\n'.join(chunk)
 
 
 def adapter(data, headers, **kwargs):
     """Wrap vertical table in a function for TabularOutputFormatter."""
-    keys = ('sep_title', 'sep_character', 'sep_length')
+    keys = ('sep_title', 'sep_character', 'sep_length', 'records_per_chunk',
+            'first_record_number')
     return vertical_table(data, headers, **filter_dict_by_key(kwargs, keys))
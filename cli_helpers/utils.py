@@ -2,15 +2,19 @@
 """Various utility functions and helpers."""
 
 import binascii
+from itertools import repeat
 import re
 from functools import lru_cache
 from typing import Dict
 
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
+    from pygments.formatters.terminal256 import Terminal256Formatter
     from pygments.style import StyleMeta
 
-from cli_helpers.compat import binary_type, text_type, Terminal256Formatter, StringIO
+from cli_helpers import ansi
+from cli_helpers.compat import (binary_type, text_type, HAS_PYGMENTS, Mapping,
+                                StringIO, get_terminal256_formatter)
 
 
 def bytes_to_string(b):
@@ -50,6 +54,65 @@ def intlen(n):
     return len(n) if pos < 0 else pos
 
 
+def _is_ndarray(values):
+    """Check if *values* is a NumPy array (without importing NumPy)."""
+    return type(values).__module__ == 'numpy' and hasattr(values, 'dtype')
+
+
+def align_decimals_column(values):
+    """Align the numbers in *values* on their decimal points.
+
+    Each number is converted to a string once, and whitespace is added
+    before it so that the integer parts of all numbers have the same width.
+    A double-precision NumPy array is converted and padded by NumPy.
+
+    :param values: A :term:`sequence` of numbers or a NumPy array.
+    :return: The aligned strings.
+    :rtype: list
+
+    """
+    if _is_ndarray(values) and values.dtype.kind == 'f' and \
+            values.dtype.itemsize == 8 and len(values):
+        import numpy as np
+
+        strings = values.astype(text_type)
+        points = np.char.find(strings, '.')
+        intlens = np.where(points < 0, np.char.str_len(strings), points)
+        padding = np.char.multiply(' ', intlens.max() - intlens)
+        return np.char.add(padding, strings).tolist()
+
+    if _is_ndarray(values):
+        values = values.tolist()
+    strings = [text_type(v) for v in values]
+    intlens = [intlen(v) for v in strings]
+    width = max(intlens) if intlens else 0
+    return [(width - n) * ' ' + v for n, v in zip(intlens, strings)]
+
+
+def format_numbers_column(values, format_spec, number_types):
+    """Format the numbers in *values* using *format_spec*.
+
+    Only values whose type is in *number_types* are formatted. For a NumPy
+    array of integers or floats, every value is formatted without checking
+    its type.
+
+    :param values: A :term:`sequence` of values or a NumPy array.
+    :param str format_spec: The format specification for the numbers.
+    :param tuple number_types: The types of the values to format.
+    :return: The formatted values.
+    :rtype: list
+
+    """
+    if _is_ndarray(values):
+        kind = values.dtype.kind
+        values = values.tolist()
+        if (kind in 'iu' and int in number_types) or \
+                (kind == 'f' and float in number_types):
+            return list(map(format, values, repeat(format_spec)))
+    return [format(v, format_spec) if type(v) in number_types else v
+            for v in values]
+
+
 def filter_dict_by_key(d, keys):
     """Filter the dict *d* to remove keys not in *keys*."""
     return {k: v for k, v in d.items() if k in keys}
@@ -69,6 +132,75 @@ def strip_ansi(value):
     return _ansi_re.sub('', value)
 
 
+#: The number of display widths :func:`display_width` remembers.
+DISPLAY_WIDTH_CACHE_SIZE = 4096
+
+# Printable ASCII strings (like ``s.isascii() and s.isprintable()``, which
+# needs Python 3.7).
+_printable_ascii_re = re.compile(r'[ -~]*\Z')
+
+
+def display_width(value):
+    """Get the number of terminal columns a string takes up.
+
+    ANSI escape sequences take up no columns, and wide characters (e.g.
+    Chinese characters) take up two. Printable ASCII strings are measured
+    with :func:`len`; the widths of the other strings are computed with
+    ``wcwidth`` (if it is installed) and remembered in a bounded LRU cache,
+    see :func:`display_width_cache_info`.
+
+    The tables rendered by CLI Helpers (the native formats and the
+    ``vertical`` format) are measured with this function. The tables
+    rendered by tabulate (e.g. the ones with styled or multiline cells) are
+    measured by tabulate itself, so their widths are not cached.
+
+    :param str value: The string to measure.
+    :return: The width of *value*, or -1 if it contains non-printable
+        characters (like ``wcwidth.wcswidth()``).
+    :rtype: int
+
+    """
+    if _printable_ascii_re.match(value):
+        return len(value)
+    return _cached_display_width(value)
+
+
+def _display_width(value):
+    if '\033' in value:
+        value = strip_ansi(value)
+    try:
+        from wcwidth import wcswidth
+    except ImportError:
+        return len(value)
+    return wcswidth(value)
+
+
+_cached_display_width = lru_cache(DISPLAY_WIDTH_CACHE_SIZE)(_display_width)
+
+
+def display_width_cache_info():
+    """Get the hits, misses, maximum size and current size of the cache used
+    by :func:`display_width`.
+
+    Printable ASCII strings are not cached, so they are not counted.
+
+    :rtype: functools._CacheInfo
+
+    """
+    return _cached_display_width.cache_info()
+
+
+def set_display_width_cache_size(maxsize=DISPLAY_WIDTH_CACHE_SIZE):
+    """Resize (and clear) the cache used by :func:`display_width`.
+
+    :param int maxsize: The number of widths to remember, or ``None`` for an
+        unbounded cache.
+
+    """
+    global _cached_display_width
+    _cached_display_width = lru_cache(maxsize)(_display_width)
+
+
 def replace(s, replace):
     """Replace multiple values in a string"""
     for r in replace:
@@ -77,18 +209,82 @@ def replace(s, replace):
 
 
 @lru_cache()
-def _get_formatter(style) -> Terminal256Formatter:
-    return Terminal256Formatter(style=style)
+def _get_formatter(style) -> "Terminal256Formatter":
+    return get_terminal256_formatter()(style=style)
+
+
+def can_style(style):
+    """Check if output can be styled with *style*.
+
+    A :term:`mapping` is a style for the built-in ANSI backend (see
+    :mod:`cli_helpers.ansi`); other styles need Pygments.
+
+    """
+    return bool(style) and (isinstance(style, Mapping) or HAS_PYGMENTS)
+
+
+def get_style_codes(style):
+    """Get the ANSI escape sequences that *style* uses for each token.
+
+    The codes are resolved once per style, by the built-in ANSI backend for
+    a :term:`mapping` and by Pygments for other styles.
+
+    :param str/pygments.style.Style/dict style: A Pygments style, or a
+        :term:`mapping` of token names to style strings.
+    :return: The codes that start and end the text of each token, by the
+        token's name (e.g. ``'Token.Output.OddRow'``).
+    :rtype: dict
+
+    """
+    if isinstance(style, Mapping):
+        return ansi.get_style_codes(style)
+    return _get_pygments_style_codes(style)
+
+
+@lru_cache()
+def _get_pygments_style_codes(style):
+    return dict(_get_formatter(style).style_string)
 
 
 def style_field(token, field, style):
-    """Get the styled text for a *field* using *token* type."""
+    """Get the styled text for a *field* using *token* type.
+
+    A string without newlines is styled by adding the token's codes (see
+    :func:`get_style_codes`) around it, unless it's empty. Other fields are
+    formatted by the style's backend.
+
+    """
+    codes = get_style_codes(style).get(str(token))
+    if codes is not None and isinstance(field, text_type) and \
+            '\n' not in field:
+        return codes[0] + field + codes[1] if field else field
+    if isinstance(style, Mapping):
+        return ansi.style_text(token, field, style)
     formatter = _get_formatter(style)
     s = StringIO()
     formatter.format(((token, field),), s)
     return s.getvalue()
 
 
+def style_fields(token, fields, style):
+    """Get the styled text for each of the *fields* using *token* type.
+
+    The token's codes are looked up once, so this is faster than calling
+    :func:`style_field` for each field.
+
+    :return: The styled fields.
+    :rtype: list
+
+    """
+    codes = get_style_codes(style).get(str(token))
+    if codes is None:
+        return [style_field(token, field, style) for field in fields]
+    on, off = codes
+    return [(on + field + off if field else field)
+            if isinstance(field, text_type) and '\n' not in field
+            else style_field(token, field, style) for field in fields]
+
+
 def filter_style_table(style: "StyleMeta", *relevant_styles: str) -> Dict:
     """
     get a dictionary of styles for given tokens. Typical usage:
@@ -98,7 +294,8 @@ def filter_style_table(style: "StyleMeta", *relevant_styles: str) -> Dict:
         'Token.Output.OddRow': "",
     }
     """
-    _styles_iter = ((str(key), val) for key, val in getattr(style, 'styles', {}).items())
+    styles = style if isinstance(style, Mapping) else getattr(style, 'styles', {})
+    _styles_iter = ((str(key), val) for key, val in styles.items())
     _relevant_styles_iter = filter(
         lambda tpl: tpl[0] in relevant_styles,
         _styles_iter
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""Test formatting data stored by column."""
+
+from __future__ import unicode_literals
+import subprocess
+import sys
+
+import pytest
+
+from cli_helpers.compat import HAS_PYGMENTS, text_type
+from cli_helpers.tabular_output import TabularOutputFormatter, columnar
+from cli_helpers.tabular_output.pipeline import Pipeline
+from cli_helpers.tabular_output.preprocessors import (align_decimals,
+                                                      format_numbers)
+
+if HAS_PYGMENTS:
+    from pygments.style import Style
+    from pygments.token import Token
+
+    class CliStyle(Style):
+        default_style = ""
+        styles = {
+            Token.Output.Header: 'bold ansibrightred',
+            Token.Output.OddRow: 'bg:#eee #111',
+            Token.Output.EvenRow: '#0f0',
+            Token.Output.Null: '#f00',
+            Token.Output.TableSeparator: 'ansibrightred',
+        }
+else:
+    CliStyle = None
+
+COLUMNS = {
+    'id': [1, 2, 3],
+    'name': ['Fred', None, 'Ποσειδῶν'],
+    'score': [1.5, 10.25, None],
+    'raw': [b'\xff', b'abc', None],
+}
+
+
+def row_output(columns, format_name, **kwargs):
+    """Format *columns* by converting them to rows first."""
+    headers = list(columns.keys())
+    rows = [list(row) for row in zip(*columns.values())]
+    return list(TabularOutputFormatter().format_output(
+        rows, headers, format_name=format_name, **kwargs))
+
+
+def capture_column_types(captured):
+    """Get a preprocessor that stores the column types in *captured*."""
+    def preprocessor(data, headers, column_types=(), **_):
+        captured.extend(column_types)
+        return data, headers
+    return preprocessor
+
+
+@pytest.mark.parametrize('style', [None, CliStyle])
+def test_dict_of_columns(style):
+    """Test that a dict of columns is formatted like the same rows."""
+    formatter = TabularOutputFormatter()
+    for format_name in ('psql', 'csv', 'tsv', 'vertical', 'html'):
+        assert row_output(COLUMNS, format_name, style=style) == list(
+            formatter.format_output(COLUMNS, None, format_name=format_name,
+                                    style=style)), format_name
+
+
+def test_dict_of_columns_with_headers():
+    """Test that the headers override the column names."""
+    output = TabularOutputFormatter().format_output(
+        {'a': [1], 'b': ['x']}, ['first', 'second'], format_name='csv')
+    assert ['first,second', '1,x'] == list(output)
+
+
+def test_is_columnar():
+    """Test which data is recognized as columnar."""
+    assert columnar.is_columnar({'a': [1]})
+    assert not columnar.is_columnar([[1]])
+    assert not columnar.is_columnar(iter([[1]]))
+
+
+def test_columnar_does_not_import_optional_libraries():
+    """Test that NumPy and pyarrow are not imported with cli_helpers."""
+    code = ('import sys; from cli_helpers.tabular_output import format_output; '
+            'list(format_output({"a": [1]}, None, "psql")); '
+            'assert "numpy" not in sys.modules; '
+            'assert "pyarrow" not in sys.modules')
+    subprocess.check_call([sys.executable, '-c', code])
+
+
+def test_numpy_array():
+    """Test formatting a NumPy array, with types from its dtype."""
+    np = pytest.importorskip('numpy')
+    captured = []
+    array = np.array([[1, 2], [3, 4]])
+    output = TabularOutputFormatter().format_output(
+        array, ['a', 'b'], format_name='csv',
+        preprocessors=(capture_column_types(captured),))
+
+    assert ['a,b', '1,2', '3,4'] == list(output)
+    assert [int, int] == captured
+
+
+def test_numpy_structured_array():
+    """Test formatting a structured NumPy array."""
+    np = pytest.importorskip('numpy')
+    captured = []
+    array = np.array([(1, 1.5, 'x'), (2, 2.25, 'y')],
+                     dtype=[('id', 'i4'), ('score', 'f8'), ('name', 'U5')])
+    output = TabularOutputFormatter().format_output(
+        array, None, format_name='tsv',
+        preprocessors=(capture_column_types(captured),))
+
+    assert ['id\tscore\tname', '1\t1.5\tx', '2\t2.25\ty'] == list(output)
+    assert [int, float, text_type] == captured
+
+
+def test_arrow_table():
+    """Test formatting an Arrow table, with types from its schema."""
+    pa = pytest.importorskip('pyarrow')
+    captured = []
+    table = pa.table({'id': [1, 2, 3], 'name': ['Fred', None, 'Ποσειδῶν'],
+                      'score': [1.5, 10.25, None]})
+    columns = {'id': COLUMNS['id'], 'name': COLUMNS['name'],
+               'score': COLUMNS['score']}
+    output = TabularOutputFormatter().format_output(
+        table, None, format_name='psql',
+        preprocessors=(capture_column_types(captured),))
+
+    assert row_output(columns, 'psql') == list(output)
+    assert [int, text_type, float] == captured
+
+
+def test_numeric_preprocessors_by_column():
+    """Test that the numeric preprocessors give the same output by column."""
+    columns = {'id': [1000, 2, None], 'score': [1.5, 10.25, 3],
+               'other': ['a', 'b', 'c']}
+    kwargs = dict(preprocessors=(format_numbers, align_decimals),
+                  column_types=(int, float, text_type), integer_format=',')
+    for format_name in ('psql', 'csv'):
+        assert row_output(columns, format_name, **kwargs) == list(
+            TabularOutputFormatter().format_output(
+                columns, None, format_name=format_name, **kwargs))
+
+
+def test_numeric_preprocessors_numpy():
+    """Test that the numeric preprocessors give the same output for NumPy."""
+    np = pytest.importorskip('numpy')
+    array = np.array([(1000, 1.5), (2, 10.25), (30, 3.0)],
+                     dtype=[('id', 'i8'), ('score', 'f8')])
+    columns = {'id': [1000, 2, 30], 'score': [1.5, 10.25, 3.0]}
+    kwargs = dict(preprocessors=(align_decimals, format_numbers),
+                  column_types=(int, float), integer_format=',')
+    assert row_output(columns, 'psql', **kwargs) == list(
+        TabularOutputFormatter().format_output(
+            array, None, format_name='psql', **kwargs))
+
+
+def test_inferred_float_columns_are_formatted():
+    """Test that float columns are formatted the same with inferred and
+    explicit column types."""
+    np = pytest.importorskip('numpy')
+    array = np.array([(1, 1.5), (2, 10.25)],
+                     dtype=[('id', 'i8'), ('score', 'f8')])
+    columns = {'id': [1, 2], 'score': [1.5, 10.25]}
+    kwargs = dict(preprocessors=(format_numbers,), float_format='.3f')
+    expected = ['id,score', '1,1.500', '2,10.250']
+    for data in (array, columns):
+        assert expected == list(TabularOutputFormatter().format_output(
+            data, None, format_name='csv', **kwargs))
+        assert expected == list(TabularOutputFormatter().format_output(
+            data, None, format_name='csv', column_types=(int, float),
+            **kwargs))
+    assert expected == list(TabularOutputFormatter().format_output(
+        [[1, 1.5], [2, 10.25]], ['id', 'score'], format_name='csv',
+        **kwargs))
+
+
+@pytest.mark.parametrize('style', [None, CliStyle])
+def test_dictionary_column(style):
+    """Test that a dictionary-encoded column is formatted like its values,
+    and that each distinct value is only processed once."""
+    column = columnar.DictionaryColumn([0, 1, -1, 0, 1], ['ok', b'\xff'])
+    columns = {'status': column, 'id': [1, 2, 3, 4, 5]}
+    values = {'status': ['ok', b'\xff', None, 'ok', b'\xff'],
+              'id': [1, 2, 3, 4, 5]}
+    for format_name in ('psql', 'csv', 'vertical'):
+        assert row_output(values, format_name, style=style) == list(
+            TabularOutputFormatter().format_output(
+                columns, None, format_name=format_name, style=style))
+
+    pipeline = Pipeline(TabularOutputFormatter._output_formats[
+        'psql'].preprocessors, {'missing_value': '<null>'})
+    data, _ = pipeline.run_columns([column], ['status'],
+                                   column_types=[text_type])
+    cells = [row[0] for row in data]
+    assert ['ok', '0xff', '<null>', 'ok', '0xff'] == cells
+    assert cells[0] is cells[3] and cells[1] is cells[4]
+
+
+def test_dictionary_column_types():
+    """Test that the type of a dictionary-encoded column is read from its
+    dictionary."""
+    columns = [columnar.DictionaryColumn([1, 0, 1], [1.5, 'x']),
+               columnar.DictionaryColumn([-1, -1], [])]
+    assert [text_type, type(None)] == \
+        TabularOutputFormatter()._get_columnar_types(columns, [None, None])
+    assert ['x', 1.5, 'x'] == columns[0].decode()
+    assert [None, None] == list(columns[1])
+
+
+def test_arrow_dictionary_column():
+    """Test formatting a dictionary-encoded Arrow column."""
+    pa = pytest.importorskip('pyarrow')
+    table = pa.table({'status': pa.chunked_array([
+        pa.array(['ok', None]).dictionary_encode(),
+        pa.array(['failed', 'ok']).dictionary_encode()])})
+    column = columnar.get_columns(table)[1][0]
+
+    assert isinstance(column, columnar.DictionaryColumn)
+    assert ['ok', None, 'failed', 'ok'] == list(column)
+    assert row_output({'status': list(column)}, 'psql') == list(
+        TabularOutputFormatter().format_output(table, None,
+                                               format_name='psql'))
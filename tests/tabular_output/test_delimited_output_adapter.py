@@ -46,3 +46,23 @@ def test_unicode_with_csv():
         观音,1\n\
         Ποσειδῶν,456''')
 
+
+
+@pytest.mark.parametrize('block_size', [1, 2, 5])
+@pytest.mark.parametrize('table_format', ['csv', 'csv-tab'])
+def test_csv_blocks(table_format, block_size):
+    """Test that blocks of rows are the same as the lines of the rows."""
+    data = [['a,b', '1'], ['c\nd', '"2"'], ['', 'e\tf'], ['g', '3']]
+    headers = ['letters', 'number']
+    lines = list(delimited_output_adapter.adapter(
+        data, headers, table_format=table_format))
+    blocks = list(delimited_output_adapter.adapter(
+        iter(data), headers, table_format=table_format,
+        block_size=block_size))
+
+    assert blocks[0] == lines[0]
+    assert len(blocks) == 1 + -(-len(data) // block_size)
+    assert '\n'.join(blocks) == '\n'.join(lines)
+
+    with pytest.raises(ValueError):
+        list(delimited_output_adapter.adapter(data, headers, block_size=0))
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Test the measurement of the formatting stages."""
+
+from __future__ import unicode_literals
+import time
+
+from cli_helpers.tabular_output import TabularOutputFormatter
+from cli_helpers.tabular_output.instrumentation import FormatStats, StageStats
+from cli_helpers.tabular_output.preprocessors import align_decimals
+
+data = [[1, 2.5, 'a'], [2, 10.25, None], [3, 0.125, 'c']]
+headers = ['n', 'f', 's']
+
+
+def test_stages_are_reported_in_order():
+    """Test that every stage is reported with its rows and cells."""
+    stats = FormatStats()
+    formatter = TabularOutputFormatter('psql', instrument=stats)
+    output = list(formatter.format_output(data, headers))
+
+    assert output == list(TabularOutputFormatter().format_output(
+        data, headers, 'psql'))
+    stages = [(s.stage, s.rows, s.cells) for s in stats.stages]
+    assert stages[0] == ('column_types', 3, 9)
+    assert stages[-1] == ('formatter', 3, 9)
+    assert stats.stages[-1].name == 'psql'
+    assert {s.stage for s in stats.stages[1:-1]} == {'preprocessor'}
+    assert 'truncate_string' in stats.stages[1].name
+    assert all(s.seconds >= 0 for s in stats.stages)
+
+
+def test_stage_time_excludes_other_stages():
+    """Test that a slow stage is not counted in the stages after it."""
+    def slow_rows():
+        for row in data:
+            time.sleep(0.01)
+            yield row
+
+    def slow(data, headers, **_):
+        time.sleep(0.05)
+        return data, headers
+
+    stats = FormatStats()
+    formatter = TabularOutputFormatter('csv', instrument=stats)
+    list(formatter.format_output(slow_rows(), headers, preprocessors=[slow],
+                                 column_types=[int, float, str]))
+
+    seconds = {s.name: s.seconds for s in stats.stages}
+    assert 'column_types' not in seconds
+    assert seconds['slow'] >= 0.05
+    assert seconds['csv'] < 0.05
+    assert [s.rows for s in stats.stages] == [3] * len(stats.stages)
+
+
+def test_lazy_stages_are_reported_when_closed():
+    """Test that the lazy stages are reported when the output is closed."""
+    stats = FormatStats()
+    formatter = TabularOutputFormatter('csv', instrument=stats)
+    output = formatter.format_output(iter(data), headers,
+                                     column_types=[int, float, str])
+    next(output)
+    assert stats.stages == []
+    output.close()
+    assert stats.stages[-1].stage == 'formatter'
+
+
+def test_columnar_stages():
+    """Test that the preprocessors applied to columns are measured."""
+    stats = FormatStats()
+    formatter = TabularOutputFormatter('simple', instrument=stats)
+    columns = {'n': [1, 2, 3], 'f': [2.5, 10.25, 0.125]}
+    list(formatter.format_output(columns, None,
+                                 preprocessors=[align_decimals]))
+
+    assert stats.stages[0] == StageStats(
+        'column_types', 'column_types', stats.stages[0].seconds, 3, 6)
+    assert stats.stages[1][::3] == ('preprocessor', 3)
+    assert stats.stages[1].name == 'align_decimals'
+    assert stats.stages[-1][::3] == ('formatter', 3)
+
+
+def test_totals():
+    """Test that the measurements are summed by stage."""
+    stats = FormatStats()
+    formatter = TabularOutputFormatter('csv', instrument=stats)
+    for _ in range(2):
+        list(formatter.format_output(data, headers))
+
+    totals = stats.totals()
+    assert len(totals) * 2 == len(stats.stages)
+    assert [(t.stage, t.rows, t.cells) for t in totals][-1] == (
+        'formatter', 6, 18)
+
+    stats.clear()
+    assert stats.totals() == []
+
+
+def test_disabled_by_default():
+    """Test that nothing is measured without an instrument."""
+    formatter = TabularOutputFormatter('csv')
+    assert formatter.instrument is None
+    assert list(formatter.format_output(data, headers)) == [
+        'n,f,s', '1,2.5,a', '2,10.25,', '3,0.125,c']
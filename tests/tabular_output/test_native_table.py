@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""Test that the native table renderer matches tabulate."""
+
+from __future__ import unicode_literals
+from decimal import Decimal
+import random
+
+import pytest
+
+from cli_helpers.tabular_output import (native_table, tabulate_adapter,
+                                        TabularOutputFormatter)
+
+tabulate = tabulate_adapter.get_tabulate()
+
+CELLS = ['', '0', '1', '-17', '+5', '007', '1_000', ' 12 ', '١٢٣', '²',
+         '2.5', '-0.125', '.5', '5.', '1e5', '1.5E-7', '1e400', '12345678.9',
+         '1,000', '1,000.25', '1,0000', 'nan', 'NaN', '-inf', 'Infinity',
+         'True', 'False', 'true', 'abc', ' padded ', 'a b', 'x1', '1x',
+         '观音', 'ﾃｽﾄ', 'Ελληνικά', 'e', '-', '.', '0x1F']
+
+
+
+def tabulate_lines(data, headers, format_name, **kwargs):
+    """Render a table with tabulate, the way the adapter calls it."""
+    tablefmt = tabulate_adapter.table_formats.get(format_name, format_name)
+    return tabulate.tabulate(data, headers, tablefmt=tablefmt,
+                             **kwargs).split('\n')
+
+
+def native_lines(data, headers, format_name, **kwargs):
+    table_format = tabulate_adapter.get_table_format(format_name)
+    return list(native_table.render(data, headers, table_format, **kwargs))
+
+
+def assert_conforms(data, headers, **kwargs):
+    for format_name in native_table.supported_formats:
+        expected = tabulate_lines(data, headers, format_name, **kwargs)
+        assert native_lines(data, headers, format_name, **kwargs) == \
+            expected, format_name
+
+
+@pytest.mark.parametrize('cells', [
+    ['1', '22', '333'],
+    ['1.5', '22', '-3.25'],
+    ['1,000', '2,000,000', '3'],
+    ['1,000.5', '2', ''],
+    ['1e5', '2.5e-3', '7'],
+    ['nan', '1.5', '-inf'],
+    ['True', 'False', ''],
+    ['True', '1', '2'],
+    ['True', '1.5', ''],
+    ['', '', ''],
+    [' 12 ', '3', '45'],
+    [' padded ', 'x', ''],
+    ['观音', 'ﾃｽﾄ', 'abc'],
+    ['1e400', '1', '2'],
+    ['١٢٣', '4', '5'],
+])
+def test_column_types(cells):
+    """Test the columns of each type tabulate detects."""
+    data = [[cell, 'text'] for cell in cells]
+    assert_conforms(data, ['column', 'h'])
+    assert_conforms(data, [])
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'floatfmt': '.2f'},
+    {'floatfmt': ',.3f'},
+    {'floatfmt': '.1%'},
+    {'floatfmt': 'e'},
+    {'numalign': 'right', 'stralign': 'right'},
+    {'numalign': 'center', 'stralign': 'center'},
+    {'numalign': 'left'},
+    {'stralign': 'decimal'},
+    {'disable_numparse': True},
+    {'preserve_whitespace': True},
+])
+def test_tabulate_arguments(kwargs):
+    """Test the tabulate arguments that are supported."""
+    data = [['1', '2.5', ' a '], ['-22', '1,000.125', 'bb'],
+            ['333', 'nan', ''], ['4', '', 'True']]
+    assert_conforms(data, ['int', 'float', 'text'], **kwargs)
+
+
+def test_headers():
+    """Test headers that are wider, narrower, or fewer than the columns."""
+    data = [['1', 'a', '2.5']]
+    assert_conforms(data, ['a very wide header', 'h', 'float'])
+    assert_conforms(data, ['only', 'two'])
+    assert_conforms(data, ['观音', ' x ', ''])
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_random_tables(seed):
+    """Test random tables made of tricky cells."""
+    rng = random.Random(seed)
+    num_columns = rng.randint(1, 5)
+    columns = [rng.sample(CELLS, rng.randint(1, 4)) for _ in range(num_columns)]
+    data = [[rng.choice(column) for column in columns]
+            for _ in range(rng.randint(1, 8))]
+    headers = ['h{}'.format(i) * rng.randint(0, 3)
+               for i in range(num_columns)]
+    assert_conforms(data, headers)
+
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('kwargs', [{}, {'floatfmt': '.2f'},
+                                    {'numalign': 'left'},
+                                    {'preserve_whitespace': True}])
+def test_format_rows(seed, kwargs):
+    """Test that rows formatted like a table match the table's rows."""
+    rng = random.Random(seed)
+    columns = [rng.sample(CELLS, rng.randint(1, 4)) for _ in range(3)]
+    data = [[rng.choice(column) for column in columns] for _ in range(6)]
+    psql = tabulate_adapter.get_table_format('psql')
+    layout = native_table.layout_table(data, ['a', 'b', 'c'], psql, **kwargs)
+    assert native_table.format_rows(
+        layout, data, kwargs.get('floatfmt', 'g'),
+        kwargs.get('preserve_whitespace', False)) == list(zip(*layout.columns))
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_table_measure(seed):
+    """Test that measuring a table in parts matches measuring it at once."""
+    rng = random.Random(seed)
+    columns = [rng.sample(CELLS, rng.randint(1, 5))
+               for _ in range(rng.randint(1, 4))]
+    data = [[rng.choice(column) for column in columns]
+            for _ in range(rng.randint(1, 12))]
+    headers = ['h' * rng.randint(0, 12) for _ in columns]
+    kwargs = rng.choice([{}, {'floatfmt': '.1%'}, {'stralign': 'decimal'},
+                         {'numalign': 'center'},
+                         {'preserve_whitespace': True}])
+    grid = tabulate_adapter.get_table_format('grid')
+
+    expected = native_table.layout_table(data, headers, grid, **kwargs)
+    measure = native_table.TableMeasure(headers, grid, **kwargs)
+    for i in range(0, len(data), 3):
+        measure.add(data[i:i + 3])
+    layout = measure.layout()
+    assert (layout.formats, layout.headers) == (expected.formats,
+                                                expected.headers)
+
+
+@pytest.mark.parametrize('data, headers', [
+    ([], ['a']),
+    ([['a\nb']], ['h']),
+    ([['\x1b[31mred\x1b[0m']], ['h']),
+    ([[1, 2]], ['a', 'b']),
+    ([['a'], ['b', 'c']], ['h']),
+    ([['a']], ['h', 'too many']),
+    ([['\001'], ['b']], ['h']),
+    ([['a\x07b']], ['h']),
+])
+def test_unsupported(data, headers):
+    """Test that unsupported tables are left to tabulate."""
+    psql = tabulate_adapter.get_table_format('psql')
+    with pytest.raises(native_table.Unsupported):
+        native_table.render(data, headers, psql)
+
+    # The adapter renders these with tabulate.
+    assert list(tabulate_adapter.adapter(data, headers, 'psql')) == \
+        tabulate_lines(data, headers, 'psql')
+
+
+def test_unsupported_arguments():
+    """Test that unsupported tabulate arguments are left to tabulate."""
+    psql = tabulate_adapter.get_table_format('psql')
+    with pytest.raises(native_table.Unsupported):
+        native_table.render([['1']], ['h'], psql, showindex='always')
+    with pytest.raises(native_table.Unsupported):
+        native_table.render([['1']], ['h'], psql, disable_numparse=[0])
+
+
+def test_adapter_uses_native_renderer(monkeypatch):
+    """Test that the adapter renders the supported formats natively."""
+    def fail(*args, **kwargs):
+        raise AssertionError('tabulate was called')
+    monkeypatch.setattr(tabulate, 'tabulate', fail)
+
+    data = [['1', 'a'], ['2.5', 'b']]
+    for format_name in native_table.supported_formats:
+        lines = tabulate_adapter.adapter(iter(data), ['x', 'y'],
+                                         table_format=format_name)
+        assert len(list(lines)) > 2
+
+
+def test_format_output_conforms(monkeypatch):
+    """Test that the formatter's output is the same with and without the
+    native renderer."""
+    data = [[1, None, Decimal('1.50'), b'\xff', '观音', True],
+            [-22, 2.25, None, b'bytes', ' text ', False],
+            [333, 1e10, Decimal('-0.125'), None, '', None]]
+    headers = ['int', 'float', 'decimal', 'bytes', 'text', 'bool']
+    formatter = TabularOutputFormatter()
+
+    native = [list(formatter.format_output(data, headers, format_name))
+              for format_name in native_table.supported_formats]
+
+    def unsupported(*args, **kwargs):
+        raise native_table.Unsupported()
+    monkeypatch.setattr(native_table, 'render', unsupported)
+    assert native == [list(formatter.format_output(data, headers, format_name))
+                      for format_name in native_table.supported_formats]
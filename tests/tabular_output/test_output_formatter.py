@@ -2,14 +2,17 @@
 """Test the generic output formatter interface."""
 
 from __future__ import unicode_literals
+import asyncio
 from decimal import Decimal
+import io
+import os
 from textwrap import dedent
 
 import pytest
 
 from cli_helpers.tabular_output import format_output, TabularOutputFormatter
-from cli_helpers.compat import binary_type, text_type
-from cli_helpers.utils import strip_ansi
+from cli_helpers.compat import binary_type, text_type, zip_longest, HAS_PYGMENTS
+from cli_helpers.utils import display_width, strip_ansi
 
 
 def test_tabular_output_formatter():
@@ -123,6 +126,31 @@ def test_tabulate_ansi_escape_in_default_value():
     assert list(unstyled) == stripped_styled
 
 
+@pytest.mark.skipif(not HAS_PYGMENTS, reason='requires the Pygments library')
+@pytest.mark.parametrize('format_name', ['csv', 'csv-tab', 'tsv', 'vertical'])
+def test_style_without_missing_value_token(format_name):
+    """Test that a style without the missing value's token can style data
+    without missing values."""
+    from pygments.style import Style
+    from pygments.token import Token
+
+    class RowStyle(Style):
+        default_style = ""
+        styles = {
+            Token.Output.Header: 'bold ansibrightred',
+            Token.Output.OddRow: 'bg:#eee #111',
+            Token.Output.EvenRow: '#0f0',
+        }
+
+    data = [[1, 'abc'], [2, 'def']]
+    headers = ['id', 'name']
+    styled = TabularOutputFormatter().format_output(
+        data, headers, format_name, style=RowStyle)
+    unstyled = TabularOutputFormatter().format_output(data, headers,
+                                                      format_name)
+    assert list(unstyled) == [strip_ansi(line) for line in styled]
+
+
 def test_get_type():
     """Test that _get_type returns the expected type."""
     formatter = TabularOutputFormatter()
@@ -171,3 +199,459 @@ def test_all_text_type():
     for format_name in output_formatter.supported_formats:
         for row in output_formatter.format_output(iter(data), headers, format_name=format_name):
             assert isinstance(row, text_type), "not unicode for {}".format(format_name)
+
+
+def test_type_sample_size_streams_data():
+    """Test that sampled type inference doesn't consume the whole iterator."""
+    consumed = []
+
+    def rows():
+        for i in range(1000):
+            consumed.append(i)
+            yield [i, 'row {}'.format(i)]
+
+    formatter = TabularOutputFormatter()
+    output = formatter.format_output(rows(), ['id', 'name'], format_name='csv',
+                                     type_sample_size=10)
+
+    assert next(output) == 'id,name'
+    assert next(output) == '0,row 0'
+    assert len(consumed) == 10
+    assert len(list(output)) == 999
+    assert len(consumed) == 1000
+
+
+def test_type_sample_size_column_types():
+    """Test that only the sampled rows are used to infer column types."""
+    data = [[1, 1], [2, 'b'], [3, 'c']]
+    headers = ('a', 'b')
+
+    def preprocessor(data, headers, column_types=(), **_):
+        assert [int, int] == column_types
+        return data, headers
+
+    output = format_output(iter(data), headers, 'tsv', type_sample_size=1,
+                           preprocessors=(preprocessor,))
+    assert ['a\tb', '1\t1', '2\tb', '3\tc'] == list(output)
+
+
+def test_provided_column_types_stream_data():
+    """Test that provided column types don't read the data into memory."""
+    def rows():
+        yield ['abc', 1]
+        raise AssertionError('read past the first row')
+
+    output = format_output(rows(), ['a', 'b'], 'vertical',
+                           column_types=(text_type, int))
+    assert next(output).endswith('a | abc\nb | 1')
+
+
+def test_get_column_types():
+    """Test that _get_column_types() finds the most generic column types."""
+    formatter = TabularOutputFormatter()
+    data = [
+        [None, 1, 1, b'a', 1.5, 'x', None],
+        [None, 2, 2.5, 'b', Decimal('1.1'), 1],
+        [None, None, None, None, None, None, b'z', 1],
+    ]
+
+    expected = [formatter._get_column_type(column) for column in zip_longest(*data)]
+    assert expected == formatter._get_column_types(data)
+    assert [type(None), int, float, text_type, float, text_type,
+            binary_type, int] == formatter._get_column_types(data)
+    assert [] == formatter._get_column_types([])
+
+
+def test_plan_cache_reuses_plans():
+    """Test that format_output() reuses the execution plan for a call."""
+    formatter = TabularOutputFormatter()
+    formatter.invalidate_plans()
+
+    list(formatter.format_output([[1]], ['a'], format_name='csv'))
+    plan = formatter._get_plan('csv', (), {})
+    list(formatter.format_output([[2]], ['a'], format_name='csv'))
+    assert plan is formatter._get_plan('csv', (), {})
+    assert plan is not formatter._get_plan('csv', (), {'missing_value': 'x'})
+
+    unhashable = {'missing_value': 'x', 'quotechar': ['"']}
+    assert formatter._get_plan('csv', (), unhashable) is not \
+        formatter._get_plan('csv', (), unhashable)
+
+
+def test_plan_cache_eviction(monkeypatch):
+    """Test that the least recently used plans are evicted."""
+    formatter = TabularOutputFormatter()
+    formatter.invalidate_plans()
+    monkeypatch.setattr(TabularOutputFormatter, 'plan_cache_size', 2)
+
+    first = formatter._get_plan('csv', (), {})
+    formatter._get_plan('tsv', (), {})
+    assert first is formatter._get_plan('csv', (), {})
+    formatter._get_plan('vertical', (), {})
+
+    assert 2 == len(formatter._plan_cache)
+    assert first is formatter._get_plan('csv', (), {})
+    assert ('tsv', (), frozenset()) not in formatter._plan_cache
+
+
+def test_register_new_formatter_invalidates_plans():
+    """Test that registering a format replaces its cached plans."""
+    def upper(data, headers, **_):
+        return ([v.upper() for v in row] for row in data), headers
+
+    def adapter(data, headers, **_):
+        return (','.join(row) for row in data)
+
+    formatter = TabularOutputFormatter()
+    try:
+        TabularOutputFormatter.register_new_formatter('test-plan', adapter)
+        assert ['a'] == list(formatter.format_output(
+            [['a']], ['h'], format_name='test-plan'))
+
+        TabularOutputFormatter.register_new_formatter(
+            'test-plan', adapter, (upper,))
+        assert ['A'] == list(formatter.format_output(
+            [['a']], ['h'], format_name='test-plan'))
+    finally:
+        del TabularOutputFormatter._output_formats['test-plan']
+        TabularOutputFormatter.invalidate_plans('test-plan')
+
+
+def test_format_output_kwargs_do_not_leak():
+    """Test that keyword arguments only apply to their own call."""
+    formatter = TabularOutputFormatter()
+    data = [[1, None]]
+    headers = ['a', 'b']
+
+    assert ['a,b', '1,N/A'] == list(formatter.format_output(
+        iter(data), headers, format_name='csv', missing_value='N/A'))
+    assert ['a,b', '1,'] == list(formatter.format_output(
+        iter(data), headers, format_name='csv'))
+    with pytest.raises(TypeError):
+        formatter._output_formats['csv'].formatter_args['missing_value'] = 'x'
+
+
+def test_format_output_concurrently():
+    """Test that formats and styles can be rendered from many threads."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    styles = [None]
+    if HAS_PYGMENTS:
+        from pygments.style import Style
+        from pygments.token import Token
+
+        class RedStyle(Style):
+            default_style = ""
+            styles = {
+                Token.Output.Header: 'bold ansibrightred',
+                Token.Output.OddRow: '#f00',
+                Token.Output.EvenRow: '#0f0',
+                Token.Output.TableSeparator: 'ansibrightred',
+                Token.Output.Null: '#888',
+            }
+
+        class BlueStyle(Style):
+            default_style = ""
+            styles = {
+                Token.Output.Header: 'bold ansiblue',
+                Token.Output.OddRow: '#00f',
+                Token.Output.EvenRow: '#0ff',
+                Token.Output.TableSeparator: 'ansiblue',
+                Token.Output.Null: '#888',
+            }
+        styles.extend([RedStyle, BlueStyle])
+
+    data = [[i, 'row\n{}'.format(i), None, Decimal(i) / 3] for i in range(20)]
+    headers = ['id', 'text', 'missing', 'number']
+    formatter = TabularOutputFormatter()
+    jobs = [(format_name, style, missing_value)
+            for format_name in formatter.supported_formats
+            for style in styles
+            for missing_value in ('<null>', 'N/A')]
+
+    def render(job):
+        format_name, style, missing_value = job
+        return '\n'.join(formatter.format_output(
+            iter(data), headers, format_name=format_name, style=style,
+            missing_value=missing_value, preserve_whitespace=style is None))
+
+    expected = [render(job) for job in jobs]
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        for _ in range(2):
+            assert expected == list(executor.map(render, jobs))
+
+
+@pytest.mark.parametrize('use_threads', [True, False])
+def test_format_output_parallel(use_threads):
+    """Test that parallel rendering yields the same lines in order."""
+    data = [[i, 'row\t{}'.format(i), None, b'\xff'] for i in range(1000)]
+    headers = ['id', 'text', 'missing', 'bytes']
+    formatter = TabularOutputFormatter()
+
+    for format_name in ('csv', 'csv-tab', 'tsv'):
+        expected = list(formatter.format_output(
+            iter(data), headers, format_name=format_name, missing_value='-'))
+        assert expected == list(formatter.format_output(
+            iter(data), headers, format_name=format_name, missing_value='-',
+            workers=3, chunk_size=64, use_threads=use_threads))
+
+
+def test_format_output_parallel_unsupported_format():
+    """Test that only row-independent formats can be rendered in parallel."""
+    with pytest.raises(ValueError):
+        format_output([[1]], ['a'], 'psql', workers=2)
+
+
+def test_preview_cannot_be_rendered_in_parallel():
+    """Test that a preview with workers is an error."""
+    with pytest.raises(ValueError):
+        format_output([[1]], ['a'], 'csv', preview=1, workers=2)
+
+
+@pytest.mark.parametrize('format_name, kwargs', [
+    ('csv', {'workers': 2, 'chunk_size': 2, 'use_threads': True}),
+    ('psql', {'preview': 1}),
+    ('vertical', {'preview': (1, 2)}),
+])
+def test_modes_of_columnar_data(format_name, kwargs):
+    """Test that columnar data is rendered like rows in each mode."""
+    columns = {'n': [1, 2, 3, 4, 5], 's': ['a', None, 'c', 'd', 'e']}
+    rows = [list(row) for row in zip(*columns.values())]
+    formatter = TabularOutputFormatter(format_name)
+    assert list(formatter.format_output(rows, list(columns), **kwargs)) == \
+        list(formatter.format_output(columns, None, **kwargs))
+
+
+def test_width_sample_size_takes_precedence_over_memory_budget(recwarn):
+    """Test that a table streamed with sampled widths isn't spilled."""
+    rows = [[1, 'a'], [2, 'b'], [3, 'a much wider cell']]
+    formatter = TabularOutputFormatter('psql')
+    streamed = list(formatter.format_output(rows, ['n', 's'],
+                                            width_sample_size=2))
+    assert streamed != list(formatter.format_output(rows, ['n', 's']))
+    assert streamed == list(formatter.format_output(
+        rows, ['n', 's'], width_sample_size=2, memory_budget=1))
+    assert not recwarn.list
+
+
+async def async_rows(data, consumed=None):
+    """Yield the rows in *data* asynchronously."""
+    for row in data:
+        await asyncio.sleep(0)
+        if consumed is not None:
+            consumed.append(row)
+        yield row
+
+
+def run_async(coroutine):
+    """Run *coroutine* in a new event loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_format_output_async():
+    """Test that format_output_async() matches format_output()."""
+    data = [[i, 'row {}'.format(i), None, Decimal(i) / 4] for i in range(50)]
+    headers = ['id', 'text', 'missing', 'number']
+    formatter = TabularOutputFormatter()
+
+    async def collect(format_name):
+        return [line async for line in formatter.format_output_async(
+            async_rows(data), headers, format_name=format_name,
+            batch_size=7)]
+
+    for format_name in ('csv', 'tsv', 'vertical', 'psql', 'html'):
+        expected = list(formatter.format_output(
+            iter(data), headers, format_name=format_name))
+        assert expected == run_async(collect(format_name)), format_name
+
+
+def test_format_output_async_backpressure():
+    """Test that format_output_async() reads rows as lines are consumed."""
+    data = [[i] for i in range(1000)]
+    consumed = []
+    formatter = TabularOutputFormatter()
+
+    async def first_lines():
+        output = formatter.format_output_async(
+            async_rows(data, consumed), ['id'], format_name='csv',
+            batch_size=10, max_pending=2)
+        lines = []
+        async for line in output:
+            lines.append(line)
+            if len(lines) == 5:
+                break
+        await output.aclose()
+        return lines
+
+    assert ['id', '0', '1', '2', '3'] == run_async(first_lines())
+    assert len(consumed) < 100
+
+
+def test_format_output_async_error():
+    """Test that errors while rendering are raised to the consumer."""
+    def fail(data, headers, **_):
+        raise ZeroDivisionError()
+
+    async def collect():
+        return [line async for line in TabularOutputFormatter().format_output_async(
+            async_rows([[1]]), ['a'], format_name='csv', preprocessors=(fail,))]
+
+    with pytest.raises(ZeroDivisionError):
+        run_async(collect())
+
+
+def test_write_output_text_file():
+    """Test that write_output() writes the lines in buffered blocks."""
+    data = [[i, 'row {}'.format(i)] for i in range(100)]
+    headers = ['id', 'text']
+    formatter = TabularOutputFormatter(format_name='csv')
+    expected = ''.join(line + '\n' for line in formatter.format_output(
+        iter(data), headers))
+
+    writes = []
+
+    class File(io.StringIO):
+        def write(self, s):
+            writes.append(s)
+            return super(File, self).write(s)
+
+    f = File()
+    assert 101 == formatter.write_output(iter(data), headers, f,
+                                         buffer_size=100)
+    assert expected == f.getvalue()
+    assert 1 < len(writes) < 101
+
+
+def test_write_output_bytes():
+    """Test that write_output() encodes output for binary files."""
+    data = [['观音', 1]]
+    headers = ['name', 'id']
+    expected = 'name\tid\n观音\t1\n'
+
+    f = io.BytesIO()
+    write_output = TabularOutputFormatter().write_output
+    write_output(iter(data), headers, f, format_name='tsv')
+    assert expected.encode('utf-8') == f.getvalue()
+
+    buffer = io.BytesIO()
+    stdout = io.TextIOWrapper(buffer, encoding='utf-16-le')
+    stdout.write('>')
+    write_output(iter(data), headers, stdout, format_name='tsv',
+                       binary=True)
+    assert ('>' + expected).encode('utf-16-le') == buffer.getvalue()
+
+    read_fd, write_fd = os.pipe()
+    try:
+        write_output(iter(data), headers, write_fd, format_name='tsv')
+        assert expected.encode('utf-8') == os.read(read_fd, 1024)
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+def test_preview():
+    """Test that a preview shows the first and last rows."""
+    processed = []
+
+    def record(data, headers, **_):
+        data = list(data)
+        processed.extend(row[0] for row in data)
+        return data, headers
+
+    data = ([i, 'row number {}'.format(i)] for i in range(1, 1001))
+    output = TabularOutputFormatter('psql').format_output(
+        data, ['id', 'name'], preview=(2, 1), preprocessors=[record])
+    expected = dedent("""\
+        +------+-----------------+
+        |   id | name            |
+        |------+-----------------|
+        |    1 | row number 1    |
+        |    2 | row number 2    |
+        |  … 997 rows omitted …  |
+        | 1000 | row number 1000 |
+        +------+-----------------+""")
+    assert expected == '\n'.join(output)
+    assert processed == [1, 2, 1000]
+
+
+@pytest.mark.parametrize('format_name, expected', [
+    ('csv', ['number', '0', '1', '2 of 5', '4']),
+    ('grid', ['+--------+', '| number |', '+========+', '|      0 |',
+              '+--------+', '|      1 |', '+--------+', '| 2 of 5 |',
+              '+--------+', '|      4 |', '+--------+']),
+    ('rst', ['======', 'number', '======', '     0', '     1', '2 of 5',
+             '     4', '======']),
+    ('html', ['<table>', '<thead>', '<tr><th>number</th></tr>', '</thead>',
+              '<tbody>', '<tr><td>0</td></tr>', '<tr><td>1</td></tr>',
+              '<tr><td>2 of 5</td></tr>', '<tr><td>4</td></tr>',
+              '</tbody>', '</table>']),
+    ('latex', ['\\begin{tabular}{l}', '\\hline', ' number \\\\', '\\hline',
+               ' 0 \\\\', ' 1 \\\\', ' 2 of 5 \\\\', ' 4 \\\\', '\\hline',
+               '\\end{tabular}']),
+])
+def test_preview_formats(format_name, expected):
+    """Test the marker line of each kind of format."""
+    assert expected == list(TabularOutputFormatter(format_name).format_output(
+        [[i] for i in range(5)], ['number'], preview=(2, 1),
+        preview_marker='{omitted} of {total}'))
+
+
+@pytest.mark.parametrize('format_name', ['psql', 'grid', 'fancy_grid',
+                                         'pipe', 'double'])
+@pytest.mark.parametrize('style', [None, {'Token.Output.TableSeparator':
+                                          'ansibrightred'}])
+def test_preview_marker_is_fitted_in_the_table(format_name, style):
+    """Test that a marker wider than the table is truncated to fit between
+    its borders."""
+    output = list(TabularOutputFormatter(format_name).format_output(
+        [[i] for i in range(5)], ['n'], preview=1, style=style))
+    widths = [display_width(line) for line in output]
+    assert len(set(widths)) == 1, output
+    assert any(strip_ansi(line)[1:-1].strip() == '…' for line in output)
+
+
+def test_preview_vertical():
+    """Test that the last records of a vertical preview keep their
+    numbers."""
+    output = TabularOutputFormatter('vertical').format_output(
+        [[i] for i in range(1, 11)], ['n'], preview=2,
+        sep_title='{n}', sep_length=1)
+    assert ['*[ 1 ]*\nn | 1', '*[ 2 ]*\nn | 2', '… 6 rows omitted …',
+            '*[ 9 ]*\nn | 9', '*[ 10 ]*\nn | 10'] == list(output)
+
+
+def test_preview_tabulate_format():
+    """Test that the marker line of a format rendered by tabulate doesn't
+    change the columns."""
+    output = TabularOutputFormatter('fancy_grid').format_output(
+        [[i, 'x' * i] for i in range(1, 11)], ['n', 's'], preview=2,
+        preview_marker='{omitted} omitted')
+    expected = dedent("""\
+        ╒════╤════════════╕
+        │  n │ s          │
+        ╞════╪════════════╡
+        │  1 │ x          │
+        ├────┼────────────┤
+        │  2 │ xx         │
+        ├────┼────────────┤
+        │    6 omitted    │
+        ├────┼────────────┤
+        │  9 │ xxxxxxxxx  │
+        ├────┼────────────┤
+        │ 10 │ xxxxxxxxxx │
+        ╘════╧════════════╛""")
+    assert expected == '\n'.join(output)
+
+
+@pytest.mark.parametrize('preview', [3, (0, 5), (5, 0), (1, 2)])
+def test_preview_of_short_results(preview):
+    """Test that a preview of every row shows every row."""
+    data = [[1, 'a'], [2, 'b'], [3, 'c']]
+    formatter = TabularOutputFormatter('psql')
+    assert list(formatter.format_output(iter(data), ['n', 's'],
+                                        preview=preview)) == \
+        list(formatter.format_output(data, ['n', 's']))
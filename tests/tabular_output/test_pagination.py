@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Test the rendering of tables one page at a time."""
+
+from __future__ import unicode_literals
+from decimal import Decimal
+
+import pytest
+
+from cli_helpers.tabular_output import native_table, TabularOutputFormatter
+from cli_helpers.tabular_output.pagination import Pages
+
+data = [[i, i * 1.5, 'text {}'.format('x' * (i % 4)), Decimal(i) / 8]
+        for i in range(-5, 20)]
+headers = ['int', 'float', 'text', 'decimal']
+
+
+@pytest.mark.parametrize('format_name', native_table.supported_formats)
+def test_pages_match_the_full_table(format_name):
+    """Test that the pages are slices of the table rendered in full."""
+    formatter = TabularOutputFormatter(format_name)
+    full = list(formatter.format_output(data, headers))
+    pages = formatter.paginate(iter(data), headers, page_size=10)
+
+    assert len(pages) == 3
+    assert pages.num_rows == len(data)
+    assert pages.render(0) == full
+    lines = []
+    for page in pages:
+        assert page[:len(pages.header_lines)] == pages.header_lines
+        assert page[len(page) - len(pages.footer_lines):] == \
+            pages.footer_lines
+        lines.extend(page[len(pages.header_lines):
+                          len(page) - len(pages.footer_lines)])
+    assert set(lines) <= set(full)
+
+
+def test_sample_widths():
+    """Test that the column widths can be computed from a sample."""
+    formatter = TabularOutputFormatter('psql')
+    pages = formatter.paginate(data, headers, page_size=10, sample_size=10)
+
+    assert pages[0] == list(formatter.format_output(data[:10], headers))
+    last = pages[-1]
+    assert last[:3] == pages[0][:3]
+    assert len(last) == 3 + 5 + 1
+    assert all(len(line) >= len(last[0]) for line in last)
+
+
+def test_pages_of_delimited_formats():
+    """Test that each page of a delimited format has the header line."""
+    formatter = TabularOutputFormatter('csv')
+    pages = formatter.paginate([[1, 'a'], [2, 'b'], [3, None]], ['n', 's'],
+                               page_size=2)
+    assert list(pages) == [['n,s', '1,a', '2,b'], ['n,s', '3,']]
+
+
+@pytest.mark.parametrize('format_name, kwargs', [
+    ('psql', {'preprocessors': [lambda data, headers, **_: (
+        ([d + '\n' for d in row] for row in data), headers)],
+        'column_types': [str]}),
+    ('vertical', {}),
+])
+def test_pages_of_lines(format_name, kwargs):
+    """Test that other tables are paged by lines."""
+    rows = [['a'], ['b'], ['c']]
+    formatter = TabularOutputFormatter(format_name)
+    full = list(formatter.format_output(rows, ['h'], **kwargs))
+    pages = formatter.paginate(rows, ['h'], page_size=3, **kwargs)
+    assert pages.header_lines == []
+    assert sum(map(list, pages), []) == full
+    assert len(pages) == -(-len(full) // 3)
+
+
+def test_page_ranges():
+    """Test that pages are indexed like sequences and ranges are joined."""
+    pages = Pages(list(range(7)), 3, lambda rows: map(str, rows), ['h'],
+                  ['f'])
+    assert len(pages) == 3
+    assert pages[-1] == pages[2] == ['h', '6', 'f']
+    assert pages.render(1, 3) == ['h', '3', '4', '5', '6', 'f']
+    with pytest.raises(IndexError):
+        pages[3]
+    with pytest.raises(ValueError):
+        Pages([], 0, list)
+    assert list(Pages([], 3, list, ['h'])) == [['h']]
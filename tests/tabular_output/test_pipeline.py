@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""Test the compiled preprocessor pipeline."""
+
+from __future__ import unicode_literals
+from decimal import Decimal
+import linecache
+
+import pytest
+
+from cli_helpers.compat import HAS_PYGMENTS
+from cli_helpers.tabular_output import TabularOutputFormatter
+from cli_helpers.tabular_output.columnar import DictionaryColumn
+from cli_helpers.tabular_output.pipeline import (
+    CELL_TRANSFORMS, FusedPreprocessor, Pipeline, _compile_cell_function,
+    _compile_row_function)
+from cli_helpers.tabular_output.preprocessors import (
+    align_decimals, convert_to_string, override_missing_value, style_output)
+
+if HAS_PYGMENTS:
+    from pygments.style import Style
+    from pygments.token import Token
+
+    class CliStyle(Style):
+        default_style = ""
+        styles = {
+            Token.Output.Header: 'bold ansibrightred',
+            Token.Output.OddRow: 'bg:#eee #111',
+            Token.Output.EvenRow: '#0f0',
+            Token.Output.Null: '#f00',
+        }
+
+    class RowStyle(Style):
+        default_style = ""
+        styles = {
+            Token.Output.Header: 'bold ansibrightred',
+            Token.Output.OddRow: 'bg:#eee #111',
+            Token.Output.EvenRow: '#0f0',
+        }
+else:
+    CliStyle = RowStyle = None
+
+
+def unfused(preprocessors, data, headers, column_types, **kwargs):
+    """Call each preprocessor in turn."""
+    for f in preprocessors:
+        data, headers = f(data, headers, column_types=column_types, **kwargs)
+    return list(data), headers
+
+
+@pytest.mark.parametrize('style', [None, CliStyle])
+def test_pipeline_matches_unfused_preprocessors(style):
+    """Test that the fused pipeline gives the same output for every format."""
+    data = [[1, None, 'abc\ndef', b'\xff'], [Decimal('1.5'), 'x' * 600,
+                                                 None, b'bytes']]
+    headers = ['id', 'long\nheader', None, 'bin']
+    column_types = (float, str, str, bytes)
+
+    for handler in TabularOutputFormatter._output_formats.values():
+        preprocessors = [f for f in handler.preprocessors
+                         if f in CELL_TRANSFORMS]
+        kwargs = dict(handler.formatter_args, style=style)
+        pipeline = Pipeline(preprocessors, kwargs)
+        fused_data, fused_headers = pipeline(iter(data), headers,
+                                             column_types=column_types)
+
+        expected = unfused(preprocessors, iter(data), headers,
+                           column_types, **kwargs)
+        assert expected == (list(fused_data), fused_headers), handler.format_name
+
+
+def test_pipeline_fuses_consecutive_cell_preprocessors():
+    """Test that only consecutive per-cell preprocessors are fused."""
+    pipeline = Pipeline((override_missing_value, convert_to_string,
+                         align_decimals, convert_to_string), {})
+
+    assert 3 == len(pipeline.stages)
+    assert isinstance(pipeline.stages[0], FusedPreprocessor)
+    assert 'fused(override_missing_value, convert_to_string)' == \
+        pipeline.stages[0].__name__
+    assert align_decimals is pipeline.stages[1]
+    assert convert_to_string is pipeline.stages[2]
+
+    data, headers = pipeline([[Decimal('1.5'), None], [10, 'a']], ['a', 'b'],
+                             column_types=(float, str))
+    assert [['1.5', ''], ['10', 'a']] == list(data)
+
+
+@pytest.mark.parametrize('style', [None, CliStyle])
+@pytest.mark.parametrize('preprocessor', list(CELL_TRANSFORMS),
+                         ids=lambda f: f.__name__)
+def test_cell_transform(preprocessor, style):
+    """Test that each cell transform, compiled on its own into a row and a
+    cell function, matches its preprocessor."""
+    data = [['abc', None, b'\xff', b'ab', 1, 'a\r\nb', 'x' * 30, ''],
+            ['def', 2.5, None, 'y' * 30, 'c\nd', True, '', b'cd']]
+    kwargs = {'style': style, 'max_field_width': 10,
+              'missing_value': '<null>'}
+    if preprocessor is style_output:
+        # The rows are styled after they are converted to strings.
+        data, _ = unfused([override_missing_value, convert_to_string],
+                          iter(data), [], None)
+    transform = CELL_TRANSFORMS[preprocessor](**kwargs)
+    expected, _ = unfused([preprocessor], iter(data), [], None, **kwargs)
+    if transform is None:
+        assert expected == data
+        return
+
+    process_row = _compile_row_function([transform], 'test')
+    process_cell = _compile_cell_function([transform], 'test')
+    odd_row_token, even_row_token = transform.row_tokens or (None, None)
+    for row, row_token, expected_row in zip(
+            data, (odd_row_token, even_row_token), expected):
+        assert expected_row == process_row(row, row_token)
+        assert expected_row == [process_cell(v, row_token) for v in row]
+
+
+def test_compiled_source_is_in_linecache():
+    """Test that the source of a compiled function can be shown in
+    tracebacks."""
+    fused = FusedPreprocessor((override_missing_value, convert_to_string), {})
+    filename = fused.process_row.__code__.co_filename
+    assert 'fused(override_missing_value, convert_to_string)' in filename
+    assert linecache.getline(filename, 1).startswith('def process_row(')
+    assert 'v = missing_value' in ''.join(linecache.getlines(filename))
+
+
+@pytest.mark.parametrize('style', [None, CliStyle])
+def test_conversion_memo(style):
+    """Test that memoized conversions give the same output, and that
+    repeated values are converted once per column."""
+    data = [[b'ab', 1, True, None, 1.0, Decimal('1.0')],
+            [b'cd', True, 1, None, -0.0, Decimal('1.00')],
+            [b'ab', 1, True, None, 0.0, Decimal('1.0')]] * 3
+    headers = ['bin', 'int', 'bool', 'null', 'float', 'decimal']
+    column_types = (bytes, int, int, str, float, float)
+
+    for handler in TabularOutputFormatter._output_formats.values():
+        preprocessors = [f for f in handler.preprocessors
+                         if f in CELL_TRANSFORMS]
+        kwargs = dict(handler.formatter_args, style=style)
+        pipeline = Pipeline(preprocessors, kwargs)
+        expected = list(pipeline(iter(data), headers,
+                                 column_types=column_types)[0])
+        for memo_size in (1, 2, 100):
+            memoized = Pipeline(preprocessors, dict(
+                kwargs, conversion_memo_size=memo_size))
+            assert expected == list(memoized(
+                iter(data), headers, column_types=column_types)[0]), \
+                handler.format_name
+
+    pipeline = Pipeline((override_missing_value, convert_to_string),
+                        {'conversion_memo_size': 10})
+    data, _ = pipeline([[b'ab'], [b'ab']], ['bin'])
+    first, second = data
+    assert first[0] == 'ab' and first[0] is second[0]
+
+
+@pytest.mark.skipif(not HAS_PYGMENTS, reason='requires the Pygments library')
+def test_style_without_missing_value_token():
+    """Test that a style without the missing value's token can style data
+    without missing values."""
+    pipeline = Pipeline((override_missing_value, convert_to_string),
+                        {'style': RowStyle})
+    data, headers = pipeline([[1, 'a'], [2, 'b']], ['h1', 'h2'])
+    assert [['1', 'a'], ['2', 'b']] == list(data)
+
+    data, headers = pipeline.run_columns(
+        [[1, 2], DictionaryColumn([1, 0], ['a', 'b'])], ['h1', 'h2'])
+    assert [['1', 'b'], ['2', 'a']] == list(data)
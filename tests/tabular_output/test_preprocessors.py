@@ -63,6 +63,21 @@ def test_override_missing_value_with_style():
     assert (expected_data, expected_headers) == (list(results[0]), results[1])
 
 
+@pytest.mark.skipif(not HAS_PYGMENTS, reason='requires the Pygments library')
+def test_override_missing_value_without_null_style():
+    """Test that a style without the missing value's token doesn't break
+    *override_missing_value()* for data without missing values."""
+
+    class RowStyle(Style):
+        styles = {
+            Token.Output.OddRow: 'bg:#eee #111',
+        }
+
+    data, headers = override_missing_value([['abc', '2']], ['h1', 'h2'],
+                                           style=RowStyle)
+    assert [['abc', '2']] == list(data)
+
+
 def test_override_tab_value():
     """Test the override_tab_value() function."""
     data = [[1, '\tJohn'], [2, 'Jill']]
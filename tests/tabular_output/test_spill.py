@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Test rendering tables that don't fit in a memory budget."""
+
+from __future__ import unicode_literals
+
+import pytest
+
+from cli_helpers.tabular_output import (native_table, spill, tabulate_adapter,
+                                        TabularOutputFormatter)
+
+data = [[i, i / 3.0, 'name {}'.format(i * 7), None if i % 5 else '观音']
+        for i in range(-20, 100)]
+headers = ['int', 'float', 'text', 'wide']
+
+
+def test_row_spool():
+    """Test that rows over the budget are written to a file in chunks."""
+    spool = spill.RowSpool(memory_budget=150)
+    rows = [['abc', 'd'] * 2 for _ in range(10)]
+    chunks = list(spool.fill(iter(rows)))
+
+    assert spool.spilled
+    assert [len(chunk) for chunk in chunks] == [1] * 10
+    assert list(spool) == rows
+    assert list(spool) == rows
+    spool.close()
+    assert not spool.spilled and list(spool) == []
+
+
+@pytest.mark.parametrize('format_name', native_table.supported_formats)
+def test_spilled_output_matches(format_name):
+    """Test that spilled tables are rendered like tables in memory."""
+    formatter = TabularOutputFormatter(format_name)
+    assert list(formatter.format_output(iter(data), headers,
+                                        memory_budget=2000)) == \
+        list(formatter.format_output(data, headers))
+
+
+def test_render_spilled_rows():
+    """Test that the rows are spilled and the file is closed at the end."""
+    rows = [['1', 'a'], ['-2.5', 'bb'], ['3', '']] * 10
+    psql = tabulate_adapter.get_table_format('psql')
+    spool = spill.RowSpool(memory_budget=200)
+    lines = spill.render(spool, iter(rows), ['n', 's'], psql)
+
+    assert spool.spilled
+    assert list(lines) == list(native_table.render(rows, ['n', 's'], psql))
+    assert not spool.spilled
+
+
+def test_rows_that_fit_are_not_spilled():
+    """Test that the budget doesn't change the output of small tables."""
+    formatter = TabularOutputFormatter('psql')
+    spool = spill.RowSpool(10 ** 6)
+    psql = tabulate_adapter.get_table_format('psql')
+    assert spill.render(spool, [['a']], ['h'], psql) is None
+    assert list(spool) == [['a']] and not spool.spilled
+    assert list(formatter.format_output(data, headers, memory_budget=10 ** 6)
+                ) == list(formatter.format_output(data, headers))
+
+
+def test_unsupported_tables_are_rendered_by_tabulate():
+    """Test that spilled tables that can't be rendered natively are read back
+    and rendered by tabulate."""
+    rows = [['a'], ['b\nc'], ['d']]
+    formatter = TabularOutputFormatter('psql')
+    with pytest.warns(RuntimeWarning, match='memory_budget'):
+        output = list(formatter.format_output(rows, ['h'], memory_budget=1))
+    assert output == list(formatter.format_output(rows, ['h']))
+
+
+def test_unsupported_tables_that_fit_are_rendered_without_warning(recwarn):
+    """Test that tables within the budget are rendered by tabulate without
+    a warning."""
+    rows = [['a'], ['b\nc'], ['d']]
+    formatter = TabularOutputFormatter('psql')
+    assert list(formatter.format_output(rows, ['h'], memory_budget=10 ** 6)
+                ) == list(formatter.format_output(rows, ['h']))
+    assert not [w for w in recwarn if w.category is RuntimeWarning]
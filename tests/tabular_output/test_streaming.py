@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""Test streaming aligned tables with the column widths of a sample."""
+
+from __future__ import unicode_literals
+from textwrap import dedent
+
+import pytest
+
+from cli_helpers.tabular_output import native_table, TabularOutputFormatter
+
+data = [[333, 'widest', None], [1, 'a', 10.5], [22, '观音', 2.25],
+        [4, '', 0.125]]
+headers = ['n', 'text', 'float']
+
+
+@pytest.mark.parametrize('format_name', native_table.supported_formats)
+def test_rows_that_fit(format_name):
+    """Test that rows that fit the sample's widths are rendered as usual."""
+    formatter = TabularOutputFormatter(format_name)
+    expected = list(formatter.format_output(data, headers))
+    for width_sample_size in (1, 4, 10):
+        assert list(formatter.format_output(
+            iter(data), headers, width_sample_size=width_sample_size)) == \
+            expected
+
+
+def test_first_lines_are_output_before_the_rows_are_read():
+    """Test that only the sample is read before the first lines."""
+    read = []
+
+    def rows():
+        for i in range(1000):
+            read.append(i)
+            yield [i, 'row']
+
+    formatter = TabularOutputFormatter('psql')
+    output = formatter.format_output(rows(), ['n', 's'], width_sample_size=5)
+    assert next(output) == '+---+-----+'
+    assert len(read) == 5
+    assert len(list(output)) == 1000 + 3
+
+
+def render(rows, overflow, format_name='psql'):
+    formatter = TabularOutputFormatter(format_name)
+    return '\n'.join(formatter.format_output(
+        iter(rows), ['n', 'text'], width_sample_size=2, overflow=overflow))
+
+
+rows = [[1, 'short'], [2, 'mid'], [333, 'a longer cell'], [4, '观音观音']]
+
+
+def test_truncate():
+    """Test that wider cells are truncated."""
+    assert render(rows, 'truncate') == dedent("""\
+        +---+-------+
+        | n | text  |
+        |---+-------|
+        | 1 | short |
+        | 2 | mid   |
+        | . | a ... |
+        | 4 | 观... |
+        +---+-------+""")
+
+
+def test_wrap():
+    """Test that wider cells are wrapped."""
+    assert render(rows, 'wrap', 'grid') == dedent("""\
+        +---+-------+
+        | n | text  |
+        +===+=======+
+        | 1 | short |
+        +---+-------+
+        | 2 | mid   |
+        +---+-------+
+        | 3 | a lon |
+        | 3 | ger c |
+        | 3 | ell   |
+        +---+-------+
+        | 4 | 观音  |
+        |   | 观音  |
+        +---+-------+""")
+
+
+def test_widen():
+    """Test that columns are widened, and the header is output again."""
+    assert render(rows, 'widen') == dedent("""\
+        +---+-------+
+        | n | text  |
+        |---+-------|
+        | 1 | short |
+        | 2 | mid   |
+        +---+-------+
+        +-----+---------------+
+        |   n | text          |
+        |-----+---------------|
+        | 333 | a longer cell |
+        |   4 | 观音观音      |
+        +-----+---------------+""")
+
+
+def test_newlines_are_split():
+    """Test that cells after the sample can have several lines."""
+    assert render([[1, 'a'], [2, 'b'], [3, 'c\nd']], 'truncate') == dedent("""\
+        +---+------+
+        | n | text |
+        |---+------|
+        | 1 | a    |
+        | 2 | b    |
+        | 3 | c    |
+        |   | d    |
+        +---+------+""")
+
+
+def test_unsupported_sample():
+    """Test that a sample that can't be rendered natively is left to
+    tabulate, with every row."""
+    multiline = [[1, 'a\nb'], [2, 'b'], [3, 'a longer cell']]
+    formatter = TabularOutputFormatter('psql')
+    assert list(formatter.format_output(
+        iter(multiline), ['n', 'text'], width_sample_size=2)) == \
+        list(formatter.format_output(multiline, ['n', 'text']))
+
+
+def test_errors():
+    """Test the overflow policy and the length of the rows."""
+    formatter = TabularOutputFormatter('psql')
+    with pytest.raises(ValueError):
+        list(formatter.format_output(rows, ['n', 'text'],
+                                     width_sample_size=2, overflow='hide'))
+    with pytest.raises(ValueError):
+        list(formatter.format_output([[1, 'a'], [2]], ['n', 'text'],
+                                     width_sample_size=1,
+                                     column_types=[int, str]))
@@ -8,6 +8,8 @@ import pytest
 
 from cli_helpers.compat import HAS_PYGMENTS
 from cli_helpers.tabular_output import tabulate_adapter
+from cli_helpers.utils import strip_ansi
+import tabulate
 
 if HAS_PYGMENTS:
     from pygments.style import Style
@@ -67,10 +69,8 @@ def test_style_output_table():
         }
     headers = ['h1', 'h2']
     data = [['观音', '2'], ['Ποσειδῶν', 'b']]
-    style_output_table = tabulate_adapter.style_output_table('psql')
-
-    style_output_table(data, headers, style=CliStyle)
-    output = tabulate_adapter.adapter(iter(data), headers, table_format='psql')
+    output = tabulate_adapter.adapter(iter(data), headers, table_format='psql',
+                                      style=CliStyle)
     PLUS = '\x1b[91m+\x1b[39m'
     MINUS = '\x1b[91m-\x1b[39m'
     PIPE = '\x1b[91m|\x1b[39m'
@@ -85,3 +85,121 @@ def test_style_output_table():
     ).replace('+', PLUS).replace('-', MINUS).replace('|', PIPE)
 
     assert "\n".join(output) == expected
+
+
+@pytest.mark.skipif(not HAS_PYGMENTS, reason='requires the Pygments library')
+def test_style_output_table_is_not_global():
+    """Test that styling a table doesn't change tabulate's table formats."""
+
+    class CliStyle(Style):
+        default_style = ""
+        styles = {
+            Token.Output.TableSeparator: 'ansibrightred',
+        }
+    headers = ['h1', 'h2']
+    data = [['a\nb', '2']]
+    psql = tabulate._table_formats['psql']
+
+    unstyled = list(tabulate_adapter.adapter(iter(data), headers,
+                                             table_format='psql'))
+    for _ in range(3):
+        styled = list(tabulate_adapter.adapter(iter(data), headers,
+                                               table_format='psql',
+                                               style=CliStyle))
+    style_output_table = tabulate_adapter.style_output_table('psql')
+    style_output_table(data, headers, style=CliStyle)
+
+    assert psql is tabulate._table_formats['psql']
+    assert 6 == len(styled)
+    assert '\x1b[91m|\x1b[39m a  ' in styled[3]
+    assert [strip_ansi(line) for line in styled] == unstyled
+    assert unstyled == list(tabulate_adapter.adapter(iter(data), headers,
+                                                     table_format='psql'))
+
+
+@pytest.mark.skipif(not HAS_PYGMENTS, reason='requires the Pygments library')
+def test_styled_table_formats_are_cached():
+    """Test that a table format is styled once per style."""
+
+    class CliStyle(Style):
+        default_style = ""
+        styles = {
+            Token.Output.TableSeparator: 'ansibrightred',
+        }
+    num_formats = None
+    for _ in range(3):
+        for format_name in ('psql', 'double'):
+            list(tabulate_adapter.adapter([['a']], ['h'],
+                                          table_format=format_name,
+                                          style=CliStyle))
+        if num_formats is None:
+            num_formats = len(tabulate._table_formats)
+
+    assert num_formats == len(tabulate._table_formats)
+    assert tabulate_adapter._get_tablefmt('double', CliStyle) is \
+        tabulate_adapter._get_tablefmt('double', CliStyle)
+    assert tabulate_adapter._get_tablefmt('double', CliStyle) != \
+        tabulate_adapter._get_tablefmt('double', CliStyle, 'Token.Other')
+
+
+def test_styled_table_formats_are_not_kept_by_tabulate():
+    """Test that styled multiline formats are only registered with tabulate
+    while a table is rendered."""
+    unstyled = list(tabulate_adapter.adapter([['a\nb']], ['h'],
+                                             table_format='psql'))
+    assert len(unstyled) == 6
+    num_formats = len(tabulate._table_formats)
+    num_multiline_formats = len(tabulate.multiline_formats)
+    for i in range(tabulate_adapter.STYLED_FORMAT_CACHE_SIZE + 10):
+        style = {'Token.Output.TableSeparator': '#{:06x}'.format(i)}
+        output = tabulate_adapter.adapter([['a\nb']], ['h'],
+                                          table_format='psql', style=style)
+        assert unstyled == [strip_ansi(line) for line in output]
+
+    assert num_formats == len(tabulate._table_formats)
+    assert num_multiline_formats == len(tabulate.multiline_formats)
+
+
+def test_styled_rst_escapes_empty_first_cells():
+    """Test that the empty cells in the first column of a styled rst table
+    are escaped like in an unstyled one."""
+    data, headers = [['', 'b']], ['x', 'y']
+    unstyled = list(tabulate_adapter.adapter(iter(data), headers,
+                                             table_format='rst'))
+    style = {'Token.Output.TableSeparator': 'ansibrightred'}
+    styled = list(tabulate_adapter.adapter(iter(data), headers,
+                                           table_format='rst', style=style))
+
+    assert '..  b' in unstyled
+    assert [strip_ansi(line) for line in styled] == unstyled
+
+
+def test_tabulate_multiline_formats_are_not_changed(monkeypatch):
+    """Test that setting up tabulate doesn't add multiline formats to it,
+    and that newlines are escaped in the formats it doesn't support them
+    in."""
+    tabulate_multiline_formats = dict(tabulate.multiline_formats)
+    del tabulate_multiline_formats['github']
+    monkeypatch.setattr(tabulate, 'multiline_formats',
+                        tabulate_multiline_formats)
+    monkeypatch.setattr(tabulate_adapter, '_tabulate', None)
+    tabulate_adapter.get_tabulate()
+    assert 'github' not in tabulate.multiline_formats
+
+    for style in (None, {'Token.Output.TableSeparator': 'ansibrightred'}):
+        output = tabulate_adapter.adapter([['a\nb']], ['h'],
+                                          table_format='github', style=style)
+        assert ['| h    |', '|------|', '| a\\nb |'] == \
+            [strip_ansi(line) for line in output]
+
+
+def test_multiline_formats():
+    """Test that cells can span lines in the multiline formats."""
+    for format_name in tabulate_adapter.multiline_formats:
+        preprocessors = tabulate_adapter.get_preprocessors(format_name)
+        data, headers = [['a\nb']], ['h']
+        for f in preprocessors:
+            data, headers = f(data, headers)
+        output = list(tabulate_adapter.adapter(
+            list(data), headers, table_format=format_name))
+        assert any(line.strip(' |│') == 'b' for line in output), format_name
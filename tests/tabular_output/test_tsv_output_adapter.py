@@ -31,3 +31,28 @@ def test_unicode_with_tsv():
         letters\tnumber\n\
         观音\t1\n\
         Ποσειδῶν\t456''')
+
+
+@pytest.mark.parametrize('block_size', [1, 2, 5])
+def test_tsv_blocks(block_size):
+    """Test that blocks of rows are the same as the lines of the rows."""
+    data = [['a\tb', '1'], ['c\nd', '2'], ['', 'e'], ['g', '3']]
+    headers = ['letters', 'number']
+    lines = list(tsv_output_adapter.adapter(data, headers))
+    blocks = list(tsv_output_adapter.adapter(iter(data), headers,
+                                             block_size=block_size))
+
+    assert blocks[0] == lines[0]
+    assert len(blocks) == 1 + -(-len(data) // block_size)
+    assert '\n'.join(blocks) == '\n'.join(lines)
+
+    with pytest.raises(ValueError):
+        list(tsv_output_adapter.adapter(data, headers, block_size=0))
+
+
+def test_tsv_blocks_with_separators():
+    """Test that blocks whose fields contain the block separators are the
+    same as the lines of the rows."""
+    data = [['a\x1fb', '\x1e'], ['c', 'd']]
+    output = tsv_output_adapter.adapter(data, ['h1', 'h2'], block_size=2)
+    assert list(output) == ['h1\th2', 'a\x1fb\t\x1e\nc\td']
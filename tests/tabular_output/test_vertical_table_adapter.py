@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """Test the vertical table formatter."""
 
+from __future__ import unicode_literals
 from textwrap import dedent
 
 from cli_helpers.compat import text_type
@@ -36,3 +37,54 @@ def test_vertical_table_customized():
     assert expected == "\n".join(vertical_table_adapter.adapter(
         results, ('name', 'age'), sep_title='PERSON {n}',
         sep_character='-', sep_length=(1, 5)))
+
+
+def test_vertical_table_wide_headers():
+    """Test that headers with wide characters and styles are aligned."""
+    headers = ('名前', 'id', '\x1b[1mage\x1b[0m')
+    results = [('x', '1', '2')]
+
+    expected = dedent("""\
+        ***************************[ 1. row ]***************************
+        名前 | x
+        id   | 1
+        \x1b[1mage\x1b[0m  | 2""")
+    assert expected == "\n".join(
+        vertical_table_adapter.adapter(results, headers))
+
+
+def test_vertical_table_non_printable_headers():
+    """Test that headers with tabs and newlines are padded by length."""
+    headers = ('a\tb', 'a\nb', 'id')
+    results = [('x', 'y', 'z')]
+
+    expected = dedent("""\
+        *[ 1 ]*
+        a\tb | x
+        a
+        b | y
+        id  | z""")
+    assert expected == "\n".join(vertical_table_adapter.adapter(
+        results, headers, sep_title='{n}', sep_length=1))
+
+
+def test_vertical_table_chunks():
+    """Test that the records can be yielded in chunks."""
+    results = [(text_type(i),) for i in range(5)]
+    records = list(vertical_table_adapter.adapter(
+        iter(results), ('n',), sep_title='{n}', sep_length=1))
+    chunks = list(vertical_table_adapter.adapter(
+        iter(results), ('n',), sep_title='{n}', sep_length=1,
+        records_per_chunk=2))
+
+    assert ['*[ 1 ]*\nn | 0', '*[ 2 ]*\nn | 1'] == records[:2]
+    assert 3 == len(chunks)
+    assert '\n'.join(records) == '\n'.join(chunks)
+
+
+def test_vertical_table_separator_braces():
+    """Test that braces in the separator characters are kept."""
+    output = vertical_table_adapter.adapter(
+        [('x',)], ('a',), sep_title='{n:02d} {{row}}', sep_character='{',
+        sep_length=(1, 2))
+    assert ['{[ 01 {row} ]{{\na | x'] == list(output)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""Test the built-in ANSI styling backend."""
+
+from __future__ import unicode_literals
+import subprocess
+import sys
+
+import pytest
+
+from cli_helpers import ansi, utils
+from cli_helpers.tabular_output import TabularOutputFormatter
+
+STYLES = {
+    'Token.Output.Header': 'bold ansibrightred',
+    'Token.Output.OddRow': 'bg:#eee #111',
+    'Token.Output.EvenRow': '#0f0',
+    'Token.Output.Null': 'italic underline #f00',
+    'Token.Output.TableSeparator': 'ansibrightred bg:ansiblue',
+}
+
+
+def pygments_style(styles):
+    """Make a Pygments style from a dict of *styles*."""
+    from pygments.style import Style
+    from pygments.token import string_to_tokentype
+
+    return type(str('CliStyle'), (Style,), {
+        'default_style': '',
+        'styles': {string_to_tokentype(token): value
+                   for token, value in styles.items()}})
+
+
+def test_style_codes():
+    """Test that the codes of a style are resolved."""
+    codes = ansi.get_style_codes(STYLES)
+
+    assert ('\x1b[91;01m', '\x1b[39;00m') == codes['Token.Output.Header']
+    assert ('\x1b[38;5;233;48;5;7m', '\x1b[39;49m') == \
+        codes['Token.Output.OddRow']
+    assert ('\x1b[38;5;9;04;03m', '\x1b[39;00m') == \
+        codes['Token.Output.Null']
+    assert ('\x1b[91;44m', '\x1b[39;49m') == \
+        codes['Token.Output.TableSeparator']
+
+
+def test_style_codes_match_pygments():
+    """Test that the codes are the same as Pygments' codes."""
+    pytest.importorskip('pygments')
+    from pygments.formatters.terminal256 import Terminal256Formatter
+
+    styles = dict(STYLES, **{'Token': 'bold', 'Token.Output': '#123456',
+                             'Token.Output.EvenRow': 'noinherit #abc'})
+    formatter = Terminal256Formatter(style=pygments_style(styles))
+    codes = ansi.get_style_codes(styles)
+    for token in styles:
+        assert formatter.style_string[token] == codes[token], token
+
+
+def test_true_color():
+    """Test that an AnsiStyle can output 24-bit colors."""
+    style = ansi.AnsiStyle({'Token.Output.OddRow': 'bg:#eee #102030 bold'},
+                           true_color=True)
+    assert ('\x1b[38;2;16;32;48;48;2;238;238;238;01m', '\x1b[39;49;00m') == \
+        ansi.get_style_codes(style)['Token.Output.OddRow']
+    assert style != ansi.AnsiStyle(style)
+    assert hash(style) == hash(ansi.AnsiStyle(style, true_color=True))
+
+
+def test_style_text():
+    """Test that text is styled line by line, with inherited styles."""
+    style = {'Token.Output': 'bold', 'Token.Output.OddRow': '#f00'}
+    assert '\x1b[38;5;9;01ma\x1b[39;00m\n\n\x1b[38;5;9;01mb\x1b[39;00m' == \
+        ansi.style_text('Token.Output.OddRow', 'a\n\nb', style)
+    assert '\x1b[01ma\x1b[00m' == \
+        ansi.style_text('Token.Output.EvenRow', 'a', style)
+    assert 'a' == ansi.style_text('Token.Other', 'a', style)
+    assert '\x1b[01ma\x1b[00m' == utils.style_field('Token.Output.Header',
+                                                    'a', style)
+
+
+def test_invalid_color():
+    """Test that an invalid color is an error."""
+    with pytest.raises(ValueError):
+        ansi.get_style_codes({'Token.Output.OddRow': 'red'})
+
+
+@pytest.mark.parametrize('format_name', ['psql', 'double', 'vertical', 'csv'])
+def test_mapping_style_matches_pygments_style(format_name):
+    """Test that a mapping styles the output like the same Pygments style."""
+    pytest.importorskip('pygments')
+    data = [['a', None, 'b\nc'], ['dd', 2, '']]
+    headers = ['h1', 'h2', 'h3']
+    formatter = TabularOutputFormatter(format_name)
+
+    assert list(formatter.format_output(
+        data, headers, style=pygments_style(STYLES))) == list(
+        formatter.format_output(data, headers, style=STYLES))
+
+
+def test_mapping_style_does_not_import_pygments():
+    """Test that output styled by a mapping doesn't import Pygments."""
+    code = ('import sys; from cli_helpers.tabular_output import format_output; '
+            'list(format_output([["a", None]], ["h", "i"], "psql", '
+            'style={"Token.Output.OddRow": "#f00"})); '
+            'assert "pygments" not in sys.modules')
+    subprocess.check_call([sys.executable, '-c', code])
@@ -1,5 +1,38 @@
+import subprocess
+import sys
+
+import pytest
+
 import cli_helpers
 
 
 def test_cli_helpers():
-    assert True
+    assert cli_helpers.__version__
+
+
+def test_terminal256_formatter_is_imported_on_first_use():
+    """Test that Pygments' formatter can be looked up on every Python."""
+    pytest.importorskip('pygments')
+    from pygments.formatters.terminal256 import Terminal256Formatter
+    from cli_helpers import compat
+
+    assert compat.get_terminal256_formatter() is Terminal256Formatter
+
+
+@pytest.mark.parametrize('module, lazy_modules', [
+    ('cli_helpers.tabular_output',
+     ('tabulate', 'pygments', 'asyncio', 'concurrent.futures', 'inspect',
+      'linecache', 'pickle', 'tempfile',
+      'cli_helpers.tabular_output.native_table',
+      'cli_helpers.tabular_output.spill',
+      'cli_helpers.tabular_output.streaming')),
+    ('cli_helpers.config', ('configobj', 'validate')),
+])
+def test_heavy_dependencies_are_imported_lazily(module, lazy_modules):
+    """Test that importing CLI Helpers doesn't import heavy dependencies,
+    or its own modules that are only needed to render some tables."""
+    code = 'import sys, {}; print(" ".join(sys.modules))'.format(module)
+    imported = subprocess.check_output(
+        [sys.executable, '-c', code], universal_newlines=True).split()
+    assert module in imported
+    assert [m for m in lazy_modules if m in imported] == []
@@ -3,6 +3,8 @@
 
 from __future__ import unicode_literals
 
+import pytest
+
 from cli_helpers import utils
 
 
@@ -68,3 +70,86 @@ def test_filter_dict_by_key():
     fd = utils.filter_dict_by_key(d, keys)
     assert len(fd) == 1
     assert all([k in keys for k in fd])
+
+
+def test_align_decimals_column():
+    """Test that align_decimals_column() pads the integer parts."""
+    assert [' 1.5', '10.25', ' 3'] == utils.align_decimals_column(
+        [1.5, 10.25, 3])
+    assert [] == utils.align_decimals_column([])
+
+
+def test_align_decimals_column_numpy():
+    """Test that align_decimals_column() matches for NumPy arrays."""
+    np = pytest.importorskip('numpy')
+    values = [1.5, 10.25, 1e20, float('nan'), -0.0, 1 / 3.0]
+    assert utils.align_decimals_column(values) == \
+        utils.align_decimals_column(np.array(values))
+
+
+def test_format_numbers_column():
+    """Test that format_numbers_column() only formats the number types."""
+    assert ['1,000', None, 'x'] == utils.format_numbers_column(
+        [1000, None, 'x'], ',', (int,))
+
+
+def test_format_numbers_column_numpy():
+    """Test that format_numbers_column() matches for NumPy arrays."""
+    np = pytest.importorskip('numpy')
+    assert ['1,000', '2'] == utils.format_numbers_column(
+        np.array([1000, 2]), ',', (int,))
+    assert ['1,000.50'] == utils.format_numbers_column(
+        np.array([1000.5]), ',.2f', (float,))
+
+
+def test_display_width():
+    """Test that display_width() counts the columns a string takes up."""
+    assert utils.display_width('') == 0
+    assert utils.display_width('abc') == 3
+    assert utils.display_width('观音') == 4
+    assert utils.display_width('\x1b[31m观音\x1b[0m') == 4
+    assert utils.display_width('\x1b[1mbold\x1b[0m') == 4
+    assert utils.display_width('é') == 1
+    assert utils.display_width('a\x07b') == -1
+    assert utils.display_width('abc\n') == -1
+
+
+def test_display_width_cache():
+    """Test that display_width() caches the widths of non-ASCII strings."""
+    utils.set_display_width_cache_size(2)
+    try:
+        for value in ('abc', '观音', '观音', 'ﾃｽﾄ', 'Ελ'):
+            utils.display_width(value)
+        info = utils.display_width_cache_info()
+        assert (info.hits, info.misses, info.maxsize, info.currsize) == (
+            1, 3, 2, 2)
+    finally:
+        utils.set_display_width_cache_size()
+    assert utils.display_width_cache_info().currsize == 0
+
+
+@pytest.mark.parametrize('token', ['Token.Output.OddRow',
+                                   'Token.Output.TableSeparator'])
+def test_style_field(token):
+    """Test that style_field() styles fields like Pygments."""
+    pygments = pytest.importorskip('pygments')
+    from pygments.formatters.terminal256 import Terminal256Formatter
+    from pygments.style import Style
+    from pygments.token import Token
+
+    class CliStyle(Style):
+        default_style = ""
+        styles = {
+            Token.Output.OddRow: 'bold bg:#eee #111',
+            Token.Output.TableSeparator: '',
+        }
+
+    formatter = Terminal256Formatter(style=CliStyle)
+    fields = ('abc', '', 'a\nb', '\n', '观音')
+    expected = [pygments.format(((token, field),), formatter)
+                for field in fields]
+    assert expected == [utils.style_field(token, field, CliStyle)
+                        for field in fields]
+    assert expected == utils.style_fields(token, fields, CliStyle)
+    assert utils.get_style_codes(CliStyle)[token] == \
+        formatter.style_string[token]